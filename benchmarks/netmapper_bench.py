@@ -0,0 +1,206 @@
+"""
+Benchmarks for NetworkMapping across fabric sizes.
+
+Every step runs on a fresh NetworkMapping in a scratch working directory (the outputs are written relative to the
+working directory), the fastest of `--repeat` runs is kept. Peak memory is measured with tracemalloc in a separate
+pass with --memory, tracemalloc slows Python allocations down so it never affects the timings.
+
+    python benchmarks/netmapper_bench.py run --sizes 32 64 256 1024 4096 --memory
+    python benchmarks/netmapper_bench.py compare --threshold 0.1
+
+Every run is appended to a JSON history file, `compare` checks the latest run against the one before it
+(or the run given with --baseline) and exits with 1 when a step got slower (or used more memory) than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.insert(0, str(REPO_DIR))
+
+from util.spectrumx_netmapper import NetworkMapping  # noqa: E402
+
+DEFAULT_SIZES = (32, 64, 256, 1024, 4096)
+DEFAULT_HISTORY = REPO_DIR / "benchmarks" / "history.json"
+MODES = {"air": True, "breakout": False}     # mode name -> nvidia_air
+
+
+def _build(mapper):
+    # NetworkMapping computes its data sets lazily, building means the link tables and the device inventory
+    return mapper.host_links, mapper.leaf_spine_links, mapper.spine_super_spine_links, mapper.inventory
+
+
+STEPS = {
+    "build": _build,
+    "create_excel": lambda mapper: mapper.create_excel(),
+    "create_dot_graph": lambda mapper: mapper.create_dot_graph(),
+    "generate_ansible_hosts": lambda mapper: mapper.generate_ansible_hosts(),
+    "generate_air_script": lambda mapper: mapper.generate_air_script(),
+}
+
+
+def run_step(step, num_hosts, mode, file_dir, memory=False) -> float:
+    """
+    :return: seconds the step took, or the peak traced memory in bytes when memory is set
+    """
+    mapper = NetworkMapping(num_hosts=num_hosts, nvidia_air=MODES[mode], file_dir=file_dir)
+    if memory:
+        tracemalloc.start()
+        try:
+            STEPS[step](mapper)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    start = time.perf_counter()
+    STEPS[step](mapper)
+    return time.perf_counter() - start
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, modes=tuple(MODES), steps=tuple(STEPS), repeat=3, memory=False,
+                   progress=print) -> list:
+    """
+    :return: list of results {"hosts", "mode", "step", "seconds", "peak_bytes"}, peak_bytes is None without memory
+    """
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="netmapper_bench_") as work_dir:
+        # templates are loaded relative to the working directory, the outputs must not end up in the repo
+        os.symlink(REPO_DIR / "jinja_templates", Path(work_dir) / "jinja_templates")
+        os.chdir(work_dir)
+        try:
+            for num_hosts in sizes:
+                for mode in modes:
+                    for step in steps:
+                        file_dir = str(Path(work_dir) / f"{num_hosts}_{mode}")
+                        os.makedirs(file_dir, exist_ok=True)
+                        seconds = min(run_step(step, num_hosts, mode, file_dir) for _ in range(repeat))
+                        peak_bytes = run_step(step, num_hosts, mode, file_dir, memory=True) if memory else None
+                        results.append({"hosts": num_hosts, "mode": mode, "step": step,
+                                        "seconds": seconds, "peak_bytes": peak_bytes})
+                        if progress:
+                            progress(_format_result(results[-1]))
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def load_history(path) -> list:
+    path = Path(path)
+    if not path.exists():
+        return []
+    return json.loads(path.read_text())
+
+
+def append_history(path, results) -> dict:
+    """
+    Appends a run to the history file, a run records the results, the git commit and the platform
+    """
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    history = load_history(path)
+    history.append(run)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(history, indent=1))
+    return run
+
+
+def compare_runs(baseline, current, threshold=0.1, min_seconds=0.01) -> list:
+    """
+    :param baseline: run of the history file to compare against
+    :param current: run of the history file to check
+    :param threshold: relative increase that's flagged, 0.1 flags steps that got more than 10% slower
+    :param min_seconds: steps faster than this are timer noise, their timings aren't compared
+    :return: list of regressions {"hosts", "mode", "step", "metric", "baseline", "current", "change"}
+    """
+    baseline_results = {(result["hosts"], result["mode"], result["step"]): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        previous = baseline_results.get((result["hosts"], result["mode"], result["step"]))
+        if previous is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if not previous.get(metric) or result.get(metric) is None:
+                continue
+            if metric == "seconds" and result[metric] < min_seconds:
+                continue
+            change = result[metric] / previous[metric] - 1
+            if change > threshold:
+                regressions.append({"hosts": result["hosts"], "mode": result["mode"], "step": result["step"],
+                                    "metric": metric, "baseline": previous[metric], "current": result[metric],
+                                    "change": change})
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_result(result) -> str:
+    text = f"{result['hosts']:>6} hosts {result['mode']:<9} {result['step']:<24} {result['seconds']:9.4f}s"
+    if result["peak_bytes"] is not None:
+        text += f" {result['peak_bytes'] / 2 ** 20:9.1f} MB"
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NetworkMapping benchmarks")
+    parser.add_argument('--history', default=str(DEFAULT_HISTORY), help="JSON history file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks and append them to the history")
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="numbers of hosts")
+    run_parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    run_parser.add_argument('--steps', nargs='+', choices=list(STEPS), default=list(STEPS))
+    run_parser.add_argument('--repeat', type=int, default=3, help="runs per step, the fastest one is kept")
+    run_parser.add_argument('--memory', action='store_true', help="also measure the peak memory with tracemalloc")
+
+    compare_parser = commands.add_parser('compare', help="flag regressions of a run against a baseline run")
+    compare_parser.add_argument('--baseline', type=int, default=-2, help="index of the baseline run in the history")
+    compare_parser.add_argument('--current', type=int, default=-1, help="index of the run to check")
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help="relative increase that's flagged")
+    compare_parser.add_argument('--min-seconds', type=float, default=0.01,
+                                help="steps faster than this are not compared, their timings are mostly noise")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_benchmarks(args.sizes, args.modes, args.steps, args.repeat, args.memory)
+        append_history(args.history, results)
+        return 0
+
+    history = load_history(args.history)
+    if len(history) < 2:
+        print(f"{args.history} needs at least 2 runs to compare")
+        return 0
+    baseline, current = history[args.baseline], history[args.current]
+    regressions = compare_runs(baseline, current, args.threshold, args.min_seconds)
+    print(f"baseline {baseline['timestamp']} ({baseline['commit']}), current {current['timestamp']} "
+          f"({current['commit']}), threshold {args.threshold:.0%}")
+    for regression in regressions:
+        print(f"REGRESSION {regression['hosts']:>6} hosts {regression['mode']:<9} {regression['step']:<24} "
+              f"{regression['metric']}: {regression['baseline']:.4g} -> {regression['current']:.4g} "
+              f"(+{regression['change']:.0%})")
+    if not regressions:
+        print("no regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,19 @@
 from abc import ABC, abstractmethod
+from data_handler.device_config import ConfigBuilder
 from data_handler.payload_handler import render_jinja
 from device_store import DeviceStore
-import os
 
 device_store = DeviceStore()
 
 
 class BaseConfigManager(ABC):
-    def __init__(self, rows, file_dir):
+    def __init__(self, rows, file_dir, builder=None):
+        """
+        :param builder: ConfigBuilder shared by the sheets of a run, see data_handler.device_config
+        """
         self.rows = rows
         self.file_dir = file_dir
-        self.initialized_files = set()  # Set to keep track of initialized files
+        self.builder = builder if builder is not None else ConfigBuilder(file_dir, comment_prefix="#")
         self.function_map = {}  # To be defined in subclasses
 
     @abstractmethod
@@ -37,16 +40,17 @@ class BaseConfigManager(ABC):
             # Non-role-based configuration: Apply to all devices
             filtered_devices = device_store.device_list
 
-        # Apply configurations to the filtered devices
+        # The configuration is the same for every device, it's built once and written once per device
+        config_payload = "".join(str(row.get('Configuration').strip()) + '\n' for row in rows)
+        if not config_payload:
+            return
         for device in filtered_devices:
-            for row in rows:
-                config_payload = str(row.get('Configuration').strip())  # Direct config value
-                self.render_and_write_config(
-                    config_payload=config_payload,
-                    device_name=device.name,
-                    extension_prefix=f"01-{sheet_name}".lower(),
-                    comment=f"{sheet_name} Configurations"
-                )
+            self.write_config(
+                payload=config_payload,
+                device_name=device.name,
+                extension_prefix=f"01-{sheet_name}".lower(),
+                comment=f"{sheet_name} Configurations"
+            )
 
     @staticmethod
     def extract_role_from_sheet(sheet_name):
@@ -61,17 +65,6 @@ class BaseConfigManager(ABC):
                 return role
         return None  # Return None for non-role-based configurations
 
-    def initialize_file(self, device_name, extension_prefix, comment=""):
-        """
-        Initialize file with optional comments.
-        """
-        file_path = f'{self.file_dir}/{device_name}/{device_name}-{extension_prefix}.txt'
-        if file_path not in self.initialized_files:
-            with open(file_path, 'w') as ouf:
-                ouf.write(f"#{comment}\n")
-            self.initialized_files.add(file_path)
-        return file_path
-
     def create_config(self, config_type):
         """
         Dynamically execute a configuration creation method based on the function_map.
@@ -100,31 +93,32 @@ class BaseConfigManager(ABC):
         else:
             raise ValueError("Either config_payload or template_name must be provided")
 
-        # Write to the file
-        file_path = self.initialize_file(device_name=device_name, extension_prefix=extension_prefix, comment=comment)
-        with open(file_path, 'a') as ouf:
-            ouf.write(payload)
-            ouf.write('\n')
+        self.write_config(payload=payload + '\n', device_name=device_name, extension_prefix=extension_prefix,
+                          comment=comment)
+
+    def render_and_write_rows(self, template_name, rows, extension_prefix, comment=None):
+        """
+        Batch version of render_and_write_config: the rows are grouped by their 'device_name',
+        the rows of each device are rendered in a single template call when the configurations are built
+        (see ConfigBuilder.render_all).
+        """
+        device_rows = {}
+        for row in rows:
+            device_rows.setdefault(row['device_name'], []).append(row)
+        for device_name, rows in device_rows.items():
+            self.builder.add_rows(device_name, section=extension_prefix, template_name=template_name, rows=rows,
+                                  folder=self.get_template_folder(), comment=comment)
+
+    def write_config(self, payload, device_name, extension_prefix, comment=None):
+        """
+        Adds a rendered block to the section of a device's configuration, the section starts with the comment
+        """
+        self.builder.add(device_name, section=extension_prefix, payload=payload, comment=comment)
 
     def merge_config(self, device_name):
         """
-        Merge a list of type-specific (e.g. DNS, NTP..etc.) to a single configuration file
+        Writes the configuration of a device, its type-specific (e.g. DNS, NTP..etc.) sections in a single file
         :param device_name:
-        :return:
-        """
-
-        device_dir = f'{self.file_dir}/{device_name}'
-        if os.listdir(device_dir):
-            with open(f'{device_dir}/{device_name}.txt', 'w') as outfile:
-                # Iterate over all files in the input directory
-                for filename in sorted(os.listdir(device_dir)):
-                    # Check if the file is a text file
-                    if filename.endswith('.txt') and filename != f"{device_name}.txt":
-                        file_path = os.path.join(device_dir, filename)
-                        # Open and read the content of the text file
-                        with open(file_path, 'r') as infile:
-                            lines = infile.readlines()
-                            non_empty_lines = [line for line in lines if line.strip() != ""]
-                            # Write the content to the output file
-                            outfile.writelines(non_empty_lines)
-                            outfile.writelines('\n')
\ No newline at end of file
+        :return: path of the configuration file
+        """
+        return self.builder.write(device_name)
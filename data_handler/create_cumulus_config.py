@@ -5,6 +5,7 @@ from typing import Literal
 
 from device_store import DeviceStore
 from data_handler.base_config_creator import BaseConfigManager
+from data_handler.device_config import ConfigBuilder
 
 # Access the already initialized singleton instance
 device_store = DeviceStore()
@@ -32,39 +33,41 @@ class CreateCumulusConfig(BaseConfigManager):
         """
         Creates Cumulus syntax for leaf/spine L3 interface configurations.
         """
-        for row in self.rows:
-            data = {
+        rows = [
+            {
                 'device_name': row.get('DeviceName').strip(),
                 'interface': row.get('Interface').strip().lower(),
                 'interface_ip': row.get('InterfaceIP').strip(),
                 'mask': row.get('Mask').strip()
             }
-            self.render_and_write_config(
-                template_name='leaf_spine_interface.j2',
-                data=data,
-                device_name=data['device_name'],
-                extension_prefix='l3_interface',
-                comment='Leaf to Spine interface configuration'
-            )
+            for row in self.rows
+        ]
+        self.render_and_write_rows(
+            template_name='leaf_spine_interface.j2',
+            rows=rows,
+            extension_prefix='l3_interface',
+            comment='Leaf to Spine interface configuration'
+        )
 
     def create_bgp_session_config(self):
         """
         Creates Cumulus syntax for BGP session configurations.
         """
-        for row in self.rows:
-            data = {
+        rows = [
+            {
                 'device_name': row.get('DeviceName').strip(),
                 'vrf': row.get('VRF').strip().lower(),
                 'bgp_neighbor': row.get('NeighborIP').strip(),
                 'remote_as': int(row.get('RemoteAS')),
             }
-            self.render_and_write_config(
-                template_name='bgp_session.j2',
-                data=data,
-                device_name=data['device_name'],
-                extension_prefix='bgp_session',
-                comment='BGP session and neighbor configuration between leaf/spine'
-            )
+            for row in self.rows
+        ]
+        self.render_and_write_rows(
+            template_name='bgp_session.j2',
+            rows=rows,
+            extension_prefix='bgp_session',
+            comment='BGP session and neighbor configuration between leaf/spine'
+        )
 
     def create_bgp_global_config(self):
         """
@@ -79,21 +82,22 @@ class CreateCumulusConfig(BaseConfigManager):
             nv set vrf default router bgp address-family ipv4-unicast enable on
             nv set vrf default router bgp address-family ipv4-unicast network 10.0.0.0/32
         """
-        for row in self.rows:
-            data = {
+        rows = [
+            {
                 'device_name': row.get('DeviceName').strip(),
                 'vrf': row.get('VRF').strip().lower(),
                 'local_as': int(row.get('AS')),
                 'router_id': row.get('RouterID').strip(),
                 'loopback_ip': row.get('LoopbackIP').strip()
             }
-            self.render_and_write_config(
-                template_name='bgp_global.j2',
-                data=data,
-                device_name=data['device_name'],
-                extension_prefix='bgp_global',
-                comment='BGP global configuration'
-            )
+            for row in self.rows
+        ]
+        self.render_and_write_rows(
+            template_name='bgp_global.j2',
+            rows=rows,
+            extension_prefix='bgp_global',
+            comment='BGP global configuration'
+        )
 
 
 if __name__ == "__main__":
@@ -101,12 +105,11 @@ if __name__ == "__main__":
     excel_file = "pdg_templates/spectrumx_pdg_template.xlsx"
     data_frame = ReadExcel(excel_file)
     device_store.reinitialize(excel_file, "cumulus_config")
-    #
+    builder = ConfigBuilder("cumulus_config", comment_prefix="#")
     for sheet in ["BGPGlobal", "LeafSpineInterface", "BGPSession"]:
         print ("Processing Sheet....", sheet)
         rows = data_frame.excel_generate_line(sheet)
-        cumulus_config = CreateCumulusConfig(rows, 'cumulus_config')
+        cumulus_config = CreateCumulusConfig(rows, 'cumulus_config', builder=builder)
         cumulus_config.create_config(sheet)
 
-    for device in device_store.device_list:
-        cumulus_config.merge_config(device.name)
\ No newline at end of file
+    builder.write_all(workers=os.cpu_count() or 1)
\ No newline at end of file
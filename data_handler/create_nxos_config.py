@@ -1,8 +1,10 @@
+import os
 import sys
 from pydantic import BaseModel, ValidationError
 from typing import Literal
 import streamlit as st
-from data_handler.payload_handler import render_jinja
+from data_handler.device_config import ConfigBuilder
+from data_handler.payload_handler import render_jinja, render_rows
 from device_store import DeviceStore
 
 # Access the already initialized singleton instance
@@ -30,9 +32,16 @@ class VPCDomain(BaseModel):
 
 
 class CreateNXOSConfig(object):
-    def __init__(self, rows, file_dir):
+    def __init__(self, rows, file_dir, builder=None):
+        """
+        :param rows: rows of the sheet
+        :param file_dir: directory holding one folder per device
+        :param builder: ConfigBuilder shared by the sheets of a run, the configurations are written with
+                        builder.write_all() once every sheet is processed
+        """
         self.rows = rows
         self.file_dir = file_dir
+        self.builder = builder if builder is not None else ConfigBuilder(file_dir, comment_prefix="!")
         self.function_map = {
             'NTP': self.create_generic_config,
             'DNS': self.create_generic_config,
@@ -55,27 +64,49 @@ class CreateNXOSConfig(object):
             'AccL2Intf': self.create_access_l2_intf_config,
             'SVI': self.create_svi_config
         }
-        self.initialized_files = set()  # Set to keep track of initialized files
 
-    def initialize_file(self, device_name, extension, comment=""):
+    def write_config(self, device_name, extension, comment, payload):
         """
-        initialize file with optional comments at the beginning of the file
-        :param device_name: name of the device
-        :param extension: file extension added ,
-            such as 'svi' for svi config creates myconfig-svi.txt indicates it's for SVI configurations
-        :param comment: comment to be added to the starting of each file
-        :return: returns the full file path
+        Adds a rendered block to the section of a device's configuration, the section starts with the comment.
+        Nothing is added for an empty block (a sheet without rows).
         """
-        file_path = f'{self.file_dir}/{device_name}/{device_name}-{extension}.txt'
-        if file_path not in self.initialized_files:
-            try:
-                with open(file_path, 'w') as ouf:
-                    ouf.write(f"!{comment}\n")  # Add the starting line
-                self.initialized_files.add(file_path)  # Mark the file as initialized
-            except FileNotFoundError:
-                st.error(f"Device {device_name} dos not exist in the device list\n{device_store.devices} ")
-                sys.exit()
-        return file_path
+        if not payload:
+            return
+        self.check_device(device_name)
+        self.builder.add(device_name, section=extension, payload=payload, comment=comment)
+
+    def check_device(self, device_name):
+        """
+        Stops the run when a sheet refers to a device that isn't in the device list
+        """
+        if device_name not in self.builder and not os.path.isdir(f'{self.file_dir}/{device_name}'):
+            st.error(f"Device {device_name} dos not exist in the device list\n{device_store.devices} ")
+            sys.exit()
+
+    def write_all_devices(self, template_name, rows, extension, comment):
+        """
+        Renders the rows of a sheet that applies to every device once, and writes them to every device
+        """
+        payload = render_rows(template_name, rows, folder='nxos')
+        for device in device_store.devices:
+            self.write_config(device_name=device.name, extension=extension, comment=comment, payload=payload)
+
+    def write_device_rows(self, template_name, rows, extension, comment):
+        """
+        Groups the rows of a sheet by their 'device_name', the rows of each device are rendered in a single call
+        when the configurations are built (see ConfigBuilder.render_all)
+        """
+        device_rows = {}
+        for row in rows:
+            device_rows.setdefault(row['device_name'], []).append(row)
+        for device_name, rows in device_rows.items():
+            self.check_device(device_name)
+            self.builder.add_rows(device_name,
+                                  section=extension,
+                                  template_name=template_name,
+                                  rows=rows,
+                                  folder='nxos',
+                                  comment=comment)
 
     def create_role_specific_global_config(self, sheet_name):
         """
@@ -85,41 +116,25 @@ class CreateNXOSConfig(object):
         The role matching config is to match the sheet tab named Core/Global
         This function needs to be refactored to merge with the "create_generic_config" method
         """
-        # self.rows is a generator object, we must convert it to list to loop through it multiple times.
-        rows = list(self.rows)
+        generic_config_data = [{'config': str(row.get('Configuration').strip())} for row in self.rows]
+        payload = render_rows('generic_config.j2', generic_config_data, folder='nxos')
         for device in device_store.devices:
             if device.role.lower() in sheet_name.lower():
-                for row in rows:
-                    generic_config_data = {
-                        'config': str(row.get('Configuration').strip())
-                    }
-                    payload = render_jinja(template_name='generic_config.j2', data=generic_config_data, folder='nxos')
-                    file_path = self.initialize_file(device_name=device.name,
-                                                     extension=f"01-{sheet_name}".lower(),
-                                                     comment=f"{sheet_name} Configurations")
-                    with open(file_path, 'a') as ouf:
-                        ouf.write(payload)
-                        ouf.write('\n')
+                self.write_config(device_name=device.name,
+                                  extension=f"01-{sheet_name}".lower(),
+                                  comment=f"{sheet_name} Configurations",
+                                  payload=payload)
 
     def create_generic_config(self, sheet_name):
         """
         Creates NXOS syntax for generic configurations
         All configurations are created on all switches
         """
-        # self.rows is a generator object, we must convert it to list to loop through it multiple times.
-        rows = list(self.rows)
-        for device in device_store.devices:
-            for row in rows:
-                generic_config_data = {
-                    'config': str(row.get('Configuration').strip())
-                }
-                payload = render_jinja(template_name='generic_config.j2', data=generic_config_data, folder='nxos')
-                file_path = self.initialize_file(device_name=device.name,
-                                                 extension=f"02-{sheet_name}".lower(),
-                                                 comment=f"{sheet_name} Configurations")
-                with open(file_path, 'a') as ouf:
-                    ouf.write(payload)
-                    ouf.write('\n')
+        generic_config_data = [{'config': str(row.get('Configuration').strip())} for row in self.rows]
+        self.write_all_devices(template_name='generic_config.j2',
+                               rows=generic_config_data,
+                               extension=f"02-{sheet_name}".lower(),
+                               comment=f"{sheet_name} Configurations")
 
     def create_banner_config(self):
         """
@@ -127,71 +142,61 @@ class CreateNXOSConfig(object):
         All configurations are created on all switches
         Banner should have only 1 row, no jinja template is needed
         """
-        rows = list(self.rows)
+        banner_template_contents = [str(row.get('MOTD')) + "\n!\n" + str(row.get('EXEC')) for row in self.rows]
         for device in device_store.devices:
-            for row in rows:
-                banner_template_content = str(row.get('MOTD')) + "\n!\n" + str(row.get('EXEC'))
-                banner_config_data = {
-                    'Hostname': device.name,
-                    'MgmtIP': device.mgmt_ip,
-                    'Model': device.model,
-                    'SerialNum': device.serial_num,
-                }
-                payload = render_jinja(template_content=banner_template_content, data=banner_config_data)
-                file_path = self.initialize_file(device_name=device.name,
-                                                 extension="03-banner",
-                                                 comment="Banner Configurations")
-                with open(file_path, 'a') as ouf:
-                    ouf.write(payload)
-                    ouf.write('\n')
+            banner_config_data = {
+                'Hostname': device.name,
+                'MgmtIP': device.mgmt_ip,
+                'Model': device.model,
+                'SerialNum': device.serial_num,
+            }
+            payload = "".join(render_jinja(template_content=banner_template_content, data=banner_config_data) + "\n"
+                              for banner_template_content in banner_template_contents)
+            self.write_config(device_name=device.name,
+                              extension="03-banner",
+                              comment="Banner Configurations",
+                              payload=payload)
 
     def create_alias_config(self):
         """
         Creates NXOS syntax for alias configuration
         All aliases are created for all switches
         """
-        # self.rows is a generator object, we must convert it to list to loop through it multiple times.
-        rows = list(self.rows)
-        for device in device_store.devices:
-            for row in rows:
-                alias_data = {
-                    'alias_name': str(row.get('AliasName').strip()),
-                    'command': str(row.get('Command').strip())
-                }
-                payload = render_jinja(template_name='alias.j2', data=alias_data, folder='nxos')
-                file_path = self.initialize_file(device_name=device.name,
-                                                 extension="04-alias",
-                                                 comment="Alias Configurations")
-                with open(file_path, 'a') as ouf:
-                    ouf.write(payload)
-                    ouf.write('\n')
+        alias_data = [
+            {
+                'alias_name': str(row.get('AliasName').strip()),
+                'command': str(row.get('Command').strip())
+            }
+            for row in self.rows
+        ]
+        self.write_all_devices(template_name='alias.j2',
+                               rows=alias_data,
+                               extension="04-alias",
+                               comment="Alias Configurations")
 
     def create_vlan_config(self):
         """
         Creates NXOS syntax VLAN configurations
         All VLANs are created for all switches
         """
-        # self.rows is a generator object, we must convert it to list to loop through it multiple times.
-        rows = list(self.rows)
-        for device in device_store.devices:
-            for row in rows:
-                vlan_data = {
-                    'vlan_id': int(row.get('VLANId')),
-                    'name': str(row.get('Name').strip())
-                }
-                payload = render_jinja(template_name='vlan.j2', data=vlan_data, folder='nxos')
-                file_path = self.initialize_file(device_name=device.name,
-                                                 extension="05-vlan",
-                                                 comment="VLAN configuration")
-                with open(file_path, 'a') as ouf:
-                    ouf.write(payload)
-                    ouf.write('\n')
+        vlan_data = [
+            {
+                'vlan_id': int(row.get('VLANId')),
+                'name': str(row.get('Name').strip())
+            }
+            for row in self.rows
+        ]
+        self.write_all_devices(template_name='vlan.j2',
+                               rows=vlan_data,
+                               extension="05-vlan",
+                               comment="VLAN configuration")
 
     def create_keepalive_config(self):
         """
         Creates NXOS syntax Keepalive Links configuration
         This configuration is only needed if the customer does not use mgmt interface
         """
+        keepalive_rows = []
         for row in self.rows:
             device_name = row.get('DeviceName').strip()
             keepalive_data = {
@@ -205,18 +210,17 @@ class CreateNXOSConfig(object):
 
             if not keepalive_data['interface']:
                 print(f"Missing interface data for row {keepalive_data}")
-            payload = render_jinja(template_name='keepalive.j2', data=keepalive_data, folder='nxos')
-            file_path = self.initialize_file(device_name=device_name,
-                                             extension="06-keepalive",
-                                             comment="Keepalive Interface Configuration")
-            with open(file_path, 'a') as ouf:
-                ouf.write(payload)
-                ouf.write('\n')
+            keepalive_rows.append(keepalive_data)
+        self.write_device_rows(template_name='keepalive.j2',
+                               rows=keepalive_rows,
+                               extension="06-keepalive",
+                               comment="Keepalive Interface Configuration")
 
     def create_vpc_domain_config(self):
         """
         Creates NXOS syntax VPC Domain configurations
         """
+        vpc_domain_rows = []
         for row in self.rows:
             device_name = row.get('DeviceName').strip()
             try:
@@ -236,20 +240,19 @@ class CreateNXOSConfig(object):
                     'ip_arp_sync': str(row.get('IPArpSync').strip())
                 }
                 vpc_domain = VPCDomain(**vpc_domain_data)
-                payload = render_jinja(template_name='vpc_domain.j2', data=vpc_domain.dict(), folder='nxos')
-                file_path = self.initialize_file(device_name=device_name,
-                                                 extension="07-vpc-domain",
-                                                 comment="vPC Domain Configurations")
-                with open(file_path, 'a') as ouf:
-                    ouf.write(payload)
-                    ouf.write('\n')
+                vpc_domain_rows.append(vpc_domain.dict())
             except ValidationError as e:
                 print("Validation error:", e)
+        self.write_device_rows(template_name='vpc_domain.j2',
+                               rows=vpc_domain_rows,
+                               extension="07-vpc-domain",
+                               comment="vPC Domain Configurations")
 
     def create_peer_link_config(self):
         """
         Creates NXOS syntax Peer Link configurations
         """
+        peer_link_rows = []
         for row in self.rows:
             device_name = str(row.get('DeviceName').strip())
             peer_link_data = {
@@ -262,19 +265,18 @@ class CreateNXOSConfig(object):
                 'vlan_operator': str(row.get('VLANOperator')).strip().lower(),
                 'peer_link': str(row.get('PeerLink').strip()).lower(),
             }
-            payload = render_jinja(template_name='peer_link.j2', data=peer_link_data, folder='nxos')
-            file_path = self.initialize_file(device_name=device_name,
-                                             extension="08-peer-link",
-                                             comment="Peer Link Configurations")
-            with open(file_path, 'a') as ouf:
-                ouf.write(payload)
-                ouf.write('\n')
+            peer_link_rows.append(peer_link_data)
+        self.write_device_rows(template_name='peer_link.j2',
+                               rows=peer_link_rows,
+                               extension="08-peer-link",
+                               comment="Peer Link Configurations")
 
     def create_svi_config(self):
         """
         Creates NXOS syntax for SVI configurations
         """
 
+        svi_rows = []
         for row in self.rows:
             device_name = row.get('DeviceName').strip()
             svi_data = {
@@ -292,18 +294,17 @@ class CreateNXOSConfig(object):
                 'hsrp_preempt_delay_min': row.get('HSRPPreemptDelayMin'),
                 'hsrp_priority': row.get('HSRPPriority')
             }
-            payload = render_jinja(template_name='svi.j2', data=svi_data, folder='nxos')
-            file_path = self.initialize_file(device_name=device_name,
-                                             extension="09-svi",
-                                             comment="SVI configuration")
-            with open(file_path, 'a') as ouf:
-                ouf.write(payload)
-                ouf.write('\n')
+            svi_rows.append(svi_data)
+        self.write_device_rows(template_name='svi.j2',
+                               rows=svi_rows,
+                               extension="09-svi",
+                               comment="SVI configuration")
 
     def create_access_l2_intf_config(self):
         """
         Creates NXOS syntax access interface configuration
         """
+        access_l2_intf_rows = []
         for row in self.rows:
             device_name = row.get('DeviceName').strip()
             access_l2_intf_data = {
@@ -321,18 +322,17 @@ class CreateNXOSConfig(object):
             }
             if not access_l2_intf_data['interface']:
                 print(f"Missing interface data for row {access_l2_intf_data}")
-            payload = render_jinja(template_name='access_l2_intf.j2', data=access_l2_intf_data, folder='nxos')
-            file_path = self.initialize_file(device_name=device_name,
-                                             extension="10-access-l2-intf",
-                                             comment="Access Interface Configuration")
-            with open(file_path, 'a') as ouf:
-                ouf.write(payload)
-                ouf.write('\n')
+            access_l2_intf_rows.append(access_l2_intf_data)
+        self.write_device_rows(template_name='access_l2_intf.j2',
+                               rows=access_l2_intf_rows,
+                               extension="10-access-l2-intf",
+                               comment="Access Interface Configuration")
 
     def create_core_l2_intf_config(self):
         """
         Creates NXOS syntax for L2 configurations between core and access
         """
+        core_l2_intf_rows = []
         for row in self.rows:
             device_name = str(row.get('DeviceName').strip())
             core_l2_intf_data = {
@@ -347,18 +347,17 @@ class CreateNXOSConfig(object):
                 'stp_port_type': str(row.get('STPPortType').strip()).lower(),
                 'vpc': str(row.get('VPC').strip()).lower()
             }
-            payload = render_jinja(template_name='core_l2_intf.j2', data=core_l2_intf_data, folder='nxos')
-            file_path = self.initialize_file(device_name=device_name,
-                                             extension="11-core-to-access-l2-interface",
-                                             comment="Core To Access L2 Interface Configurations")
-            with open(file_path, 'a') as ouf:
-                ouf.write(payload)
-                ouf.write('\n')
+            core_l2_intf_rows.append(core_l2_intf_data)
+        self.write_device_rows(template_name='core_l2_intf.j2',
+                               rows=core_l2_intf_rows,
+                               extension="11-core-to-access-l2-interface",
+                               comment="Core To Access L2 Interface Configurations")
 
     def create_ospf_config(self):
         """
         Creates NXOS syntax for OSPF configurations
         """
+        ospf_rows = []
         for row in self.rows:
             device_name = str(row.get('DeviceName').strip())
             ospf_data = {
@@ -369,18 +368,17 @@ class CreateNXOSConfig(object):
                 'passive_default': str(row.get('PassiveDefault')).strip().lower(),
                 'bfd': str(row.get('BFD')).strip()
             }
-            payload = render_jinja(template_name='ospf.j2', data=ospf_data, folder='nxos')
-            file_path = self.initialize_file(device_name=device_name,
-                                             extension="12-ospf",
-                                             comment="OSPF Configurations")
-            with open(file_path, 'a') as ouf:
-                ouf.write(payload)
-                ouf.write('\n')
+            ospf_rows.append(ospf_data)
+        self.write_device_rows(template_name='ospf.j2',
+                               rows=ospf_rows,
+                               extension="12-ospf",
+                               comment="OSPF Configurations")
 
     def create_loopback_config(self):
         """
         Creates NXOS syntax for Loopback configurations
         """
+        loopback_rows = []
         for row in self.rows:
             device_name = str(row.get('DeviceName').strip())
             loopback_data = {
@@ -392,18 +390,17 @@ class CreateNXOSConfig(object):
                 'ospf_process': row.get('OSPFProcess'),
                 'ospf_area': row.get('OSPFArea')
             }
-            payload = render_jinja(template_name='loopback.j2', data=loopback_data, folder='nxos')
-            file_path = self.initialize_file(device_name=device_name,
-                                             extension="13-loopback",
-                                             comment="Loopback Interface Configurations")
-            with open(file_path, 'a') as ouf:
-                ouf.write(payload)
-                ouf.write('\n')
+            loopback_rows.append(loopback_data)
+        self.write_device_rows(template_name='loopback.j2',
+                               rows=loopback_rows,
+                               extension="13-loopback",
+                               comment="Loopback Interface Configurations")
 
     def create_ospf_l3_intf_config(self):
         """
         Creates NXOS syntax for L3 routing interfaces on core router
         """
+        ospf_l3_intf_rows = []
         for row in self.rows:
             device_name = str(row.get('DeviceName').strip())
             ospf_l3_intf_data = {
@@ -425,18 +422,17 @@ class CreateNXOSConfig(object):
                 'mtu': row.get('MTU'),
                 'bfd': row.get('BFD')
             }
-            payload = render_jinja(template_name='ospf_l3_intf.j2', data=ospf_l3_intf_data, folder='nxos')
-            file_path = self.initialize_file(device_name=device_name,
-                                             extension="14-ospf-l3-interface",
-                                             comment="OSPF L3 interface configurations")
-            with open(file_path, 'a') as ouf:
-                ouf.write(payload)
-                ouf.write('\n')
+            ospf_l3_intf_rows.append(ospf_l3_intf_data)
+        self.write_device_rows(template_name='ospf_l3_intf.j2',
+                               rows=ospf_l3_intf_rows,
+                               extension="14-ospf-l3-interface",
+                               comment="OSPF L3 interface configurations")
 
     def create_span_config(self):
         """
         Creates NXOS syntax for SPAN configurations
         """
+        span_rows = []
         for row in self.rows:
             device_name = str(row.get('DeviceName').strip())
             span_data = {
@@ -448,10 +444,8 @@ class CreateNXOSConfig(object):
                 'direction': str(row.get('Direction').strip()),
                 'dst_interface': str(row.get('DstIntf').strip()).lower()
             }
-            payload = render_jinja(template_name='span.j2', data=span_data, folder='nxos')
-            file_path = self.initialize_file(device_name=device_name,
-                                             extension="15-span",
-                                             comment="SPAN Session Configurations")
-            with open(file_path, 'a') as ouf:
-                ouf.write(payload)
-                ouf.write('\n')
\ No newline at end of file
+            span_rows.append(span_data)
+        self.write_device_rows(template_name='span.j2',
+                               rows=span_rows,
+                               extension="15-span",
+                               comment="SPAN Session Configurations")
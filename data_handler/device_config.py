@@ -0,0 +1,207 @@
+"""
+In-memory device configurations.
+
+The configuration creators used to write every section of a device (NTP, VLAN, BGP...) to its own fragment file,
+<file_dir>/<device>/<device>-<section>.txt, and to stitch the fragments together afterwards by reading them
+back (see merge_config.merge_nxos_config). `ConfigBuilder` keeps the sections in memory instead and writes the final
+configuration of a device in one go, the output is the same as the merged fragments:
+
+    builder = ConfigBuilder("configs", comment_prefix="!")
+    CreateNXOSConfig(ntp_rows, "configs", builder=builder).create_generic_config("NTP")
+    CreateNXOSConfig(vlan_rows, "configs", builder=builder).create_vlan_config()
+    builder.write_all()        # configs/<device>/<device>.txt
+
+With debug=True the fragment files are written as well, to look at the output of a single sheet.
+
+Blocks added with `add_rows` are only rendered when the configurations are built. The devices don't depend on each
+other, `render_all(workers=8)` / `write_all(workers=8)` renders them in a process pool, every worker compiles the
+templates of the run once before its first device. The configurations are the same as with a single process.
+"""
+import io
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+from data_handler import payload_handler
+
+TASKS_PER_WORKER = 4    # devices are sent to the workers in chunks, a few chunks per worker balance the load
+
+
+class RenderJob:
+    """
+    Rows of a device rendered with a template in a single call, see payload_handler.render_rows
+    """
+    __slots__ = ("template_name", "folder", "rows", "data")
+
+    def __init__(self, template_name, folder, rows, data=None):
+        self.template_name = template_name
+        self.folder = folder
+        self.rows = rows
+        self.data = data
+
+    def render(self) -> str:
+        return payload_handler.render_rows(self.template_name, self.rows, self.folder, data=self.data)
+
+
+class ConfigBuilder:
+    def __init__(self, file_dir, comment_prefix="!", debug=False):
+        """
+        :param file_dir: directory holding one folder per device
+        :param comment_prefix: comment character of the vendor, "!" for NX-OS and "#" for Cumulus
+        :param debug: also write the fragment file of every section
+        """
+        self.file_dir = file_dir
+        self.comment_prefix = comment_prefix
+        self.debug = debug
+        self._sections: Dict[str, Dict[str, list]] = {}  # device name -> section -> header and blocks/jobs
+        self._configs: Dict[str, str] = {}  # device name -> configuration built by render_all
+
+    def __contains__(self, device_name):
+        return device_name in self._sections
+
+    def devices(self) -> List[str]:
+        """
+        :return: names of the devices with at least one section, in the order they were first added
+        """
+        return list(self._sections)
+
+    def sections(self, device_name) -> List[str]:
+        """
+        :return: section names of a device, in the order of the final configuration
+        """
+        # the fragments were merged in file name order, <device>-<section>.txt
+        return sorted(self._sections.get(device_name, {}), key=lambda section: f"{section}.txt")
+
+    def add(self, device_name, section, payload, comment=""):
+        """
+        Appends a rendered block to a section of a device, the section starts with its comment line
+
+        :param section: name of the section, e.g. "01-ntp", it orders the sections of the configuration
+        """
+        sections = self._sections.setdefault(device_name, {})
+        blocks = sections.get(section)
+        if blocks is None:
+            blocks = sections[section] = [f"{self.comment_prefix}{comment}\n"]
+        blocks.append(payload)
+        self._configs.pop(device_name, None)
+
+    def add_rows(self, device_name, section, template_name, rows, folder, comment="", data=None):
+        """
+        Appends the rows of a device to a section, they are rendered in a single call when the configuration is built
+
+        :param rows: per-row data dictionaries of the template, see payload_handler.render_rows
+        """
+        self.add(device_name, section, RenderJob(template_name, folder, rows, data), comment=comment)
+
+    def fragment(self, device_name, section) -> str:
+        """
+        :return: content of a section, the same as its fragment file
+        """
+        return "".join(block if isinstance(block, str) else block.render()
+                       for block in self._sections[device_name][section])
+
+    def render(self, device_name) -> str:
+        """
+        :return: final configuration of a device, the non-empty lines of every section followed by an empty line
+        """
+        config = self._configs.get(device_name)
+        if config is not None:
+            return config
+        lines = []
+        for section in self.sections(device_name):
+            # newline=None reads the lines like a text file does
+            lines.extend(line for line in io.StringIO(self.fragment(device_name, section), newline=None)
+                         if line.strip() != "")
+            lines.append("\n")
+        return "".join(lines)
+
+    def render_all(self, workers=1, mp_context=None) -> Dict[str, str]:
+        """
+        Builds the configuration of every device, in a process pool with more than one worker
+
+        :param workers: number of worker processes, each one renders the configurations of a share of the devices
+        :param mp_context: multiprocessing context of the pool, e.g. multiprocessing.get_context("spawn") when
+                           the caller runs other threads (forking a multithreaded process can deadlock the workers)
+        :return: configuration of every device, in the order of `devices`
+        """
+        pending = [device_name for device_name in self._sections if device_name not in self._configs]
+        if workers > 1 and len(pending) > 1:
+            templates = sorted({(block.folder, block.template_name) for device_name in pending
+                                for blocks in self._sections[device_name].values()
+                                for block in blocks if isinstance(block, RenderJob)})
+            chunksize = max(1, math.ceil(len(pending) / (workers * TASKS_PER_WORKER)))
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=mp_context,
+                                     initializer=_warm_templates,
+                                     initargs=(payload_handler.renderer.template_root, templates)) as executor:
+                results = executor.map(_render_device, [self.comment_prefix] * len(pending), pending,
+                                       [self._sections[device_name] for device_name in pending], chunksize=chunksize)
+                for device_name, (sections, config) in zip(pending, results):
+                    self._sections[device_name] = sections
+                    self._configs[device_name] = config
+        else:
+            for device_name in pending:
+                self._configs[device_name] = self._build(device_name)
+        return {device_name: self._configs[device_name] for device_name in self._sections}
+
+    def _build(self, device_name) -> str:
+        """
+        Renders the jobs of a device, the rendered sections replace them (e.g. for the debug fragments)
+
+        :return: configuration of the device
+        """
+        sections = self._sections[device_name]
+        for section, blocks in sections.items():
+            if not all(isinstance(block, str) for block in blocks):
+                sections[section] = [self.fragment(device_name, section)]
+        return self.render(device_name)
+
+    def write(self, device_name) -> str:
+        """
+        Writes the configuration of a device to <file_dir>/<device>/<device>.txt
+
+        :return: path of the configuration file
+        """
+        device_dir = os.path.join(self.file_dir, device_name)
+        if self.debug:
+            for section in self.sections(device_name):
+                with open(os.path.join(device_dir, f"{device_name}-{section}.txt"), 'w') as ouf:
+                    ouf.write(self.fragment(device_name, section))
+        file_path = os.path.join(device_dir, f"{device_name}.txt")
+        with open(file_path, 'w') as ouf:
+            ouf.write(self.render(device_name))
+        return file_path
+
+    def write_all(self, workers=1, mp_context=None) -> List[str]:
+        """
+        Writes the configuration of every device with sections
+
+        :param workers: number of worker processes rendering the configurations, see render_all
+        :param mp_context: multiprocessing context of the pool, see render_all
+        :return: paths of the configuration files
+        """
+        self.render_all(workers=workers, mp_context=mp_context)
+        return [self.write(device_name) for device_name in self._sections]
+
+
+def _warm_templates(template_root, templates):
+    """
+    Process pool initializer of `ConfigBuilder.render_all`, compiles the templates of the run once per worker
+    """
+    if payload_handler.renderer.template_root != template_root:
+        payload_handler.renderer = payload_handler.TemplateRenderer(template_root)
+    for folder, template_name in templates:
+        if payload_handler.renderer.batch_template(template_name, folder) is None:
+            payload_handler.renderer.get_template(template_name, folder)
+            payload_handler.renderer.row_loop(folder)
+
+
+def _render_device(comment_prefix, device_name, sections):
+    """
+    Process pool task of `ConfigBuilder.render_all`
+
+    :return: (rendered sections, configuration) of the device
+    """
+    builder = ConfigBuilder(file_dir=None, comment_prefix=comment_prefix)
+    builder._sections[device_name] = sections
+    config = builder._build(device_name)
+    return builder._sections[device_name], config
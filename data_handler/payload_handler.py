@@ -1,12 +1,218 @@
 # Restrcuture the data input from Excel sheet
 
+import hashlib
 import json
-from jinja2 import Environment, Template, FileSystemLoader
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, TemplateNotFound
+from jinja2.runtime import Context
+
+TEMPLATE_ROOT = 'jinja_templates'
+INLINE_CACHE_SIZE = 256     # compiled inline templates (e.g. banners from Excel) kept in memory
+BATCH_SUFFIX = '_batch'     # vlan.j2 -> vlan_batch.j2, optional collection-aware form of a template
+# renders the per-row template for every row in a single call, see RowContext
+ROW_LOOP = "{% for row in rows %}{% include row_template %}\n{% endfor %}"
+
+
+class RowContext(Context):
+    """
+    Context of the file templates. Names are looked up in the current `row` first, so the per-row template
+    included by ROW_LOOP renders the fields of its row like it does when it's rendered on its own.
+    """
+
+    def resolve_or_missing(self, key):
+        if key != "row":
+            row = super().resolve_or_missing("row")
+            if isinstance(row, Mapping) and key in row:
+                return row[key]
+        return super().resolve_or_missing(key)
+
+
+class TemplateRenderer:
+    """
+    Compiles every template once and keeps it.
+
+    - File templates are loaded through one shared Environment per template folder. The templates are kept
+      as long as the file doesn't change, and their bytecode is stored on disk for the next process.
+    - Inline templates (from Excel or other sources) are compiled once per distinct source.
+      They are kept in a bounded LRU keyed by the source hash.
+
+    Many rows are rendered in a single call with `render_rows`, a loop over the rows includes the per-row template
+    (see ROW_LOOP), so the per-row template is the only copy of the configuration syntax. A folder may still
+    provide a collection-aware form of a template (<name>_batch.j2) that loops over `rows` itself:
+
+        {% for row in rows -%}
+        vlan {{ row.vlan_id }}
+          name {{ row.name }}
+        {% endfor %}
+
+    It must produce each row's block followed by a newline, the same output as the per-row template.
+    """
+
+    def __init__(self, template_root=TEMPLATE_ROOT, bytecode_dir=None, inline_cache_size=INLINE_CACHE_SIZE):
+        """
+        :param template_root: directory holding one folder of templates per vendor/output
+        :param bytecode_dir: directory of the on-disk bytecode cache, defaults to a per-user temporary directory
+        :param inline_cache_size: maximum number of compiled inline templates
+        """
+        self.template_root = template_root
+        self.bytecode_cache = FileSystemBytecodeCache(bytecode_dir) if bytecode_dir else FileSystemBytecodeCache()
+        self.inline_cache_size = inline_cache_size
+        # inline templates use the same settings as jinja2.Template(...)
+        self._inline_environment = Environment()
+        self._environments = {}
+        self._templates = {}
+        self._inline_templates = OrderedDict()
+        self._batch_templates = {}
+        self._row_loops = {}
+        self._lock = threading.Lock()
+        self.file_hits = 0
+        self.file_loads = 0
+        self.inline_hits = 0
+        self.inline_misses = 0
+        self.inline_evictions = 0
+        self.batch_renders = 0
+        self.row_renders = 0
+
+    def environment(self, folder) -> Environment:
+        """
+        :return: the shared Environment of a template folder
+        """
+        environment = self._environments.get(folder)
+        if environment is None:
+            with self._lock:
+                environment = self._environments.get(folder)
+                if environment is None:
+                    environment = Environment(lstrip_blocks=True,
+                                              loader=FileSystemLoader(f'{self.template_root}/{folder}'),
+                                              bytecode_cache=self.bytecode_cache)
+                    environment.context_class = RowContext
+                    self._environments[folder] = environment
+        return environment
+
+    def get_template(self, template_name, folder):
+        """
+        :return: compiled template of a file, it's only loaded again when the file changed
+        """
+        key = (folder, template_name)
+        template = self._templates.get(key)
+        if template is not None and template.is_up_to_date:
+            self.file_hits += 1
+            return template
+        template = self.environment(folder).get_template(template_name)
+        self._templates[key] = template
+        self.file_loads += 1
+        return template
+
+    def inline_template(self, template_content):
+        """
+        :return: compiled template of an inline template source
+        """
+        key = hashlib.sha256(template_content.encode()).digest()
+        with self._lock:
+            template = self._inline_templates.get(key)
+            if template is not None:
+                self._inline_templates.move_to_end(key)
+                self.inline_hits += 1
+                return template
+            self.inline_misses += 1
+        template = self._inline_environment.from_string(template_content)
+        with self._lock:
+            self._inline_templates[key] = template
+            while len(self._inline_templates) > self.inline_cache_size:
+                self._inline_templates.popitem(last=False)
+                self.inline_evictions += 1
+        return template
+
+    def batch_template(self, template_name, folder):
+        """
+        :return: compiled collection-aware form of a template, None when the folder doesn't have one
+        """
+        key = (folder, template_name)
+        if key not in self._batch_templates:
+            stem, _, extension = template_name.rpartition('.')
+            batch_name = f"{stem}{BATCH_SUFFIX}.{extension}" if stem else f"{template_name}{BATCH_SUFFIX}"
+            try:
+                self.get_template(batch_name, folder)
+                self._batch_templates[key] = batch_name
+            except TemplateNotFound:
+                self._batch_templates[key] = None
+        batch_name = self._batch_templates[key]
+        return self.get_template(batch_name, folder) if batch_name else None
+
+    def row_loop(self, folder):
+        """
+        :return: compiled ROW_LOOP of a template folder
+        """
+        template = self._row_loops.get(folder)
+        if template is None:
+            template = self._row_loops[folder] = self.environment(folder).from_string(ROW_LOOP)
+        return template
+
+    def render_rows(self, template_name, rows, folder, data=None):
+        """
+        Renders the block of every row in a single call, every block is followed by a newline
+
+        :param template_name: per-row template, its batch form is used when it exists
+        :param rows: list of per-row data dictionaries, the same data the per-row template gets
+        :param data: optional data shared by all rows
+        :return: rendered string, empty when there are no rows
+        """
+        if not rows:
+            return ""
+        template = self.batch_template(template_name, folder)
+        if template is not None:
+            self.batch_renders += 1
+            return template.render(data or {}, rows=rows)
+        self.row_renders += len(rows)
+        return self.row_loop(folder).render(data or {}, rows=rows,
+                                            row_template=self.get_template(template_name, folder))
+
+    def render(self, template_name=None, data=None, folder=None, template_content=None):
+        """
+        See render_jinja
+        """
+        if template_content:
+            template = self.inline_template(template_content)
+        else:
+            template = self.get_template(template_name, folder)
+        return template.render(data)
+
+    def stats(self) -> dict:
+        return {
+            "environments": len(self._environments),
+            "file_templates": len(self._templates),
+            "file_hits": self.file_hits,
+            "file_loads": self.file_loads,
+            "inline_templates": len(self._inline_templates),
+            "inline_hits": self.inline_hits,
+            "inline_misses": self.inline_misses,
+            "inline_evictions": self.inline_evictions,
+            "batch_renders": self.batch_renders,
+            "row_renders": self.row_renders,
+            "bytecode_dir": self.bytecode_cache.directory,
+        }
+
+    def clear(self):
+        """
+        Drops the compiled templates and the on-disk bytecode, e.g. after the templates were replaced
+        """
+        with self._lock:
+            self._environments.clear()
+            self._templates.clear()
+            self._inline_templates.clear()
+            self._batch_templates.clear()
+            self._row_loops.clear()
+        self.bytecode_cache.clear()
+
+
+renderer = TemplateRenderer()
 
 
 def render_jinja(template_name=None, data=None, folder=None, template_content=None):
     """
-    Renders a Jinja2 template.
+    Renders a Jinja2 template, templates are compiled once per process (see TemplateRenderer).
 
     - If `template_content` is provided, use it as the template.
     - Otherwise, load the template from a file (requires `template_name` and `folder`).
@@ -20,19 +226,21 @@ def render_jinja(template_name=None, data=None, folder=None, template_content=No
     Returns:
     - Rendered string.
     """
-    if template_content:
-        # Render from provided template content (from Excel or other sources)
-        template = Template(template_content)
-    else:
-        # Load template from file system
-        env = Environment(
-            lstrip_blocks=True,
-            loader=FileSystemLoader(f'jinja_templates/{folder}')
-        )
-        template = env.get_template(template_name)
+    return renderer.render(template_name=template_name, data=data, folder=folder, template_content=template_content)
+
+
+def render_rows(template_name, rows, folder, data=None):
+    """
+    Renders a template for many rows in one call, see TemplateRenderer.render_rows
+    """
+    return renderer.render_rows(template_name, rows, folder, data=data)
+
 
-    # Render the template with the provided data
-    return template.render(data)
+def template_cache_stats():
+    """
+    :return: statistics of the shared template caches, see TemplateRenderer.stats
+    """
+    return renderer.stats()
 
 def to_json(rendered_jinja):
-    return json.loads(rendered_jinja)
\ No newline at end of file
+    return json.loads(rendered_jinja)
@@ -0,0 +1,57 @@
+import pytest
+import numpy as np
+from util import addressing
+from util.spectrumx_netmapper import NetworkMapping
+
+
+@pytest.mark.parametrize(
+    "x, pod_id, su_id, rail_id, host_id, expected_nic_ip, expected_switch_ip",
+    [
+        (172, 0, 0, 3, 30, '172.96.0.60', '172.96.0.61'),  # 172.01100000.00000000.00111100
+        (172, 0, 0, 4, 10, '172.128.0.20', '172.128.0.21'),  # 172.10000000.00000000.00010100
+        (192, 0, 0, 7, 5, '192.224.0.10', '192.224.0.11')  # 172.11100000.00000000.00001010
+    ]
+)
+def test_host_ip(x, pod_id, su_id, rail_id, host_id, expected_nic_ip, expected_switch_ip):
+    nic_ip, switch_ip = addressing.host_ip(x, pod_id, su_id, rail_id, host_id)
+    assert addressing.ip_to_string(nic_ip) == expected_nic_ip
+    assert addressing.ip_to_string(switch_ip) == expected_switch_ip
+
+    nic_arr, switch_arr = addressing.host_ip_array(x, [pod_id], [su_id], [rail_id], [host_id])
+    assert addressing.ip_to_strings(nic_arr) == [expected_nic_ip]
+    assert addressing.ip_to_strings(switch_arr) == [expected_switch_ip]
+
+
+@pytest.mark.parametrize("x, pod_id, su_id, rail_id, host_id", [(172, 31, 255, 7, 31), (10, 3, 17, 2, 0)])
+def test_host_ip_array_matches_generate_host_ip(x, pod_id, su_id, rail_id, host_id):
+    nic_ip, switch_ip = NetworkMapping._generate_host_ip(x, pod_id, su_id, rail_id, host_id)
+    nic_arr, switch_arr = addressing.host_ip_array(x, [pod_id], [su_id], [rail_id], [host_id])
+    assert addressing.ip_to_strings(nic_arr) == [str(nic_ip)]
+    assert addressing.ip_to_strings(switch_arr) == [str(switch_ip)]
+
+
+@pytest.mark.parametrize(
+    "pod_id, su_id, rail_id, host_id",
+    [(0, 0, 0, 32), (0, 256, 0, 0), (32, 0, 0, 0), (0, 0, 8, 0)]
+)
+def test_host_ip_raise_error(pod_id, su_id, rail_id, host_id):
+    with pytest.raises(ValueError):
+        addressing.host_ip(192, pod_id, su_id, rail_id, host_id)
+    with pytest.raises(ValueError):
+        addressing.host_ip_array(192, pod_id, su_id, rail_id, np.array([0, host_id]))
+
+
+def test_name_tables():
+    assert addressing.port_names(2, 6) == ('swp1s0', 'swp1s1', 'swp2s0', 'swp2s1', 'swp3s0', 'swp3s1')
+    assert addressing.port_names(1, 3) == ('swp1', 'swp2', 'swp3')
+    assert addressing.device_names("leaf", 3, 3) is addressing.device_names("leaf", 3, 3)
+    assert addressing.parse_port_name("swp48") == (48, -1)
+    assert addressing.parse_port_name("swp33s1") == (33, 1)
+    with pytest.raises(ValueError):
+        addressing.parse_port_name("rail1")
+
+
+def test_p2p_ip():
+    spine_ip = addressing.p2p_ip(addressing.LEAF_SPINE_BASE_IP, 5, 78)
+    assert addressing.ip_to_string(spine_ip) == "10.254.5.156"
+    assert addressing.ip_to_string(spine_ip + 1) == "10.254.5.157"
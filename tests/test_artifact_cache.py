@@ -0,0 +1,74 @@
+import os
+from util.artifact_cache import ArtifactCache, tree_digest
+
+
+def _artifacts(tmp_path, name, size):
+    artifacts_dir = tmp_path / name
+    artifacts_dir.mkdir()
+    (artifacts_dir / "topology.dot").write_bytes(b"x" * size)
+    return artifacts_dir
+
+
+def test_key_independent_of_order():
+    assert ArtifactCache.key({"num_hosts": 64, "nvidia_air": True}) == \
+        ArtifactCache.key({"nvidia_air": True, "num_hosts": 64})
+    assert ArtifactCache.key({"num_hosts": 64}) != ArtifactCache.key({"num_hosts": 128})
+
+
+def test_get_put(tmp_path):
+    cache = ArtifactCache(tmp_path / "cache")
+    key = cache.key({"num_hosts": 64})
+    assert cache.get(key) is None
+    zip_file = cache.put(key, _artifacts(tmp_path, "out", 10), b"zip")
+    assert cache.get(key) == zip_file
+    assert zip_file.read_bytes() == b"zip"
+    assert (cache.artifacts(key) / "topology.dot").is_file()
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_lru_eviction(tmp_path):
+    cache = ArtifactCache(tmp_path / "cache", max_bytes=250)
+    keys = [cache.key({"num_hosts": num_hosts}) for num_hosts in (1, 2, 3)]
+    cache.put(keys[0], _artifacts(tmp_path, "a", 100), b"")
+    cache.put(keys[1], _artifacts(tmp_path, "b", 100), b"")
+    # make the first entry the most recently used one
+    os.utime(cache.cache_dir / keys[1], (1, 1))
+    cache.get(keys[0])
+    cache.put(keys[2], _artifacts(tmp_path, "c", 100), b"")
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_index_is_kept_in_memory(tmp_path):
+    cache = ArtifactCache(tmp_path / "cache", max_bytes=250)
+    keys = [cache.key({"num_hosts": num_hosts}) for num_hosts in (1, 2, 3)]
+    cache.put(keys[0], _artifacts(tmp_path, "a", 100), b"zip")
+    cache.put(keys[1], _artifacts(tmp_path, "b", 100), b"zip")
+    assert cache.stats()["size_bytes"] == 206
+
+    # a new process picks up the entries from disk
+    reopened = ArtifactCache(tmp_path / "cache", max_bytes=250)
+    assert (reopened.stats()["entries"], reopened.stats()["size_bytes"]) == (2, 206)
+    reopened.put(keys[2], _artifacts(tmp_path, "c", 100), b"zip")
+    assert (reopened.stats()["entries"], reopened.stats()["size_bytes"]) == (2, 206)
+    assert sorted(path.name for path in reopened.cache_dir.iterdir()) == sorted(keys[1:])
+    reopened.clear()
+    assert reopened.stats()["size_bytes"] == 0 and not any(reopened.cache_dir.iterdir())
+
+
+def test_tree_digest(tmp_path):
+    templates = tmp_path / "templates"
+    (templates / "cumulus").mkdir(parents=True)
+    (templates / "cumulus" / "bgp.j2").write_text("router bgp {{ asn }}")
+    (templates / "hosts").write_text("generated")
+    digest = tree_digest(templates)
+    assert digest == tree_digest(templates, ignore=[templates / "unknown"])
+
+    (templates / "cumulus" / "bgp.j2").write_text("router bgp {{ local_as }}")
+    assert tree_digest(templates) != digest
+    # a generated file doesn't change the digest when it's ignored
+    changed = tree_digest(templates, ignore=[templates / "hosts"])
+    (templates / "hosts").write_text("generated by another run")
+    assert tree_digest(templates, ignore=[templates / "hosts"]) == changed
@@ -0,0 +1,26 @@
+from util.artifact_graph import computed_artifacts, dependents, invalidate
+from util.spectrumx_netmapper import NetworkMapping
+
+
+def test_artifacts_are_computed_on_demand():
+    mapper = NetworkMapping(num_hosts=2048, nvidia_air=True)
+    assert computed_artifacts(mapper) == []
+
+    mapper.create_dot_graph(write_to_file=False)
+
+    # Air DOT files don't contain hosts, the host port mapping is never computed
+    assert "leaf_spine_dot_data" in computed_artifacts(mapper)
+    assert "host_links" not in computed_artifacts(mapper)
+    assert "leaf_host_mapping_data" not in computed_artifacts(mapper)
+
+
+def test_invalidate_drops_derived_artifacts():
+    mapper = NetworkMapping(num_hosts=64)
+    dot_data = mapper.dot_data
+    assert {"leaf_host_mapping_data", "host_dot_data", "dot_data"} <= dependents(NetworkMapping, "host_links")
+
+    invalidate(mapper, "host_links")
+
+    assert "dot_data" not in computed_artifacts(mapper)
+    assert "leaf_spine_links" in computed_artifacts(mapper)
+    assert mapper.dot_data == dot_data
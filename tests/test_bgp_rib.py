@@ -0,0 +1,92 @@
+import ipaddress
+import json
+import pytest
+from util.bgp_rib import ExpectedRib, build_expected_rib
+from util.spectrumx_netmapper import NetworkMapping
+
+with open("tests/test_data/netmapper_input_data.json") as f:
+    netmapper_input_data = json.load(f)
+
+
+@pytest.fixture(scope="module")
+def two_tier():
+    # 32 leafs, 16 spines, 4 parallel links between every leaf and spine
+    mapper = NetworkMapping(num_hosts=256, nvidia_air=False)
+    return mapper, build_expected_rib(mapper)
+
+
+def test_neighbors_match_bgp_sessions(two_tier):
+    mapper, rib = two_tier
+    sessions = {}
+    for session in mapper.bgp_session_data:
+        sessions.setdefault(session["DeviceName"], {})[str(session["NeighborIP"])] = session["RemoteAS"]
+    for device in ("leaf000", "leaf031", "spine000", "spine015"):
+        assert {entry["NeighborIP"]: entry["RemoteAS"] for entry in rib.neighbors(device)} == sessions[device]
+
+
+def test_two_tier_routes(two_tier):
+    mapper, rib = two_tier
+    loopbacks = {entry["DeviceName"]: f"{entry['LoopbackIP']}/32" for entry in mapper.bgp_global_data}
+    uplinks = sorted((entry["NeighborIP"] for entry in rib.neighbors("leaf000")), key=ipaddress.ip_address)
+
+    routes = rib.routes("leaf000")
+    assert len(routes) == 32 + 16 - 1
+    # a remote leaf is reached through every uplink, a spine through the 4 links to it
+    assert routes[loopbacks["leaf017"]] == {"PathLength": 2, "NextHops": uplinks}
+    assert routes[loopbacks["spine003"]]["PathLength"] == 1
+    assert len(routes[loopbacks["spine003"]]["NextHops"]) == 4
+    # spines have unique ASNs in a 2-tier fabric and reach each other through every leaf
+    assert len(rib.routes("spine000")[loopbacks["spine001"]]["NextHops"]) == 32 * 4
+    # a next-hop set is stored once for all the routes using it
+    assert len(rib.set_offsets) - 1 < len(rib)
+
+
+def test_three_tier_loop_prevention():
+    # 3 pods, the spines of a pod share an AS and all super-spines share an AS
+    mapper = NetworkMapping(num_hosts=1100, nvidia_air=False)
+    rib = build_expected_rib(mapper)
+    loopbacks = {entry["DeviceName"]: f"{entry['LoopbackIP']}/32" for entry in mapper.bgp_global_data}
+
+    leaf_routes = rib.routes("leaf000")
+    assert leaf_routes[loopbacks["leaf063"]]["PathLength"] == 2
+    assert leaf_routes[loopbacks["leaf064"]]["PathLength"] == 4
+    spine_routes = rib.routes("spine000")
+    assert loopbacks["spine001"] not in spine_routes
+    assert spine_routes[loopbacks["spine064"]]["PathLength"] == 2
+    super_spine = next(device for device in loopbacks if device.startswith("superspine"))
+    assert not any(prefix in rib.routes(super_spine)
+                   for device, prefix in loopbacks.items() if device.startswith("superspine"))
+
+
+def test_save_load_compare(two_tier, tmp_path):
+    _, rib = two_tier
+    rib.save(tmp_path / "rib.npz")
+    loaded = ExpectedRib.load(tmp_path / "rib.npz")
+    assert loaded.routes("leaf005") == rib.routes("leaf005")
+
+    neighbors = {entry["NeighborIP"]: entry["RemoteAS"] for entry in rib.neighbors("leaf005")}
+    routes = {prefix: route["NextHops"] for prefix, route in rib.routes("leaf005").items()}
+    assert loaded.compare("leaf005", neighbors, routes) == []
+
+    missing_neighbor = next(iter(neighbors))
+    del neighbors[missing_neighbor]
+    prefix = next(iter(routes))
+    routes[prefix] = routes[prefix][1:]
+    routes["192.0.2.1/32"] = ["100.64.0.1"]
+    problems = loaded.compare("leaf005", neighbors, routes)
+    assert problems[0] == f"leaf005: BGP neighbor {missing_neighbor} is missing"
+    assert problems[1].startswith(f"leaf005: route {prefix} has")
+    assert problems[2] == "leaf005: unexpected route 192.0.2.1/32"
+
+
+def test_input_data_rib():
+    rib = build_expected_rib(NetworkMapping(input_data=netmapper_input_data, num_spines=2))
+    assert [entry["RemoteAS"] for entry in rib.neighbors("leaf006")] == [65204]
+    assert list(rib.routes("leaf001")) == ["10.1.0.1/32"]
+    assert len(rib.routes("leaf001")["10.1.0.1/32"]["NextHops"]) == 7
+
+
+def test_single_tier_has_no_routes():
+    rib = build_expected_rib(NetworkMapping(num_hosts=32))
+    assert len(rib) == 0
+    assert rib.routes("leaf000") == {}
@@ -0,0 +1,39 @@
+import pytest
+from data_handler import payload_handler
+from data_handler.device_config import ConfigBuilder
+
+pytest.importorskip("streamlit")
+from data_handler.create_nxos_config import CreateNXOSConfig  # noqa: E402
+
+PEER_LINK_TEMPLATE = """interface {{ interface }}
+  description {{ description }}
+  switchport mode {{ port_mode }}
+  switchport trunk allowed vlan {{ vlans }}
+  channel-group {{ lacp_group }} mode active"""
+
+
+@pytest.fixture
+def nxos_renderer(tmp_path, monkeypatch):
+    template_dir = tmp_path / "templates" / "nxos"
+    template_dir.mkdir(parents=True)
+    (template_dir / "peer_link.j2").write_text(PEER_LINK_TEMPLATE)
+    (tmp_path / "bytecode").mkdir()
+    monkeypatch.setattr(payload_handler, "renderer",
+                        payload_handler.TemplateRenderer(str(tmp_path / "templates"), str(tmp_path / "bytecode")))
+
+
+def test_peer_link_sheet(tmp_path, nxos_renderer):
+    file_dir = tmp_path / "configs"
+    for device_name in ("core01", "core02"):
+        (file_dir / device_name).mkdir(parents=True)
+    rows = [{'DeviceName': device_name, 'Interface': interface, 'Description': 'vPC peer link', 'LACPGroup': 100,
+             'PortMode': 'Trunk', 'VLANs': '10-20', 'VLANOperator': 'add', 'PeerLink': 'Yes'}
+            for device_name in ("core01", "core02") for interface in ("Ethernet1/49", "Ethernet1/50")]
+    builder = ConfigBuilder(str(file_dir), comment_prefix="!")
+
+    CreateNXOSConfig(rows, str(file_dir), builder=builder).function_map['PeerLink']()
+
+    assert builder.devices() == ["core01", "core02"]
+    config = builder.render("core02")
+    assert config.startswith("!Peer Link Configurations\ninterface ethernet1/49\n  description vPC peer link\n")
+    assert config.count("channel-group 100 mode active") == 2
@@ -0,0 +1,89 @@
+import multiprocessing
+from data_handler.device_config import ConfigBuilder
+from data_handler.merge_config import merge_nxos_config
+
+
+def build(tmp_path, debug=False):
+    for device_name in ("leaf01", "leaf02"):
+        (tmp_path / device_name).mkdir(exist_ok=True)
+    builder = ConfigBuilder(str(tmp_path), comment_prefix="!", debug=debug)
+    for device_name in ("leaf01", "leaf02"):
+        builder.add(device_name, "vlan", "vlan 10\n  name users\n\n", comment="VLAN Configurations")
+        builder.add(device_name, "01-ntp", "ntp server 10.0.0.1\n", comment="NTP Configurations")
+        builder.add(device_name, "vlan", "vlan 20\n  name servers\n", comment="VLAN Configurations")
+    builder.add("leaf01", "01-ntp2", "ntp source mgmt0", comment="")
+    builder.add("leaf01", "banner", "banner motd #\r\nwelcome\r\n#\n", comment="Banner")
+    return builder
+
+
+def test_sections_and_fragments(tmp_path):
+    builder = build(tmp_path)
+    assert builder.devices() == ["leaf01", "leaf02"]
+    assert "leaf02" in builder and "spine01" not in builder
+    # ordered like the fragment file names, leaf01-01-ntp.txt comes before leaf01-01-ntp2.txt
+    assert builder.sections("leaf01") == ["01-ntp", "01-ntp2", "banner", "vlan"]
+    assert builder.fragment("leaf02", "vlan") == "!VLAN Configurations\nvlan 10\n  name users\n\nvlan 20\n  name servers\n"
+
+
+def test_render_matches_merged_fragments(tmp_path):
+    builder = build(tmp_path, debug=True)
+    paths = builder.write_all()
+    assert paths == [str(tmp_path / "leaf01" / "leaf01.txt"), str(tmp_path / "leaf02" / "leaf02.txt")]
+    assert (tmp_path / "leaf01" / "leaf01-banner.txt").exists()
+
+    for device_name in builder.devices():
+        written = (tmp_path / device_name / f"{device_name}.txt").read_text()
+        # stitching the debug fragments together gives the same configuration
+        merge_nxos_config(str(tmp_path / device_name), device_name)
+        assert (tmp_path / device_name / f"{device_name}.txt").read_text() == written
+        assert written == builder.render(device_name)
+
+    assert builder.render("leaf02") == ("!NTP Configurations\nntp server 10.0.0.1\n\n"
+                                        "!VLAN Configurations\nvlan 10\n  name users\nvlan 20\n  name servers\n\n")
+
+
+def test_single_write_without_debug(tmp_path):
+    build(tmp_path).write_all()
+    assert sorted(path.name for path in (tmp_path / "leaf01").iterdir()) == ["leaf01.txt"]
+
+
+def build_fabric(tmp_path, num_devices=12, debug=False):
+    builder = ConfigBuilder(str(tmp_path), comment_prefix="#", debug=debug)
+    for index in range(num_devices):
+        device_name = f"leaf{index:02d}"
+        (tmp_path / device_name).mkdir(parents=True, exist_ok=True)
+        rows = [{"loopback_ip": f"10.0.0.{index}", "local_as": 65000 + index, "router_id": f"10.0.0.{index}",
+                 "vrf": "default"}]
+        builder.add_rows(device_name, "bgp_global", "bgp_global.j2", rows, folder="cumulus",
+                         comment="BGP global configuration")
+        builder.add(device_name, "01-ntp", "nv set service ntp mgmt server 10.1.1.1\n", comment="NTP Configurations")
+    return builder
+
+
+def test_rows_are_rendered_when_built(tmp_path):
+    builder = build_fabric(tmp_path, num_devices=1)
+    config = builder.render_all()["leaf00"]
+    assert config.startswith("#NTP Configurations\nnv set service ntp mgmt server 10.1.1.1\n\n#BGP global")
+    assert "nv set router bgp autonomous-system 65000\n" in config
+    # a block added afterwards is part of the configuration
+    builder.add("leaf00", "01-ntp", "nv set service ntp mgmt server 10.1.1.2\n")
+    assert "10.1.1.2" in builder.render_all()["leaf00"]
+
+
+def test_parallel_render_is_deterministic(tmp_path):
+    serial = build_fabric(tmp_path / "serial").render_all(workers=1)
+    builder = build_fabric(tmp_path / "parallel", debug=True)
+    parallel = builder.render_all(workers=2)
+    assert list(parallel) == list(serial) == [f"leaf{index:02d}" for index in range(12)]
+    assert parallel == serial
+
+    builder.write_all(workers=2)
+    assert (tmp_path / "parallel" / "leaf03" / "leaf03.txt").read_text() == serial["leaf03"]
+    assert (tmp_path / "parallel" / "leaf03" / "leaf03-bgp_global.txt").read_text().startswith(
+        "#BGP global configuration\nnv set interface lo type loopback\n")
+
+
+def test_parallel_render_with_spawned_workers(tmp_path):
+    serial = build_fabric(tmp_path / "serial", num_devices=4).render_all()
+    builder = build_fabric(tmp_path / "spawn", num_devices=4)
+    assert builder.render_all(workers=2, mp_context=multiprocessing.get_context("spawn")) == serial
@@ -0,0 +1,22 @@
+import gzip
+import io
+import zipfile
+from util.spectrumx_netmapper import NetworkMapping
+
+
+def test_write_dot_graph_single_pass(tmp_path):
+    mapper = NetworkMapping(num_hosts=64, nvidia_air=True)
+    expected = mapper.create_dot_graph(write_to_file=False)
+
+    zip_buffer = io.BytesIO()
+    text_buffer = io.StringIO()
+    with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
+        with zip_file.open("topology.dot", "w") as member:
+            result = mapper.write_dot_graph(tmp_path / "topology.dot.gz", member, text_buffer, keep=True)
+
+    assert result == expected
+    assert text_buffer.getvalue() == expected
+    with gzip.open(tmp_path / "topology.dot.gz", "rt") as dot_file:
+        assert dot_file.read() == expected
+    with zipfile.ZipFile(zip_buffer) as zip_file:
+        assert zip_file.read("topology.dot").decode() == expected
@@ -0,0 +1,27 @@
+import ipaddress
+import openpyxl
+from util.excel_writer import StreamingExcelWriter
+
+
+def test_write_sheet_splits_overflowing_sheets(tmp_path):
+    filename = tmp_path / "pdg_data.xlsx"
+    rows = [{"DeviceName": f"leaf{i:03}", "LoopbackIP": ipaddress.IPv4Address("10.0.0.0") + i} for i in range(7)]
+    progress = []
+
+    with StreamingExcelWriter(filename, max_rows=4, progress=lambda *args: progress.append(args),
+                              progress_interval=5) as writer:
+        sheet_names = writer.write_sheet("Spine-SuperSpine Port Mapping", rows)
+        writer.write_sheet("BGPSession", [], columns=["DeviceName"])
+
+    # 3 data rows per sheet, names are truncated to fit Excel's 31 character limit
+    assert sheet_names == ["Spine-SuperSpine Port Mapping", "Spine-SuperSpine Port Mappi (2)",
+                           "Spine-SuperSpine Port Mappi (3)"]
+    assert progress == [("Spine-SuperSpine Port Mapping", 5, 7), ("Spine-SuperSpine Port Mapping", 7, 7),
+                        ("BGPSession", 0, 0)]
+
+    wb = openpyxl.load_workbook(filename)
+    assert wb.sheetnames == sheet_names + ["BGPSession"]
+    assert [cell.value for cell in wb[sheet_names[0]][1]] == ["DeviceName", "LoopbackIP"]
+    assert [cell.value for cell in wb[sheet_names[2]][2]] == ["leaf006", "10.0.0.6"]
+    assert wb[sheet_names[2]].max_row == 2
+    assert [cell.value for cell in wb["BGPSession"][1]] == ["DeviceName"]
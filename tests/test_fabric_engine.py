@@ -0,0 +1,59 @@
+import pytest
+import numpy as np
+from util import fabric_engine
+from util.spectrumx_netmapper import NetworkMapping
+
+
+@pytest.mark.parametrize("breakout", [1, 2])
+def test_build_host_links_columns(breakout):
+    table = fabric_engine.build_host_links(num_hosts=176, lead_octet=172, breakout=breakout)
+
+    assert len(table) == 1408
+    assert table.nic_ip.dtype == np.uint32
+    assert table.leaf.max() == 23   # 6 SUs x 4 leafs
+    assert np.all(table.switch_ip - table.nic_ip == 1)
+    # every leaf port is used exactly once
+    assert len(set(zip(table.leaf.tolist(), table.leaf_port.tolist(), table.leaf_subport.tolist()))) == 1408
+
+
+def test_build_host_links_records():
+    table = fabric_engine.build_host_links(num_hosts=64, lead_octet=172, breakout=2)
+    records = table.to_records(host_prefix="dgx", leaf_prefix="leaf", digit_filler=3, mask="/31")
+
+    assert records[400] == {
+        "SU": 1,
+        "HostID": 50,
+        "HostName": "dgx050",
+        "Rail": 0,
+        "HostIntf": "rail1",
+        "HostIntfIP": "172.0.1.36",
+        "LeafID": 4,
+        "LeafName": "leaf004",
+        "LeafIntf": "swp19s0",
+        "LeafIntfIP": "172.0.1.37",
+        "Mask": "/31",
+        "Description": "dgx050-rail1"
+    }
+
+
+def test_views_are_projections_of_the_link_tables():
+    mapper = NetworkMapping(num_hosts=176, nvidia_air=False)
+
+    assert isinstance(mapper.host_dot_data, fabric_engine.RecordView)
+    assert isinstance(mapper.dot_data, fabric_engine.RecordView)
+    assert len(mapper.dot_data) == len(mapper.host_links) + len(mapper.leaf_spine_links)
+    # device names are shared with the name tables, not copied per link
+    assert mapper.host_dot_data[9]['DstDevice'] is mapper.leaf_host_mapping_data[9]['HostName']
+    assert mapper.dot_data[-1] == mapper.leaf_spine_dot_data[-1]
+    assert mapper.host_links.rail.itemsize == 1
+
+
+def test_group_ranges():
+    keys = np.array([0, 0, 0, 0, 1, 1, 2, 2, 2, 3])
+    ranges = fabric_engine.group_ranges(len(keys), 3, keys)
+
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(keys)
+    assert all(stop == start for (_, stop), (start, _) in zip(ranges, ranges[1:]))
+    # a group is never split
+    assert all(keys[start] != keys[start - 1] for start, _ in ranges[1:])
+    assert fabric_engine.group_ranges(2, 8) == [(0, 1), (1, 2)]
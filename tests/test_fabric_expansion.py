@@ -0,0 +1,49 @@
+import pytest
+from util.spectrumx_netmapper import NetworkMapping
+from util.fabric_expansion import FabricDelta
+
+
+@pytest.mark.parametrize("prior_hosts, num_hosts", [(20, 64), (100, 128), (36, 38), (1100, 1600)])
+def test_expansion_preserves_assignments(prior_hosts, num_hosts):
+    prior = NetworkMapping(num_hosts=prior_hosts, nvidia_air=False)
+    delta = FabricDelta(prior, num_hosts=num_hosts)
+    assert delta.verify() == []
+    assert len(delta.leaf_host_mapping_data) == (num_hosts - prior_hosts) * 8
+    assert {row['HostID'] for row in delta.leaf_host_mapping_data} == set(range(prior_hosts, num_hosts))
+
+
+def test_delta_rows_match_expanded_fabric():
+    prior = NetworkMapping(num_hosts=72)
+    delta = FabricDelta(prior, num_hosts=128)
+    expanded = NetworkMapping(num_hosts=128)
+    prior_rows = {(row['SpineName'], row['SpineIntf']) for row in prior.leaf_spine_mapping_data}
+    assert list(delta.leaf_spine_mapping_data) == [row for row in expanded.leaf_spine_mapping_data
+                                                   if (row['SpineName'], row['SpineIntf']) not in prior_rows]
+    sessions = list(delta.bgp_session_data)
+    assert all(row in list(expanded.bgp_session_data) for row in sessions)
+    assert len(sessions) == 2 * len(delta.leaf_spine_mapping_data)
+
+
+def test_touched_devices():
+    prior = NetworkMapping(num_hosts=72)
+    delta = FabricDelta(prior, num_hosts=96)
+    # existing spines get new leaf neighbors, leaf008 gets new hosts, the other existing leafs are untouched
+    assert {'spine000', 'spine007', 'leaf008', 'leaf011', 'dgx072', 'dgx095'} <= delta.touched_devices
+    assert 'leaf007' not in delta.touched_devices and 'dgx071' not in delta.touched_devices
+    # the leafs of a partially populated SU are already listed, only the hosts are new
+    assert delta.new_devices == {f"dgx{host_id:03}" for host_id in range(72, 96)}
+    assert {device['DeviceName'] for device in delta.devices} == delta.touched_devices
+    assert {entry['DeviceName'] for entry in delta.bgp_global_data} == \
+        {name for name in delta.touched_devices if not name.startswith('dgx')}
+
+
+@pytest.mark.parametrize("prior_hosts, num_hosts", [(64, 32), (64, 256), (512, 2048), (2048, 4096)])
+def test_incompatible_expansion(prior_hosts, num_hosts):
+    with pytest.raises(ValueError):
+        FabricDelta(NetworkMapping(num_hosts=prior_hosts), num_hosts=num_hosts)
+
+
+def test_manifest_round_trip(tmp_path):
+    mapper = NetworkMapping(num_hosts=96, leaf_prefix="lf", file_dir=str(tmp_path))
+    restored = NetworkMapping.from_manifest(mapper.write_manifest())
+    assert restored.parameters() == mapper.parameters()
@@ -0,0 +1,47 @@
+import ipaddress
+import json
+import pytest
+from util.spectrumx_netmapper import NetworkMapping
+
+
+def test_inventory_lookups():
+    mapper = NetworkMapping(num_hosts=176, nvidia_air=False)
+    inventory = mapper.inventory
+
+    assert inventory.device("spine003") == {
+        "DeviceName": "spine003",
+        "Role": "spine",
+        "ID": 3,
+        "AS": 65203,
+        "LoopbackIP": ipaddress.IPv4Address("10.1.0.3")
+    }
+    assert inventory.device("dgx032")["AS"] is None
+
+    # both ends of a link point at each other
+    link = inventory.link("leaf005", "swp1s1")
+    assert (link["PeerDevice"], link["PeerInterface"]) == ("dgx032", "rail4")
+    assert inventory.link("dgx032", "rail4")["PeerIP"] == link["IP"]
+
+    assert inventory.interfaces("dgx000") == [f"rail{rail}" for rail in range(1, 9)]
+    assert inventory.interfaces("leaf000")[:3] == ["swp1s0", "swp1s1", "swp2s0"]
+    with pytest.raises(KeyError):
+        inventory.link("dgx000", "swp1")
+
+
+def test_inventory_matches_mapping_data():
+    mapper = NetworkMapping(num_hosts=2048)
+    for row in mapper.spine_super_spine_mapping_data[::997]:
+        link = mapper.inventory.link(row["SpineName"], row["SpineIntf"])
+        assert link["PeerDevice"] == row["SuperSpineName"]
+        assert link["PeerInterface"] == row["SuperSpineIntf"]
+        assert str(link["PeerIP"]) == row["SuperSpineIntfIP"]
+
+
+def test_inventory_from_input():
+    with open("tests/test_data/netmapper_input_data.json") as f:
+        mapper = NetworkMapping(input_data=json.load(f), num_spines=2)
+
+    # leaf006 only appears in the leaf-spine mapping, it's not in the device list but it can be queried
+    assert "leaf006" not in [device["DeviceName"] for device in mapper.devices]
+    assert mapper.inventory.device("leaf006")["AS"] == 65006
+    assert mapper.inventory.link("leaf006", "swp96")["PeerDevice"] == "spine004"
@@ -0,0 +1,50 @@
+import json
+import pytest
+from util import fabric_sweep
+
+
+def test_expand_sweep():
+    variants = fabric_sweep.expand_sweep({
+        "parameters": {"nvidia_air": False},
+        "grid": {"num_hosts": [64, 128], "breakout": [1, 2]},
+        "variants": [{"name": "lab", "num_hosts": 8, "host_prefix": "lab"}],
+    })
+
+    assert [variant["name"] for variant in variants] == [
+        "num_hosts-64_breakout-1", "num_hosts-64_breakout-2", "num_hosts-128_breakout-1", "num_hosts-128_breakout-2",
+        "lab"]
+    assert variants[1]["parameters"] == {"nvidia_air": False, "num_hosts": 64, "breakout": 2}
+    assert variants[-1]["parameters"] == {"nvidia_air": False, "num_hosts": 8, "host_prefix": "lab"}
+
+
+@pytest.mark.parametrize("spec, message", [
+    ({"grid": {"num_hosts": [8], "hosts": [1]}}, "unknown NetworkMapping parameters hosts"),
+    ({"grid": {"num_hosts": 8}}, "must be a non-empty list"),
+    ({"grid": {"breakout": [1]}}, "has no num_hosts"),
+    ({"variants": [{"name": "a", "num_hosts": 8}, {"name": "a", "num_hosts": 16}]}, "duplicate variant name a"),
+    ({"parameters": {"num_hosts": 8, "file_dir": "x"}}, "unknown NetworkMapping parameters file_dir"),
+    ({"format": "xls", "parameters": {"num_hosts": 8}}, "format must be one of"),
+])
+def test_expand_sweep_errors(spec, message):
+    with pytest.raises(ValueError, match=message):
+        fabric_sweep.expand_sweep(spec)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_sweep(tmp_path, workers):
+    spec = {"format": "csv.gz", "outputs": ["dot", "ansible"], "parameters": {"nvidia_air": False},
+            "grid": {"num_hosts": [8, 64]}, "variants": [{"name": "broken", "num_hosts": "many"}]}
+    (tmp_path / "sweep.json").write_text(json.dumps(spec))
+
+    results = fabric_sweep.run_sweep(fabric_sweep.load_sweep(tmp_path / "sweep.json"), tmp_path / "out",
+                                     workers=workers)
+
+    assert [(summary["Variant"], summary["Devices"]) for summary in results] == [
+        ("num_hosts-8", 12), ("num_hosts-64", 76), ("broken", None)]
+    assert results[2]["Error"].startswith("TypeError")
+    for name in ("num_hosts-8", "num_hosts-64"):
+        variant_dir = tmp_path / "out" / name
+        assert (variant_dir / "topology.dot").exists()
+        assert (variant_dir / "cumulus_ansible" / "inventory" / "hosts").exists()
+        assert json.loads((variant_dir / "generation.json").read_text())["nvidia_air"] is False
+    assert json.loads((tmp_path / "out" / fabric_sweep.SUMMARY_FILE).read_text()) == results
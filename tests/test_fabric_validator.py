@@ -0,0 +1,73 @@
+import copy
+import json
+import time
+import pytest
+from util.fabric_validator import validate_fabric
+from util.spectrumx_netmapper import NetworkMapping
+
+with open("tests/test_data/netmapper_input_data.json") as f:
+    netmapper_input_data = json.load(f)
+
+
+@pytest.mark.parametrize("num_hosts", [8, 64, 1100])
+def test_generated_fabrics_are_consistent(num_hosts):
+    assert validate_fabric(NetworkMapping(num_hosts=num_hosts)) == []
+
+
+def test_input_data_findings():
+    input_data = copy.deepcopy(netmapper_input_data)
+    assert validate_fabric(NetworkMapping(input_data=input_data, num_spines=2)) == []
+
+    # spine001:swp1 is cabled twice, the spine IP derived from the port is used twice
+    input_data["leaf_spine_p2p"][1]["SpineIntf"] = "swp1"
+    findings = validate_fabric(NetworkMapping(input_data=input_data, num_spines=2))
+    checks = {(finding["Check"], finding["Device"], finding["Interface"]) for finding in findings}
+    assert ("duplicate-port", "spine001", "swp1") in checks
+    assert ("duplicate-ip", "spine001", "swp1") in checks
+    assert ("overlapping-p2p", "spine001", "swp1") in checks
+
+
+def test_port_radix():
+    input_data = copy.deepcopy(netmapper_input_data)
+    input_data["leaf_spine_p2p"][1]["SpineIntf"] = "swp130"
+    findings = validate_fabric(NetworkMapping(input_data=input_data, num_spines=2))
+    assert findings == [{"Check": "port-radix", "Device": "spine001", "Interface": None, "IP": None,
+                         "Message": "7 physical ports in use, highest port swp130, the switch has 128 ports"}]
+
+    # every switch of a 64 host fabric uses all of its 128 ports
+    assert len(validate_fabric(NetworkMapping(num_hosts=64), radix=64)) == 8 + 4
+
+
+def test_bgp_as_mismatch():
+    mapper = NetworkMapping(num_hosts=64)
+    sessions = list(mapper.bgp_session_data)
+    sessions[0] = sessions[0] | {"RemoteAS": 1}
+    sessions[1] = sessions[1] | {"LocalAS": 2}
+    sessions[2] = sessions[2] | {"NeighborIP": "192.0.2.1"}
+    mapper.bgp_session_data = sessions
+
+    findings = [(finding["Check"], finding["Device"]) for finding in validate_fabric(mapper)]
+    assert findings == [("bgp-remote-as", sessions[0]["DeviceName"]), ("bgp-local-as", sessions[1]["DeviceName"]),
+                        ("bgp-unknown-neighbor", sessions[2]["DeviceName"])]
+
+
+def test_validation_time():
+    mapper = NetworkMapping(num_hosts=1024)
+    mapper.inventory.link_columns()
+    start = time.perf_counter()
+    validate_fabric(mapper)
+    assert time.perf_counter() - start < 1
+
+
+def test_generated_sessions_are_checked_on_columns(monkeypatch):
+    mapper = NetworkMapping(num_hosts=256)
+    sessions = mapper.bgp_session_data
+    # rows are only built for sessions with a finding, the port index only for link queries
+    monkeypatch.setattr(type(sessions), "__iter__", lambda self: pytest.fail("session rows were built"))
+    assert validate_fabric(mapper) == []
+    assert mapper.inventory._port_index is None
+
+    sessions.columns["RemoteAS"][3] = 1
+    findings = validate_fabric(mapper)
+    assert [(finding["Check"], finding["Device"]) for finding in findings] == [("bgp-remote-as",
+                                                                                 sessions[3]["DeviceName"])]
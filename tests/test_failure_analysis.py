@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from util.failure_analysis import FailureSimulator, failure_distribution
+from util.path_analysis import FabricPaths
+from util.spectrumx_netmapper import NetworkMapping
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    # 32 leafs, 16 spines, 4 parallel links between every leaf and spine
+    return FailureSimulator(NetworkMapping(num_hosts=256, nvidia_air=False))
+
+
+def test_healthy_fabric(simulator):
+    healthy = simulator.evaluate()
+    assert healthy["MinPaths"].tolist() == [256] * 8
+    assert (healthy[["Reachability", "HostsReachable", "MinPathsRatio", "CapacityRatio"]] == 1.0).all().all()
+
+
+def test_failure_scenarios(simulator):
+    spine = simulator.evaluate(spines=["spine003"])
+    assert spine["MinPaths"].tolist() == [240] * 8
+    assert spine["CapacityRatio"].tolist() == [15 / 16] * 8
+
+    # leaf001 serves rails 3 and 4 of SU 0, losing 2 of its 64 uplinks
+    links = simulator.evaluate(links=[("leaf001", "spine002"), ("leaf001", "spine002")])
+    assert links["MinPaths"].tolist() == [256, 256, 248, 248, 256, 256, 256, 256]
+
+    leaf = simulator.evaluate(leafs=["leaf001"]).set_index("Rail")
+    assert leaf.loc["rail3", "HostsReachable"] == 7 / 8
+    assert leaf.loc["rail3", "Reachability"] == 1.0
+
+
+def test_incremental_update_matches_full_recomputation(simulator):
+    mapper = simulator.mapper
+    leaf_rail = FabricPaths(mapper).adjacency["leaf_rail"]
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        failed_spines = rng.choice(len(simulator.spines), 2, replace=False)
+        links = rng.choice(simulator.num_links, 40, replace=False)
+        link_leafs, link_spines = simulator._link_leaf[links], simulator._link_spine[links]
+
+        leaf_spine = simulator.leaf_spine.copy()
+        leaf_spine[:, failed_spines] = 0
+        np.subtract.at(leaf_spine, (link_leafs, link_spines), 1)
+        paths = np.maximum(leaf_spine, 0) @ np.maximum(leaf_spine, 0).T
+        expected = []
+        for rail in range(leaf_rail.shape[1]):
+            members = np.flatnonzero(leaf_rail[:, rail])
+            expected.append(paths[np.ix_(members, members)][np.triu_indices(len(members), k=1)].min())
+
+        result = simulator.evaluate(spines=[simulator.spines[spine] for spine in failed_spines],
+                                    links=[(simulator.leafs[leaf], simulator.spines[spine])
+                                           for leaf, spine in zip(link_leafs, link_spines)])
+        assert result["MinPaths"].tolist() == expected
+
+
+def test_monte_carlo(simulator):
+    results = simulator.monte_carlo(trials=300, failed_links=8, failed_spines=1, seed=3)
+    assert len(results) == 300 * 8
+    assert results["MinPaths"].max() <= 240
+    assert results.equals(simulator.monte_carlo(trials=300, failed_links=8, failed_spines=1, seed=3, workers=2))
+
+    distribution = failure_distribution(results).set_index(["Rail", "Metric"])
+    assert distribution.loc[("rail1", "Reachability"), "Min"] == 1.0
+    assert distribution.loc[("rail1", "CapacityRatio"), "Degraded"] == 1.0
+    assert list(distribution.columns) == ["Mean", "Min", "P1", "P5", "P50", "Max", "Degraded"]
+
+    with pytest.raises(ValueError, match="can't fail more"):
+        simulator.monte_carlo(trials=1, failed_spines=17)
+
+
+def test_three_tier_fabrics_are_rejected():
+    with pytest.raises(ValueError, match="2-tier"):
+        FailureSimulator(NetworkMapping(num_hosts=1100))
@@ -0,0 +1,47 @@
+import json
+import pandas as pd
+import pytest
+from util import input_ingest
+from util.spectrumx_netmapper import NetworkMapping
+
+with open("tests/test_data/netmapper_input_data.json") as f:
+    netmapper_input_data = json.load(f)
+
+
+def test_frame_input_matches_row_input():
+    rows = NetworkMapping(input_data=netmapper_input_data, num_spines=2)
+    frames = NetworkMapping(input_data={name: pd.DataFrame(data) for name, data in netmapper_input_data.items()},
+                            num_spines=2)
+
+    assert frames.leaf_host_mapping_data == rows.leaf_host_mapping_data
+    assert frames.leaf_spine_mapping_data == rows.leaf_spine_mapping_data
+    assert list(frames.bgp_session_data) == list(rows.bgp_session_data)
+    assert frames.devices == rows.devices
+
+
+def test_load_input_data_csv(tmp_path):
+    pd.DataFrame(netmapper_input_data["leaf_host_p2p"]).to_csv(tmp_path / "leaf_host.csv.gz", index=False)
+    pd.DataFrame(netmapper_input_data["leaf_spine_p2p"]).to_csv(tmp_path / "leaf_spine.csv", index=False)
+    input_data = input_ingest.load_input_data(leaf_host_p2p=tmp_path / "leaf_host.csv.gz",
+                                              leaf_spine_p2p=tmp_path / "leaf_spine.csv")
+
+    assert input_data["leaf_host_p2p"]["HostID"].dtype == "int64"
+    mapper = NetworkMapping(input_data=input_data, num_spines=2)
+    assert mapper.leaf_host_mapping_data[7]["HostIntfIP"] == "172.64.3.52"
+
+
+def test_validation_reports_every_problem():
+    leaf_host = pd.DataFrame(netmapper_input_data["leaf_host_p2p"])
+    leaf_host["HostID"] = leaf_host["HostID"].astype(object)
+    leaf_host.loc[2, "HostID"] = "h3"
+    leaf_host.loc[5, "LeafName"] = None
+    leaf_spine = pd.DataFrame(netmapper_input_data["leaf_spine_p2p"]).iloc[:7]
+
+    with pytest.raises(ValueError, match=r"HostID must be a non-negative integer, rows 4; LeafName is empty, rows 7"):
+        input_ingest.load_input_data(leaf_host_p2p=leaf_host, leaf_spine_p2p=leaf_spine)
+    with pytest.raises(ValueError, match="not divisible by 8"):
+        input_ingest.validate_frame(leaf_spine, "leaf_spine_p2p", input_ingest.LEAF_SPINE_INT_COLUMNS,
+                                    input_ingest.LEAF_SPINE_STR_COLUMNS)
+    with pytest.raises(ValueError, match="missing the columns SpineIntf"):
+        input_ingest.validate_frame(leaf_spine.drop(columns="SpineIntf"), "leaf_spine_p2p",
+                                    input_ingest.LEAF_SPINE_INT_COLUMNS, input_ingest.LEAF_SPINE_STR_COLUMNS)
@@ -0,0 +1,32 @@
+import os
+from benchmarks import netmapper_bench
+
+
+def _run(seconds, peak_bytes=None):
+    return {"timestamp": "", "commit": None,
+            "results": [{"hosts": 64, "mode": "air", "step": "create_excel", "seconds": seconds,
+                         "peak_bytes": peak_bytes}]}
+
+
+def test_compare_runs():
+    assert netmapper_bench.compare_runs(_run(1.0), _run(1.05), threshold=0.1) == []
+    regressions = netmapper_bench.compare_runs(_run(1.0, 100), _run(1.5, 200), threshold=0.1)
+    assert [(regression["metric"], round(regression["change"], 2)) for regression in regressions] == [
+        ("seconds", 0.5), ("peak_bytes", 1.0)]
+    # timer noise of very fast steps isn't flagged
+    assert netmapper_bench.compare_runs(_run(0.001), _run(0.002), threshold=0.1) == []
+
+
+def test_run_benchmarks_history(tmp_path):
+    cwd = os.getcwd()
+    results = netmapper_bench.run_benchmarks(sizes=[64], modes=["air"], steps=["build", "create_dot_graph"],
+                                             repeat=1, memory=True, progress=None)
+    assert os.getcwd() == cwd
+    assert [(result["step"], result["peak_bytes"] > 0) for result in results] == [
+        ("build", True), ("create_dot_graph", True)]
+
+    history_file = tmp_path / "history.json"
+    netmapper_bench.append_history(history_file, results)
+    netmapper_bench.append_history(history_file, results)
+    assert len(netmapper_bench.load_history(history_file)) == 2
+    assert netmapper_bench.main(["--history", str(history_file), "compare"]) == 0
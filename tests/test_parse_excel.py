@@ -0,0 +1,18 @@
+import openpyxl
+from util.parse_excel import ReadExcel
+
+
+def test_excel_generate_line(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "LeafHostP2P"
+    ws.append(["Hostname ", "HostID", "LeafIntf"])
+    ws.append([" hgx001 ", 1, "swp1"])
+    ws.append(["hgx002", 2, None])
+    ws.append([None, 3, "swp3"])       # an empty first column ends the sheet
+    ws.append(["hgx004", 4, "swp4"])
+    wb.save(tmp_path / "input.xlsx")
+
+    lines = list(ReadExcel(tmp_path / "input.xlsx").excel_generate_line("LeafHostP2P"))
+    assert lines == [{"Hostname": "hgx001", "HostID": 1, "LeafIntf": "swp1"},
+                     {"Hostname": "hgx002", "HostID": 2, "LeafIntf": ""}]
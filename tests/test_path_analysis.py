@@ -0,0 +1,81 @@
+import json
+from collections import defaultdict
+import numpy as np
+import pytest
+from util.path_analysis import FabricPaths
+from util.spectrumx_netmapper import NetworkMapping
+
+with open("tests/test_data/netmapper_input_data.json") as f:
+    netmapper_input_data = json.load(f)
+
+
+def shortest_paths(mapper, source, target):
+    """
+    Breadth-first count of the shortest paths between two leafs over the switch links, parallel links count
+    """
+    devices, _, _ = mapper.inventory.link_columns()
+    roles = mapper.inventory.device_columns()["Role"]
+    names = mapper.inventory.device_columns()["DeviceName"]
+    neighbors = defaultdict(list)
+    for a, b in devices.tolist():
+        if roles[a] != "host" and roles[b] != "host":
+            neighbors[names[a]].append(names[b])
+            neighbors[names[b]].append(names[a])
+    distance, count, frontier = {source: 0}, {source: 1}, [source]
+    while frontier and target not in distance:
+        reached = defaultdict(int)
+        for device in frontier:
+            for neighbor in neighbors[device]:
+                if neighbor not in distance:
+                    reached[neighbor] += count[device]
+        for device, paths in reached.items():
+            distance[device] = distance[frontier[0]] + 1
+            count[device] = paths
+        frontier = list(reached)
+    return distance.get(target, 0), count.get(target, 0)
+
+
+@pytest.mark.parametrize("num_hosts, pairs", [(256, [("leaf000", "leaf031")]),
+                                              (1100, [("leaf000", "leaf063"), ("leaf001", "leaf130")])])
+def test_paths_match_breadth_first_search(num_hosts, pairs):
+    mapper = NetworkMapping(num_hosts=num_hosts, nvidia_air=False)
+    leaf_pairs = FabricPaths(mapper).leaf_pairs().set_index(["LeafA", "LeafB"])
+    for source, target in pairs:
+        row = leaf_pairs.loc[(source, target)]
+        assert (row["Hops"], row["Paths"]) == shortest_paths(mapper, source, target)
+
+
+def test_two_tier_metrics():
+    paths = FabricPaths(NetworkMapping(num_hosts=256, nvidia_air=False))
+    leaf_pairs = paths.leaf_pairs()
+    # 32 leafs, 4 links from every leaf to each of the 16 spines
+    assert len(leaf_pairs) == 32 * 31 // 2
+    assert set(leaf_pairs["Paths"]) == {16 * 4 * 4}
+    assert set(leaf_pairs["NextHops"]) == {64}
+    assert leaf_pairs["SharedRails"].max() == 2
+
+    oversubscription = paths.oversubscription().set_index("Device")
+    assert oversubscription.loc["leaf000", ["Downlinks", "Uplinks", "Oversubscription"]].tolist() == [64, 64, 1.0]
+    assert np.isnan(oversubscription.loc["spine000", "Oversubscription"])
+
+    rails = paths.rail_bisection()
+    assert rails["Rail"].tolist() == [f"rail{rail}" for rail in range(1, 9)]
+    assert rails["BisectionRatio"].tolist() == [1.0] * 8
+    assert rails["BisectionGbps"].tolist() == [256 * 400 / 2] * 8
+
+
+def test_three_tier_summary():
+    summary = FabricPaths(NetworkMapping(num_hosts=2048, nvidia_air=False)).summary()
+    assert summary["SuperSpines"] > 0
+    assert summary["UnreachableLeafPairs"] == 0
+    assert summary["MaxLeafOversubscription"] == summary["MaxSpineOversubscription"] == 1.0
+    assert summary["BisectionRatio"] == 1.0
+
+
+def test_input_data_oversubscription():
+    paths = FabricPaths(NetworkMapping(input_data=netmapper_input_data, num_spines=2), link_gbps=100)
+    oversubscription = paths.oversubscription().set_index("Device")
+    assert oversubscription.loc["leaf001", ["Downlinks", "Uplinks", "UplinkGbps"]].tolist() == [7, 7, 700]
+    # leaf011 has a host but no spine uplink
+    assert oversubscription.loc["leaf011", "Uplinks"] == 0
+    assert paths.summary()["Rails"] == 3
@@ -0,0 +1,134 @@
+import os
+from pathlib import Path
+import pytest
+from data_handler import payload_handler
+from data_handler.payload_handler import TemplateRenderer, render_jinja
+
+
+def test_file_templates_are_compiled_once(tmp_path):
+    (tmp_path / "nxos").mkdir()
+    template = tmp_path / "nxos" / "vlan.j2"
+    template.write_text("{% for vlan in vlans %}vlan {{ vlan }}\n{% endfor %}")
+    renderer = TemplateRenderer(template_root=str(tmp_path), bytecode_dir=str(tmp_path))
+
+    for _ in range(3):
+        assert renderer.render(template_name="vlan.j2", data={"vlans": [10, 20]}, folder="nxos") == (
+            "vlan 10\nvlan 20\n")
+    assert renderer.environment("nxos") is renderer.environment("nxos")
+    stats = renderer.stats()
+    assert (stats["environments"], stats["file_loads"], stats["file_hits"]) == (1, 1, 2)
+    # the bytecode is stored on disk, another process (renderer) doesn't compile the template again
+    assert list(tmp_path.glob("__jinja2_*.cache"))
+
+
+def test_changed_file_template_is_reloaded(tmp_path):
+    (tmp_path / "cumulus").mkdir()
+    template = tmp_path / "cumulus" / "banner.j2"
+    template.write_text("old")
+    renderer = TemplateRenderer(template_root=str(tmp_path), bytecode_dir=str(tmp_path))
+    assert renderer.render(template_name="banner.j2", data={}, folder="cumulus") == "old"
+    template.write_text("new")
+    stat = template.stat()
+    os.utime(template, (stat.st_atime, stat.st_mtime + 10))
+    assert renderer.render(template_name="banner.j2", data={}, folder="cumulus") == "new"
+    assert renderer.stats()["file_loads"] == 2
+
+
+def test_inline_template_lru(tmp_path):
+    renderer = TemplateRenderer(bytecode_dir=str(tmp_path), inline_cache_size=2)
+    for source in ("a {{ x }}", "b {{ x }}", "a {{ x }}", "c {{ x }}", "b {{ x }}"):
+        assert renderer.render(template_content=source, data={"x": 1}) == f"{source[0]} 1"
+    stats = renderer.stats()
+    # "b" was the least recently used template when "c" was added
+    assert (stats["inline_hits"], stats["inline_misses"], stats["inline_evictions"]) == (1, 4, 2)
+    assert stats["inline_templates"] == 2
+
+
+def test_render_jinja_uses_the_shared_renderer():
+    before = payload_handler.template_cache_stats()["inline_misses"]
+    banner = "{{ motd }}\n!\n{{ exec }}"
+    for _ in range(2):
+        assert render_jinja(template_content=banner, data={"motd": "hi", "exec": "bye"}) == "hi\n!\nbye"
+    assert render_jinja(template_name="bgp_session.j2", data={"vrf": "default", "bgp_neighbor": "10.0.0.1",
+                                                              "remote_as": 65001}, folder="cumulus")
+    assert payload_handler.template_cache_stats()["inline_misses"] - before <= 1
+
+
+@pytest.mark.parametrize("template_name, row", [
+    ("bgp_session.j2", {"vrf": "default", "bgp_neighbor": "10.254.0.1", "remote_as": 65200}),
+    ("bgp_global.j2", {"vrf": "default", "local_as": 65000, "router_id": "10.0.0.1", "loopback_ip": "10.0.0.1"}),
+    ("leaf_spine_interface.j2", {"interface": "swp33", "interface_ip": "10.254.0.1", "mask": "/31"}),
+])
+def test_render_rows_matches_per_row_templates(template_name, row):
+    renderer = TemplateRenderer()
+    rows = [row | {"vrf": vrf} for vrf in ("default", "mgmt", "default")]
+    expected = "".join(render_jinja(template_name=template_name, data=data, folder="cumulus") + "\n" for data in rows)
+
+    assert renderer.render_rows(template_name, rows, folder="cumulus") == expected
+    # a single render of the row loop, the per-row template is included for every row
+    assert (renderer.stats()["batch_renders"], renderer.stats()["row_renders"]) == (0, 3)
+    assert renderer.render_rows(template_name, [], folder="cumulus") == ""
+
+
+def test_render_rows_includes_the_per_row_template(tmp_path):
+    (tmp_path / "nxos").mkdir()
+    (tmp_path / "nxos" / "vlan.j2").write_text("vlan {{ vlan_id }}\n  name {{ name }}\n")
+    renderer = TemplateRenderer(template_root=str(tmp_path), bytecode_dir=str(tmp_path))
+    rows = [{"vlan_id": 10, "name": "web"}, {"vlan_id": 20, "name": "db"}]
+
+    assert renderer.render_rows("vlan.j2", rows, folder="nxos") == "vlan 10\n  name web\nvlan 20\n  name db\n"
+    assert renderer.stats()["row_renders"] == 2
+    # data shared by all rows, a row's own field wins
+    (tmp_path / "nxos" / "svi.j2").write_text("interface vlan{{ vlan_id }} vrf {{ vrf }}")
+    assert renderer.render_rows("svi.j2", [{"vlan_id": 10}, {"vlan_id": 20, "vrf": "mgmt"}], folder="nxos",
+                                data={"vrf": "default"}) == "interface vlan10 vrf default\ninterface vlan20 vrf mgmt\n"
+
+    (tmp_path / "nxos" / "alias_batch.j2").write_text("{% for row in rows -%}\ncli alias name {{ row.name }}\n"
+                                                      "{% endfor %}\n")
+    (tmp_path / "nxos" / "alias.j2").write_text("cli alias name {{ name }}")
+    assert renderer.render_rows("alias.j2", [{"name": "a"}, {"name": "b"}], folder="nxos") == (
+        "cli alias name a\ncli alias name b\n")
+    assert renderer.stats()["batch_renders"] == 1
+
+
+# rows of every template in jinja_templates/, keyed by <folder>/<template>
+TEMPLATE_ROWS = {
+    "ansible/hosts.j2": [
+        {"leaf_prefix": "leaf", "leaf_start": "000", "leaf_end": "063", "spine_prefix": "spine", "spine_start": "000",
+         "spine_end": "031", "super_spine_prefix": None},
+        {"leaf_prefix": "leaf", "leaf_start": "000", "leaf_end": "127", "spine_prefix": "spine", "spine_start": "000",
+         "spine_end": "127", "super_spine_prefix": "superspine", "super_spine_start": "000",
+         "super_spine_end": "063"},
+    ],
+    "bash/air_env_setup_template.j2": [
+        {"leafs": [{"DeviceName": "leaf000"}, {"DeviceName": "leaf001"}], "spines": [{"DeviceName": "spine000"}]},
+        {"leafs": [], "spines": []},
+    ],
+    "cumulus/bgp_global.j2": [
+        {"vrf": "default", "local_as": 65000, "router_id": "10.0.0.1", "loopback_ip": "10.0.0.1"},
+        {"vrf": "mgmt", "local_as": 4259905537, "router_id": "10.0.0.2", "loopback_ip": "10.0.0.2"},
+    ],
+    "cumulus/bgp_session.j2": [
+        {"vrf": "default", "bgp_neighbor": "10.254.0.1", "remote_as": 65200},
+        {"vrf": "mgmt", "bgp_neighbor": "10.254.0.3", "remote_as": 65201},
+    ],
+    "cumulus/leaf_spine_interface.j2": [
+        {"interface": "swp33", "interface_ip": "10.254.0.1", "mask": "/31"},
+        {"interface": "swp34s1", "interface_ip": "10.254.0.3", "mask": "/31"},
+    ],
+}
+
+
+def test_every_template_has_rows():
+    templates = {path.relative_to(payload_handler.TEMPLATE_ROOT).as_posix()
+                 for path in Path(payload_handler.TEMPLATE_ROOT).glob("*/*.j2")
+                 if not path.stem.endswith(payload_handler.BATCH_SUFFIX)}
+    assert templates == set(TEMPLATE_ROWS)
+
+
+@pytest.mark.parametrize("template", sorted(TEMPLATE_ROWS))
+def test_render_rows_parity(template):
+    folder, template_name = template.split("/")
+    rows = TEMPLATE_ROWS[template]
+    expected = "".join(render_jinja(template_name=template_name, data=row, folder=folder) + "\n" for row in rows)
+    assert payload_handler.render_rows(template_name, rows, folder) == expected
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+from util import pdg_export
+from util.spectrumx_netmapper import NetworkMapping
+
+
+def test_typed_frame_ip_columns():
+    mapper = NetworkMapping(num_hosts=64)
+    frame = pdg_export.typed_frame(mapper.bgp_global_data)
+
+    assert list(frame.columns) == ["DeviceName", "VRF", "AS", "LoopbackIP", "LoopbackIPInt", "RouterID", "RouterIDInt"]
+    assert frame["LoopbackIP"].iloc[1] == "10.0.0.1"
+    assert frame["LoopbackIPInt"].dtype == "uint32"
+    assert frame["LoopbackIPInt"].iloc[1] == 0x0A000001
+    assert frame["VRF"].dtype == "category"
+
+
+def test_export_data_csv(tmp_path):
+    mapper = NetworkMapping(num_hosts=64, file_dir=str(tmp_path))
+    paths = mapper.export_data(file_format="csv.gz")
+
+    assert [path.split("/")[-1] for path in paths] == [
+        "device_list.csv.gz", "host_port_mapping.csv.gz", "leaf_spine_port_mapping.csv.gz", "bgpglobal.csv.gz",
+        "bgpsession.csv.gz", "leafspineinterface.csv.gz", "dot.csv.gz"]
+    host_df = pd.read_csv(paths[1])
+    assert len(host_df) == 512
+    assert host_df["HostIntfIP"][0] == mapper.leaf_host_mapping_data[0]["HostIntfIP"]
+    assert host_df["HostIntfIPInt"][0] == 0xAC000000    # 172.0.0.0
+
+
+def test_export_data_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    mapper = NetworkMapping(num_hosts=64, file_dir=str(tmp_path))
+    paths = mapper.export_data(file_format="parquet")
+
+    session_df = pd.read_parquet(paths[4])
+    assert session_df["NeighborIPInt"].dtype == "uint32"
+    assert len(session_df) == len(mapper.bgp_session_data)
+
+
+def test_unsupported_format():
+    with pytest.raises(ValueError):
+        pdg_export.dataset_file_name("dot", "xlsx")
+
+
+@pytest.mark.parametrize("file_format", ["csv.gz", "parquet"])
+def test_parallel_export_is_identical(tmp_path, file_format):
+    if file_format == "parquet":
+        pytest.importorskip("pyarrow")
+    serial = NetworkMapping(num_hosts=256, nvidia_air=False, file_dir=str(tmp_path / "serial"))
+    parallel = NetworkMapping(num_hosts=256, nvidia_air=False, file_dir=str(tmp_path / "parallel"))
+    serial_paths = serial.export_data(file_format=file_format)
+    parallel_paths = parallel.export_data(file_format=file_format, workers=2)
+
+    for serial_path, parallel_path in zip(serial_paths, parallel_paths, strict=True):
+        with open(serial_path, "rb") as serial_file, open(parallel_path, "rb") as parallel_file:
+            assert serial_file.read() == parallel_file.read(), serial_path
@@ -0,0 +1,82 @@
+import threading
+import time
+import pytest
+from util.pipeline import Pipeline
+
+
+def test_dependencies_and_results():
+    finished = []
+    pipeline = Pipeline(workers=4)
+
+    def task(name, result=None):
+        def run():
+            finished.append(name)
+            return result
+        return run
+
+    pipeline.add("sheet:NTP", task("sheet:NTP"))
+    pipeline.add("sheet:VLAN", task("sheet:VLAN"))
+    pipeline.add("merge:leaf01", task("merge:leaf01"), "sheet:NTP", "sheet:VLAN")
+    pipeline.add("merge:leaf02", task("merge:leaf02"), "sheet:NTP", "sheet:VLAN")
+    pipeline.add("diff:leaf01-leaf02", task("diff:leaf01-leaf02"), "merge:leaf01", "merge:leaf02")
+    pipeline.add("zip", task("zip", result=b"zip"), *pipeline.tasks)
+
+    results = pipeline.run()
+    assert results["zip"] == b"zip"
+    assert finished.index("merge:leaf01") > max(finished.index("sheet:NTP"), finished.index("sheet:VLAN"))
+    assert finished.index("diff:leaf01-leaf02") > finished.index("merge:leaf02")
+    assert finished[-1] == "zip"
+    assert [row["Task"] for row in pipeline.timings()][-1] == "zip"
+
+
+def test_independent_tasks_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+    pipeline = Pipeline(workers=3)
+    for name in ("sheet:NTP", "sheet:DNS", "sheet:SVI"):
+        pipeline.add(name, barrier.wait)    # only returns when the 3 tasks run at the same time
+    pipeline.run()
+
+
+def test_diff_starts_when_its_pair_is_merged():
+    slow_merge_done = threading.Event()
+    pipeline = Pipeline(workers=4)
+    pipeline.add("merge:leaf01", lambda: None)
+    pipeline.add("merge:leaf02", lambda: None)
+    pipeline.add("merge:leaf03", lambda: slow_merge_done.wait(5))
+    # the diff of leaf01/leaf02 doesn't wait for the unrelated merge
+    pipeline.add("diff:leaf01-leaf02", slow_merge_done.is_set, "merge:leaf01", "merge:leaf02")
+    pipeline.add("release", slow_merge_done.set, "diff:leaf01-leaf02")
+    assert pipeline.run()["diff:leaf01-leaf02"] is False
+
+
+def test_critical_path():
+    pipeline = Pipeline(workers=4)
+    pipeline.add("sheet:NTP", lambda: None)
+    pipeline.add("sheet:SVI", lambda: time.sleep(0.2))
+    pipeline.add("render", lambda: time.sleep(0.05), "sheet:NTP", "sheet:SVI")
+    pipeline.add("diff", lambda: None, "render")
+    pipeline.add("zip", lambda: None, "sheet:NTP")
+    pipeline.run()
+    assert pipeline.critical_path() == ["sheet:SVI", "render", "diff"]
+    assert pipeline.seconds >= 0.25
+
+
+def test_failure_stops_dependent_tasks():
+    started = []
+    pipeline = Pipeline(workers=2)
+    pipeline.add("sheet:VPCDom", lambda: 1 / 0)
+    pipeline.add("sheet:NTP", lambda: started.append("sheet:NTP"))
+    pipeline.add("render", lambda: started.append("render"), "sheet:VPCDom", "sheet:NTP")
+    with pytest.raises(ZeroDivisionError):
+        pipeline.run()
+    assert "render" not in started
+    assert "render" not in [row["Task"] for row in pipeline.timings()]
+
+
+def test_invalid_tasks():
+    pipeline = Pipeline()
+    pipeline.add("sheet:NTP", lambda: None)
+    with pytest.raises(ValueError, match="already"):
+        pipeline.add("sheet:NTP", lambda: None)
+    with pytest.raises(ValueError, match="unknown tasks: merge:leaf01"):
+        pipeline.add("diff", lambda: None, "sheet:NTP", "merge:leaf01")
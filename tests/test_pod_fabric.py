@@ -0,0 +1,66 @@
+import json
+import numpy as np
+import pytest
+from util import fabric_engine
+from util.artifact_cache import ArtifactCache
+from util.pod_fabric import PodMapping, write_pods
+from util.spectrumx_netmapper import NetworkMapping
+
+
+@pytest.mark.parametrize("num_hosts", [1056, 4096])
+def test_pods_join_to_the_fabric(num_hosts):
+    mapper = NetworkMapping(num_hosts=num_hosts)
+    host_links = fabric_engine.build_host_links(num_hosts=num_hosts, lead_octet=mapper.host_p2p_lead_octet,
+                                                breakout=mapper.breakout, sus_per_pod=fabric_engine.SUS_PER_POD)
+    leaf_spine_links = fabric_engine.build_pod_links(num_leafs=mapper.num_leafs, breakout=mapper.breakout,
+                                                     leaf_base_as=mapper.leaf_base_as,
+                                                     spine_base_as=mapper.spine_base_as)
+
+    assert len(mapper.pods) == mapper.num_pods
+    for joined, expected in ((mapper.host_links, host_links), (mapper.leaf_spine_links, leaf_spine_links)):
+        for column in type(joined).__slots__:
+            assert getattr(joined, column).dtype == getattr(expected, column).dtype
+            assert np.array_equal(getattr(joined, column), getattr(expected, column))
+
+
+def test_pods_are_three_tier_only():
+    assert NetworkMapping(num_hosts=256).pods is None
+    with pytest.raises(ValueError, match="3-tier"):
+        PodMapping(NetworkMapping(num_hosts=256), 0)
+    with pytest.raises(ValueError, match="between 0 and 2"):
+        PodMapping(NetworkMapping(num_hosts=1100), 3)
+
+
+def test_pod_mapping():
+    fabric = NetworkMapping(num_hosts=1100, nvidia_air=False)    # the last pod holds 76 hosts
+    pod = PodMapping(fabric, 2)
+
+    roles = {}
+    for device in pod.devices:
+        roles[device['Role']] = roles.get(device['Role'], 0) + 1
+    assert roles == {'leaf': 12, 'spine': 64, 'super-spine': 128, 'host': 76}
+    assert pod.leaf_host_mapping_data[:] == fabric.leaf_host_mapping_data[1024 * 8:]
+    assert pod.leaf_spine_mapping_data[0]['SpineName'] == "spine128"
+    assert {row['PodID'] for row in pod.spine_super_spine_mapping_data} == {2}
+    assert {entry['DeviceName'] for entry in pod.bgp_global_data} == {
+        device['DeviceName'] for device in pod.devices if device['Role'] != 'host'}
+    assert pod.pod_parameters()["num_hosts"] == 76
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_write_pods_cache(tmp_path, workers):
+    cache = ArtifactCache(tmp_path / "cache")
+    first = write_pods(NetworkMapping(num_hosts=1100, nvidia_air=False), tmp_path / "first", workers=workers,
+                       file_format="csv.gz", cache=cache)
+    assert [(summary["Pod"], summary["Hosts"], summary["Cached"]) for summary in first] == [
+        (0, 512, False), (1, 512, False), (2, 76, False)]
+    assert (tmp_path / "first" / "pod002" / "pdg_data" / "host_port_mapping.csv.gz").exists()
+    assert json.loads((tmp_path / "first" / "pod002" / "pod.json").read_text()) == first[2]
+
+    # one more pod with the same plane size, only the pods that changed are written
+    expanded = write_pods(NetworkMapping(num_hosts=1600, nvidia_air=False), tmp_path / "expanded",
+                          workers=workers, file_format="csv.gz", cache=cache)
+    assert [summary["Cached"] for summary in expanded] == [True, True, False, False]
+    assert expanded[0]["Devices"] == first[0]["Devices"]
+    assert (tmp_path / "expanded" / "pod000" / "topology.dot").read_text() == (
+        tmp_path / "first" / "pod000" / "topology.dot").read_text()
@@ -1,4 +1,5 @@
 import pytest
+from util import spectrumx_netmapper
 from util.spectrumx_netmapper import NetworkMapping
 import ipaddress
 import json
@@ -359,6 +360,20 @@ def test_create_dot_graph_non_air():
     assert dot_graph_entries[-1].strip() == '"leaf015":"swp64s1" -- "spine007":"swp64s1"'
 
 
+def test_dot_graph_string_limit(tmp_path, monkeypatch):
+    mapper = NetworkMapping(128, nvidia_air=False)
+    assert mapper.dot_graph() == mapper.create_dot_graph(write_to_file=False)
+    with pytest.raises(ValueError, match="2048 edges, more than 2000"):
+        mapper.dot_graph(max_edges=2000)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(spectrumx_netmapper, "DOT_STRING_MAX_EDGES", 2000)
+    # above the limit the graph is only written to the file
+    assert mapper.create_dot_graph() is None
+    assert mapper.write_ptm_topology() == "cumulus_ansible/roles/ptm/files/topology.dot"
+    assert (tmp_path / mapper.write_ptm_topology()).read_text() == mapper.dot_graph(max_edges=None)
+
+
 def test_create_dot_graph_air():
     mapper = NetworkMapping(128)
     dot_graph = mapper.create_dot_graph(write_to_file=False)
@@ -572,3 +587,65 @@ def test_create_port_mapping_lengths(num_hosts, expected_length):
     mapper = NetworkMapping(num_hosts)
     result = mapper.leaf_host_mapping_data
     assert len(result) == expected_length
+
+
+def test_three_tier_device_count():
+    mapper = NetworkMapping(num_hosts=4096)    # 128 SUs = 8 pods
+
+    assert mapper.num_pods == 8
+    assert mapper.num_leafs == 512
+    assert mapper.num_spines == 512     # 64 spines per pod
+    assert mapper.num_super_spines == 256   # 64 planes x 4 super-spines
+    assert len(mapper.leaf_spine_mapping_data) == 32768     # 64 uplinks per leaf
+    assert len(mapper.spine_super_spine_mapping_data) == 32768  # 64 uplinks per spine
+    assert len(mapper.bgp_session_data) == 131072
+    assert len(mapper.super_spines) == 256
+
+
+def test_create_leaf_spine_port_mapping_three_tier():
+    mapper = NetworkMapping(num_hosts=2048)
+    result = mapper.leaf_spine_mapping_data
+
+    # pod 1, spine 65 is the 2nd spine in pod 1, leaf 70 is the 7th leaf in pod 1
+    assert result[4096 + 64 + 6] == {
+        "SU": 17,
+        "SpineID": 65,
+        "SpineName": "spine065",
+        "SpineIntf": "swp7",
+        "SpineIntfIP": "10.128.65.12",
+        "SpineAS": 65201,
+        "LeafID": 70,
+        "LeafName": "leaf070",
+        "LeafIntf": "swp66",
+        "LeafIntfIP": "10.128.65.13",
+        "LeafAS": 4259840070,   # 65000.70 in asdot notation
+        "Mask": "/31"
+    }
+
+
+def test_create_spine_super_spine_port_mapping():
+    mapper = NetworkMapping(num_hosts=2048, nvidia_air=False)  # 4 pods, 2 super-spines per plane
+    result = mapper.spine_super_spine_mapping_data
+
+    assert result[-1] == {
+        "PodID": 3,
+        "SuperSpineID": 127,
+        "SuperSpineName": "superspine127",
+        "SuperSpineIntf": "swp64s1",
+        "SuperSpineIntfIP": "10.192.127.254",
+        "SuperSpineAS": 65100,
+        "SpineID": 255,
+        "SpineName": "spine255",
+        "SpineIntf": "swp64s1",
+        "SpineIntfIP": "10.192.127.255",
+        "SpineAS": 65203,
+        "Mask": "/31"
+    }
+
+
+def test_three_tier_host_ip_encodes_pod():
+    mapper = NetworkMapping(num_hosts=1056)
+    result = mapper.leaf_host_mapping_data
+
+    assert result[-1]["SU"] == 32
+    assert result[-1]["HostIntfIP"] == "172.226.32.62"  # 172.11100010.00100000.00111110, rail 7, pod 2
@@ -0,0 +1,126 @@
+"""
+Integer IP and interface name allocation for Spectrum-X fabrics.
+
+IP addresses are plain ints (or uint32 arrays) built with bit arithmetic, they are only turned into strings
+or `ipaddress.IPv4Address` objects at the export step.
+Device and interface names are cached lookup tables indexed by device ID / port slot.
+"""
+import functools
+import re
+import numpy as np
+
+MAX_RAIL_ID = 7             # 3 bits in the second octet
+MAX_POD_ID = 31             # 5 bits in the second octet
+MAX_SU_ID = 255             # third octet
+MAX_LOCAL_HOST_ID = 31      # 5 bits in the last octet
+
+LEAF_LOOPBACK_BASE_IP = 0x0A000000          # 10.0.0.0
+SPINE_LOOPBACK_BASE_IP = 0x0A010000         # 10.1.0.0
+SUPER_SPINE_LOOPBACK_BASE_IP = 0x0A020000   # 10.2.0.0
+LEAF_SPINE_BASE_IP = 0x0AFE0000             # 10.254.0.0, 2-tier leaf to spine point-to-point, /24 per spine
+POD_LEAF_SPINE_BASE_IP = 0x0A800000         # 10.128.0.0, 3-tier leaf to spine point-to-point, /24 per spine
+SPINE_SUPER_SPINE_BASE_IP = 0x0AC00000      # 10.192.0.0, 3-tier spine to super-spine point-to-point
+
+_OCTETS = [str(octet) for octet in range(256)]
+_PORT_NAME = re.compile(r"swp(\d+)(?:s(\d+))?$")
+
+
+def host_ip(lead_octet: int, pod_id: int, su_id: int, rail_id: int, local_host_id: int) -> tuple:
+    """
+    Host point-to-point IPs are built as x.y.z.w where
+        x = lead octet
+        y = 3 bits rail ID + 5 bits pod ID
+        z = SU ID
+        w = 00 + 5 bits host ID + 0 (NIC) / 1 (switch)
+
+    :return: tuple of ints (nic_ip, switch_ip)
+    """
+    _check_host_ip_fields(pod_id, su_id, rail_id, local_host_id)
+    nic_ip = (lead_octet << 24) | (rail_id << 21) | (pod_id << 16) | (su_id << 8) | (local_host_id << 1)
+    return nic_ip, nic_ip | 1
+
+
+def host_ip_array(lead_octet, pod_id, su_id, rail_id, local_host_id):
+    """
+    Vectorized version of `host_ip`, every ID may be a scalar or an array.
+
+    :return: tuple of uint32 arrays (nic_ip, switch_ip)
+    """
+    pod_id = np.asarray(pod_id, dtype=np.uint32)
+    su_id = np.asarray(su_id, dtype=np.uint32)
+    rail_id = np.asarray(rail_id, dtype=np.uint32)
+    local_host_id = np.asarray(local_host_id, dtype=np.uint32)
+    _check_host_ip_fields(*(int(ids.max()) if ids.size else 0 for ids in (pod_id, su_id, rail_id, local_host_id)))
+
+    nic_ip = (np.uint32(lead_octet) << 24) | (rail_id << 21) | (pod_id << 16) | (su_id << 8) | (local_host_id << 1)
+    return nic_ip, nic_ip | np.uint32(1)
+
+
+def _check_host_ip_fields(pod_id, su_id, rail_id, local_host_id):
+    if local_host_id > MAX_LOCAL_HOST_ID:
+        raise ValueError(f"host_id ({local_host_id}) is too large. "
+                         f"It must be between 0 and {MAX_LOCAL_HOST_ID} inclusive.")
+    if su_id > MAX_SU_ID:
+        raise ValueError(f"su_id ({su_id}) is too large. It must fit in a single octet.")
+    if pod_id > MAX_POD_ID:
+        raise ValueError(f"pod_id ({pod_id}) is too large. It must be between 0 and {MAX_POD_ID} inclusive.")
+    if rail_id > MAX_RAIL_ID:
+        raise ValueError(f"rail_id ({rail_id}) is too large. It must be between 0 and {MAX_RAIL_ID} inclusive.")
+
+
+def p2p_ip(base_ip: int, device_id, slot):
+    """
+    Point-to-point IP of the upper tier end of a link, every upper tier device gets its own /24 out of `base_ip`.
+    The upper tier device takes the even IP, the lower tier device the odd IP (`p2p_ip(...) + 1`).
+
+    :param device_id: upper tier device ID (scalar or array)
+    :param slot: 0-based port slot on the upper tier device (scalar or array)
+    """
+    return base_ip + (device_id << 8) + slot * 2
+
+
+def ip_to_string(ip: int) -> str:
+    return f"{_OCTETS[ip >> 24 & 0xFF]}.{_OCTETS[ip >> 16 & 0xFF]}.{_OCTETS[ip >> 8 & 0xFF]}.{_OCTETS[ip & 0xFF]}"
+
+
+def ip_to_strings(ips) -> list:
+    """
+    Converts an array of uint32 IP addresses to dotted-quad strings.
+    This is the export boundary, everything before this point stays numerical.
+    """
+    ips = np.asarray(ips, dtype=np.uint32)
+    octets = [((ips >> shift) & 0xFF).tolist() for shift in (24, 16, 8, 0)]
+    return [f"{_OCTETS[a]}.{_OCTETS[b]}.{_OCTETS[c]}.{_OCTETS[d]}" for a, b, c, d in zip(*octets)]
+
+
+@functools.lru_cache(maxsize=None)
+def device_names(prefix: str, count: int, digit_filler: int) -> tuple:
+    """
+    Cached lookup table of zero-filled device names indexed by device ID, e.g. ('leaf000', 'leaf001'...)
+    """
+    return tuple(f"{prefix}{str(device_id).zfill(digit_filler)}" for device_id in range(count))
+
+
+@functools.lru_cache(maxsize=None)
+def port_names(breakout: int, count: int) -> tuple:
+    """
+    :param breakout: number of breakout ports, 1 means no breakout
+    :param count: number of port slots
+    :return: cached lookup table of interface names indexed by port slot (0-based index of a breakout port)
+        e.g. breakout 2: ('swp1s0', 'swp1s1', 'swp2s0'...), breakout 1: ('swp1', 'swp2', 'swp3'...)
+    """
+    if breakout > 1:
+        return tuple(f"swp{slot // breakout + 1}s{slot % breakout}" for slot in range(count))
+    return tuple(f"swp{slot + 1}" for slot in range(count))
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_port_name(name: str) -> tuple:
+    """
+    :param name: interface name, e.g. swp12 or swp12s1
+    :return: tuple of (physical port number, breakout index), the breakout index is -1 when the port isn't broken out
+    """
+    match = _PORT_NAME.match(name)
+    if not match:
+        raise ValueError(f"{name} is not a switch port name, expected swp<port> or swp<port>s<breakout>")
+    return int(match.group(1)), int(match.group(2)) if match.group(2) is not None else -1
@@ -0,0 +1,173 @@
+"""
+Content-addressed on-disk cache for generated PDG artifacts.
+
+Entries are keyed by a hash of every input parameter, each entry holds the finished zip file and the
+generated artifacts. The cache has a size cap, the least recently used entries are evicted first. The size and the
+last use of every entry are scanned once when the cache is opened and kept up to date in memory.
+
+    cache = ArtifactCache("artifact_cache")
+    key = cache.key({"num_hosts": 128, "nvidia_air": True, ..., "sources": tree_digest("util", "jinja_templates")})
+    zip_file = cache.get(key)
+    if zip_file is None:
+        ... generate into an empty output_dir and zip it ...
+        cache.put(key, output_dir, zip_bytes)
+
+The artifacts also depend on the code and the files generating them, `tree_digest` of those in the parameters makes
+a change to them a cache miss without bumping CACHE_VERSION.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+CACHE_VERSION = 1                       # bump when the layout of the cache entries changes
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+ZIP_NAME = "cumulus_gen.zip"
+ARTIFACTS_DIR = "artifacts"
+
+
+def tree_digest(*paths, ignore=()) -> str:
+    """
+    :param paths: files or directories, every file below a directory is included (except __pycache__)
+    :param ignore: paths of files to leave out, e.g. files generated into one of the directories
+    :return: hex digest of the paths and the contents of the files
+    """
+    ignored = {Path(path) for path in ignore}
+    digest = hashlib.sha256()
+    for root in map(Path, paths):
+        files = sorted(path for path in root.rglob("*") if path.is_file()) if root.is_dir() else [root]
+        for path in files:
+            if path in ignored or "__pycache__" in path.parts or not path.is_file():
+                continue
+            content = path.read_bytes()
+            digest.update(f"{path.as_posix()}\0{len(content)}\0".encode())
+            digest.update(content)
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    __slots__ = ['cache_dir', 'max_bytes', 'hits', 'misses', 'evictions', '_lock', '_index', '_size_bytes']
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param cache_dir: directory holding the cache entries, created when missing
+        :param max_bytes: size cap of the cache, least recently used entries are evicted above it
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index = self._scan()      # key -> [last use, size in bytes]
+        self._size_bytes = sum(size for _, size in self._index.values())
+
+    @staticmethod
+    def key(params: dict) -> str:
+        """
+        :param params: every parameter that has an effect on the generated artifacts
+        :return: hex digest of the parameters, independent of the dictionary order
+        """
+        payload = json.dumps({"version": CACHE_VERSION, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        :return: path of the cached zip file, None on a cache miss
+        """
+        zip_file = self.cache_dir / key / ZIP_NAME
+        with self._lock:
+            if not zip_file.is_file():
+                self.misses += 1
+                return None
+            self.hits += 1
+            # the modification time of an entry is its last use, it orders the entries of the next process
+            now = time.time()
+            os.utime(self.cache_dir / key, (now, now))
+            if key not in self._index:
+                # stored by another process
+                self._add(key, self._entry_size(self.cache_dir / key))
+            self._index[key][0] = now
+        return zip_file
+
+    def artifacts(self, key):
+        """
+        :return: directory with the individual artifacts of a cached entry, None when the entry doesn't exist
+        """
+        artifacts_dir = self.cache_dir / key / ARTIFACTS_DIR
+        return artifacts_dir if artifacts_dir.is_dir() else None
+
+    def put(self, key, artifacts_dir, zip_bytes: bytes):
+        """
+        Stores the artifacts and the zip file, the entry only becomes visible once it's complete.
+        :param artifacts_dir: directory with the generated artifacts
+        :param zip_bytes: content of the zip file served to the users
+        :return: path of the cached zip file
+        """
+        staging_dir = self.cache_dir / f".{key}.{uuid.uuid4().hex}"
+        shutil.copytree(artifacts_dir, staging_dir / ARTIFACTS_DIR)
+        (staging_dir / ZIP_NAME).write_bytes(zip_bytes)
+        size = self._entry_size(staging_dir)
+        entry_dir = self.cache_dir / key
+        with self._lock:
+            if entry_dir.exists():
+                # generated concurrently by another session, both are identical
+                shutil.rmtree(staging_dir)
+            else:
+                os.replace(staging_dir, entry_dir)
+            if key not in self._index:
+                self._add(key, size)
+            self._index[key][0] = time.time()
+            self._evict()
+        return entry_dir / ZIP_NAME
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._index),
+            "size_bytes": self._size_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def _scan(self) -> dict:
+        """
+        :return: {key: [last use, size in bytes]} of the entries on disk
+        """
+        index = {}
+        for entry_dir in self.cache_dir.iterdir():
+            if entry_dir.name.startswith(".") or not entry_dir.is_dir():
+                continue
+            index[entry_dir.name] = [entry_dir.stat().st_mtime, self._entry_size(entry_dir)]
+        return index
+
+    @staticmethod
+    def _entry_size(entry_dir) -> int:
+        return sum(path.stat().st_size for path in Path(entry_dir).rglob("*") if path.is_file())
+
+    def _add(self, key, size):
+        self._index[key] = [0.0, size]
+        self._size_bytes += size
+
+    def _remove(self, key):
+        shutil.rmtree(self.cache_dir / key, ignore_errors=True)
+        self._size_bytes -= self._index.pop(key)[1]
+
+    def _evict(self):
+        # the most recent entry is always kept, even when it's larger than the cap on its own
+        for key in sorted(self._index, key=lambda key: self._index[key][0])[:-1]:
+            if self._size_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+            self.evictions += 1
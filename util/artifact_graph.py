@@ -0,0 +1,89 @@
+"""
+Lazily computed, cached artifacts with declared dependencies.
+
+An artifact is computed the first time it is accessed and cached on the instance afterwards,
+the same way `functools.cached_property` works. Each artifact declares the artifacts it is derived from,
+which gives us a dependency graph that can be inspected and used to invalidate derived artifacts.
+
+    class Fabric:
+        @artifact()
+        def links(self):
+            return [...]
+
+        @artifact('links')
+        def interfaces(self):
+            return [... for link in self.links]
+"""
+
+
+class artifact:
+    def __init__(self, *depends_on):
+        """
+        :param depends_on: names of the artifacts this artifact is derived from
+        """
+        self.depends_on = depends_on
+        self.func = None
+        self.name = None
+        self.__doc__ = None
+
+    def __call__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+        return self
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = self.func(instance)
+        # artifact is a non-data descriptor, the cached value in the instance dictionary takes precedence from now on
+        instance.__dict__[self.name] = value
+        return value
+
+
+def dependency_graph(cls) -> dict:
+    """
+    :return: dictionary of artifact name to the names of the artifacts it depends on
+    """
+    graph = {}
+    for klass in reversed(cls.__mro__):
+        for name, attr in vars(klass).items():
+            if isinstance(attr, artifact):
+                graph[name] = attr.depends_on
+    return graph
+
+
+def computed_artifacts(instance) -> list:
+    """
+    :return: names of the artifacts that have already been computed for the instance
+    """
+    return [name for name in dependency_graph(type(instance)) if name in instance.__dict__]
+
+
+def dependents(cls, name) -> set:
+    """
+    :return: names of all artifacts directly or indirectly derived from the given artifact
+    """
+    graph = dependency_graph(cls)
+    result = set()
+    pending = [name]
+    while pending:
+        current = pending.pop()
+        for artifact_name, depends_on in graph.items():
+            if current in depends_on and artifact_name not in result:
+                result.add(artifact_name)
+                pending.append(artifact_name)
+    return result
+
+
+def invalidate(instance, *names):
+    """
+    Drops the cached value of the given artifacts and everything derived from them,
+    they will be recomputed on the next access.
+    """
+    for name in names:
+        for artifact_name in {name} | dependents(type(instance), name):
+            instance.__dict__.pop(artifact_name, None)
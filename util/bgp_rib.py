@@ -0,0 +1,257 @@
+"""
+Expected BGP state of every switch: the BGP neighbors and the loopback routes with their ECMP next-hops.
+
+Every switch advertises its loopback /32 (see jinja_templates/cumulus/bgp_global.j2) over eBGP sessions on the
+point-to-point links. The routes are computed for all destinations at once with a breadth-first path-vector pass:
+a switch learns a loopback from the neighbors one AS hop closer to it, unless the neighbor's path already contains
+the switch's AS (eBGP loop prevention, this matters for ASNs shared by the spines of a pod or by the super-spines),
+and it installs every such neighbor as an ECMP next-hop (equal AS path length, as-path multipath-relax).
+
+    rib = build_expected_rib(mapper)
+    rib.save("expected_rib.npz")
+    rib = ExpectedRib.load("expected_rib.npz")
+    rib.routes("leaf000")["10.0.1.5/32"]        # {"PathLength": 2, "NextHops": ["100.64.0.1", ...]}
+    problems = rib.compare("leaf000", live_neighbors, live_routes)
+
+The RIB is stored as indexed arrays (CSR): neighbors and routes per switch, routes point into a table of next-hop
+sets that's shared by all routes with the same next-hops, e.g. every remote leaf seen from a leaf.
+"""
+from typing import Dict, List
+import numpy as np
+from util import addressing
+
+_UNREACHED = np.iinfo(np.int8).max
+_ARRAYS = ("devices", "device_as", "loopbacks", "neighbor_offsets", "neighbor_ip", "neighbor_as",
+           "route_offsets", "route_prefix", "route_length", "route_set", "set_offsets", "set_ip")
+
+
+class ExpectedRib:
+    def __init__(self, **arrays):
+        """
+        :param arrays: the indexed arrays, see build_expected_rib:
+            devices, device_as, loopbacks: switch names, ASNs and loopback IPs (uint32, 0 without loopback),
+            neighbor_offsets, neighbor_ip, neighbor_as: BGP sessions of switch i at [offsets[i], offsets[i + 1]),
+            route_offsets, route_prefix, route_length, route_set: routes of switch i, prefix is the index of the
+                switch that owns the loopback, length the AS path length, set the index of the next-hop set,
+            set_offsets, set_ip: next-hop IPs of every next-hop set
+        """
+        for name in _ARRAYS:
+            setattr(self, name, np.asarray(arrays[name]))
+        self._device_index = {name: index for index, name in enumerate(self.devices.tolist())}
+
+    def __len__(self):
+        return len(self.route_prefix)
+
+    def save(self, path):
+        np.savez_compressed(path, **{name: getattr(self, name) for name in _ARRAYS})
+
+    @classmethod
+    def load(cls, path) -> "ExpectedRib":
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(**{name: arrays[name] for name in _ARRAYS})
+
+    def neighbors(self, device) -> List[Dict]:
+        """
+        :return: expected BGP sessions of the switch [{"NeighborIP", "RemoteAS"}], sorted by neighbor IP
+        """
+        start, stop = self._range(self.neighbor_offsets, device)
+        return [{"NeighborIP": ip, "RemoteAS": remote_as}
+                for ip, remote_as in zip(addressing.ip_to_strings(self.neighbor_ip[start:stop]),
+                                         self.neighbor_as[start:stop].tolist())]
+
+    def routes(self, device) -> Dict[str, Dict]:
+        """
+        :return: expected loopback routes of the switch {"<loopback>/32": {"PathLength", "NextHops"}}
+        """
+        start, stop = self._range(self.route_offsets, device)
+        prefixes = addressing.ip_to_strings(self.loopbacks[self.route_prefix[start:stop]])
+        return {f"{prefix}/32": {"PathLength": length, "NextHops": self.next_hops(next_hop_set)}
+                for prefix, length, next_hop_set in zip(prefixes, self.route_length[start:stop].tolist(),
+                                                        self.route_set[start:stop].tolist())}
+
+    def next_hops(self, next_hop_set: int) -> List[str]:
+        return addressing.ip_to_strings(self.set_ip[self.set_offsets[next_hop_set]:
+                                                    self.set_offsets[next_hop_set + 1]])
+
+    def compare(self, device, neighbors, routes) -> List[str]:
+        """
+        Compares the live state of a switch with the expected state, in time linear in the number of routes
+
+        :param neighbors: established BGP sessions, {neighbor IP: remote AS}
+        :param routes: installed loopback routes, {"<prefix>/32": iterable of next-hop IPs}
+        :return: list of the differences, empty when the live state is the expected one
+        """
+        problems = []
+        expected_neighbors = {entry["NeighborIP"]: entry["RemoteAS"] for entry in self.neighbors(device)}
+        for ip, remote_as in expected_neighbors.items():
+            if ip not in neighbors:
+                problems.append(f"{device}: BGP neighbor {ip} is missing")
+            elif neighbors[ip] != remote_as:
+                problems.append(f"{device}: BGP neighbor {ip} has remote AS {neighbors[ip]}, expected {remote_as}")
+        problems.extend(f"{device}: unexpected BGP neighbor {ip}" for ip in neighbors if ip not in expected_neighbors)
+
+        expected_routes = self.routes(device)
+        for prefix, route in expected_routes.items():
+            if prefix not in routes:
+                problems.append(f"{device}: route {prefix} is missing")
+                continue
+            live = set(routes[prefix])
+            expected = set(route["NextHops"])
+            if live != expected:
+                problems.append(f"{device}: route {prefix} has {len(live)} next-hops, expected {len(expected)} "
+                                f"(missing {sorted(expected - live)[:4]}, unexpected {sorted(live - expected)[:4]})")
+        problems.extend(f"{device}: unexpected route {prefix}" for prefix in routes if prefix not in expected_routes)
+        return problems
+
+    def _range(self, offsets, device) -> tuple:
+        index = self._device_index[device]
+        return int(offsets[index]), int(offsets[index + 1])
+
+
+def build_expected_rib(mapper, max_batch_cells: int = 1 << 22) -> ExpectedRib:
+    """
+    :param mapper: NetworkMapping of a generated fabric or of user provided mappings
+    :param max_batch_cells: destinations are processed in batches of about max_batch_cells / sessions,
+        this bounds the memory of the pass
+    """
+    inventory = mapper.inventory
+    link_devices, _, link_ips = inventory.link_columns()
+    columns = inventory.device_columns()
+    is_switch = np.array([role != "host" for role in columns["Role"]], dtype=bool)
+    switch_ids = np.flatnonzero(is_switch)
+    num_switches = len(switch_ids)
+    local = np.full(len(is_switch), -1, dtype=np.int64)
+    local[switch_ids] = np.arange(num_switches)
+    device_as = np.array([-1 if columns["AS"][index] is None else columns["AS"][index]
+                          for index in switch_ids.tolist()], dtype=np.int64)
+    loopbacks = np.array([columns["LoopbackIP"][index] or 0 for index in switch_ids.tolist()], dtype=np.uint32)
+
+    # a session per switch-to-switch link on both ends, the neighbor IP is the peer's interface IP
+    switch_links = is_switch[link_devices[:, 0]] & is_switch[link_devices[:, 1]]
+    ends = local[link_devices[switch_links]]
+    ips = link_ips[switch_links]
+    session_device = np.concatenate([ends[:, 0], ends[:, 1]])
+    session_peer = np.concatenate([ends[:, 1], ends[:, 0]])
+    session_ip = np.concatenate([ips[:, 1], ips[:, 0]]).astype(np.uint32)
+    order = np.lexsort((session_ip, session_peer, session_device))
+    session_device, session_peer, session_ip = session_device[order], session_peer[order], session_ip[order]
+    neighbor_order = np.lexsort((session_ip, session_device))
+    neighbor_offsets = _offsets(session_device, num_switches)
+
+    # routing runs on the unique neighbor pairs (edges), parallel sessions share the routes of their edge
+    edge_keys, edge_first = np.unique(session_device * num_switches + session_peer, return_index=True)
+    edge_device, edge_peer = edge_keys // num_switches, edge_keys % num_switches
+    edge_sessions = np.append(edge_first, len(session_device))
+    device_edges = _offsets(edge_device, num_switches)
+    routers = np.flatnonzero(np.diff(device_edges) > 0)     # switches with at least one session
+
+    # ASNs used by more than one switch can cause loops that shortest paths don't rule out, they get a bit each
+    shared_as, as_counts = np.unique(device_as[device_as >= 0], return_counts=True)
+    shared_as = shared_as[as_counts > 1]
+    shared_code = np.full(num_switches, -1, dtype=np.int64)
+    is_shared = np.isin(device_as, shared_as)
+    shared_code[is_shared] = np.searchsorted(shared_as, device_as[is_shared])
+    num_words = max(1, -(-len(shared_as) // 64))
+    own_mask = np.zeros((num_switches, num_words), dtype=np.uint64)
+    own_mask[is_shared, shared_code[is_shared] // 64] = np.left_shift(
+        np.uint64(1), (shared_code[is_shared] % 64).astype(np.uint64))
+
+    # next-hop sets are identified by two independent 64-bit sums of random edge weights
+    rng = np.random.default_rng(0)
+    edge_hashes = rng.integers(0, np.iinfo(np.int64).max, size=(2, len(edge_device)), dtype=np.int64).astype(np.uint64)
+
+    destinations = np.flatnonzero(loopbacks > 0)
+    batch_size = max(1, min(len(destinations), max_batch_cells // max(len(edge_device), 1)))
+    set_index, set_edges = {}, []
+    route_parts = []
+    for start in range(0, len(destinations), batch_size):
+        batch = destinations[start:start + batch_size]
+        dist, best = _path_vector(batch, edge_device, edge_peer, device_edges, routers, shared_code, own_mask)
+        device, column = np.nonzero((dist > 0) & (dist < _UNREACHED))
+        if not len(device):
+            continue
+        hashes = [np.add.reduceat(np.where(best, weights[:, None], np.uint64(0)), device_edges[routers], axis=0)
+                  for weights in edge_hashes]
+        router_row = np.searchsorted(routers, device)
+        keys = np.stack([device.astype(np.uint64), hashes[0][router_row, column], hashes[1][router_row, column]],
+                        axis=1)
+        unique_keys, representative, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        set_ids = np.empty(len(unique_keys), dtype=np.int64)
+        for position, key in enumerate(map(tuple, unique_keys.tolist())):
+            if key not in set_index:
+                row = representative[position]
+                edges = np.arange(device_edges[device[row]], device_edges[device[row] + 1])
+                set_index[key] = len(set_edges)
+                set_edges.append(edges[best[edges, column[row]]])
+            set_ids[position] = set_index[key]
+        route_parts.append((device, batch[column], dist[device, column], set_ids[inverse.ravel()]))
+
+    if route_parts:
+        route_device, route_prefix, route_length, route_set = (np.concatenate(part) for part in zip(*route_parts))
+    else:
+        route_device = route_prefix = route_length = route_set = np.zeros(0, dtype=np.int64)
+    order = np.lexsort((loopbacks[route_prefix], route_device))
+
+    set_ips = [np.sort(np.concatenate([session_ip[edge_sessions[edge]:edge_sessions[edge + 1]] for edge in edges]))
+               if len(edges) else np.zeros(0, dtype=np.uint32) for edges in set_edges]
+    return ExpectedRib(
+        devices=np.array([columns["DeviceName"][index] for index in switch_ids.tolist()], dtype=str),
+        device_as=device_as,
+        loopbacks=loopbacks,
+        neighbor_offsets=neighbor_offsets,
+        neighbor_ip=session_ip[neighbor_order],
+        neighbor_as=device_as[session_peer[neighbor_order]],
+        route_offsets=_offsets(route_device[order], num_switches),
+        route_prefix=route_prefix[order].astype(np.int32),
+        route_length=route_length[order].astype(np.int8),
+        route_set=route_set[order].astype(np.int32),
+        set_offsets=_offsets(np.repeat(np.arange(len(set_ips)), [len(ips) for ips in set_ips]), len(set_ips)),
+        set_ip=np.concatenate(set_ips) if set_ips else np.zeros(0, dtype=np.uint32),
+    )
+
+
+def _path_vector(batch, edge_device, edge_peer, device_edges, routers, shared_code, own_mask) -> tuple:
+    """
+    Breadth-first path-vector pass for a batch of destinations
+
+    :return: (dist, best), dist is the AS path length from every switch to every destination of the batch,
+        best marks the edges (device -> peer) that are ECMP next-hops of the route
+    """
+    num_switches, width = len(shared_code), len(batch)
+    dist = np.full((num_switches, width), _UNREACHED, dtype=np.int8)
+    dist[batch, np.arange(width)] = 0
+    # shared ASNs on the advertised paths as 64-bit words, every switch puts its own AS on the paths it advertises
+    masks = [np.repeat(own_mask[:, word, None], width, axis=1) for word in range(own_mask.shape[1])]
+    best = np.zeros((len(edge_device), width), dtype=bool)
+    if not len(routers):
+        return dist, best
+
+    starts = device_edges[routers]
+    edge_code = shared_code[edge_device]
+    # edges whose device has a shared AS, grouped by the mask word of that AS
+    checked = [(edges, edge_peer[edges], (edge_code[edges] % 64).astype(np.uint64)[:, None])
+               for edges in (np.flatnonzero(edge_code // 64 == word) for word in range(len(masks)))]
+    for length in range(1, min(num_switches, _UNREACHED)):
+        frontier = dist == length - 1
+        if not frontier.any():
+            break
+        usable = frontier[edge_peer] & (dist == _UNREACHED)[edge_device]
+        for mask, (edges, peers, bits) in zip(masks, checked):
+            if len(edges):
+                usable[edges] &= (mask[peers] >> bits) & np.uint64(1) == 0
+        reached = np.logical_or.reduceat(usable, starts, axis=0)
+        dist[routers] = np.where(reached, length, dist[routers])
+        best |= usable
+        if any(len(edges) for edges, _, _ in checked):
+            # only the paths of ASNs shared by several switches can loop
+            for mask in masks:
+                mask[routers] |= np.bitwise_or.reduceat(np.where(usable, mask[edge_peer], np.uint64(0)), starts,
+                                                        axis=0)
+    return dist, best
+
+
+def _offsets(sorted_keys, count) -> np.ndarray:
+    """
+    :return: CSR offsets of sorted integer keys in [0, count)
+    """
+    return np.concatenate([[0], np.cumsum(np.bincount(sorted_keys, minlength=count))]).astype(np.int64)
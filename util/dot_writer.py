@@ -0,0 +1,67 @@
+"""
+Streaming DOT (graphviz) writer.
+
+Lines are generated one at a time and written straight to every output, the graph is never held in memory
+as a single string. Outputs may be file paths (gzip compressed when they end in .gz) or any writable file object,
+text or binary, e.g. a member of a zip file opened with `ZipFile.open(name, "w")`.
+"""
+import contextlib
+import gzip
+import io
+from pathlib import Path
+
+
+def dot_lines(graph_name, node_lines, edges):
+    """
+    :param graph_name: name of the graph
+    :param node_lines: iterable of node statements, e.g. '"leaf000" [function="leaf"]'
+    :param edges: iterable of dictionaries with SourceDevice, SourceIntf, DstDevice and DestIntf keys
+    :return: generator of the DOT lines, without line breaks
+    """
+    yield f'graph {graph_name} {{'
+    yield from node_lines
+    for entry in edges:
+        source = f'"{entry["SourceDevice"]}":"{entry["SourceIntf"]}"'
+        destination = f'"{entry["DstDevice"]}":"{entry["DestIntf"]}"'
+        yield f'    {source} -- {destination}'
+    yield '}'
+
+
+def write_lines(lines, *outputs, keep=False):
+    """
+    Writes the lines separated by line breaks to every output in a single pass
+
+    :param lines: iterable of strings
+    :param outputs: file paths or writable file objects, file objects are left open
+    :param keep: also return the joined string, only meant for small graphs
+    :return: the joined string when keep is set, otherwise None
+    """
+    kept = [] if keep else None
+    with contextlib.ExitStack() as stack:
+        writers = [_text_writer(output, stack) for output in outputs]
+        separator = ''
+        for line in lines:
+            for writer in writers:
+                writer.write(separator)
+                writer.write(line)
+            if keep:
+                kept.append(line)
+            separator = '\n'
+    return '\n'.join(kept) if keep else None
+
+
+def _text_writer(output, stack):
+    if isinstance(output, (str, Path)):
+        path = Path(output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == '.gz':
+            return stack.enter_context(gzip.open(path, 'wt', encoding='utf-8'))
+        return stack.enter_context(open(path, 'w', encoding='utf-8'))
+    if isinstance(output, io.TextIOBase):
+        return output
+    # binary writable, e.g. a zip file member or a socket file
+    writer = io.TextIOWrapper(output, encoding='utf-8', write_through=True)
+    # flush and detach when done, the caller owns the underlying binary stream
+    stack.callback(writer.detach)
+    stack.callback(writer.flush)
+    return writer
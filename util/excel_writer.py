@@ -0,0 +1,99 @@
+"""
+Streaming, constant-memory Excel writer.
+
+Rows are written one at a time with an openpyxl write-only workbook, the workbook is never held in memory.
+Sheets that overflow Excel's row limit are split automatically into "<sheet name> (2)", "<sheet name> (3)"...etc.
+
+    with StreamingExcelWriter("pdg_data.xlsx", progress=print) as writer:
+        writer.write_sheet("Host Port Mapping", mapper.leaf_host_mapping_data)
+"""
+import logging
+import numbers
+import openpyxl
+
+EXCEL_MAX_ROWS = 1048576        # maximum number of rows in a sheet, including the header
+EXCEL_MAX_SHEET_NAME = 31       # maximum number of characters in a sheet name
+
+
+class StreamingExcelWriter:
+    __slots__ = ['filename', 'max_rows', 'progress', 'progress_interval', 'workbook']
+
+    def __init__(self, filename, max_rows=EXCEL_MAX_ROWS, progress=None, progress_interval=50000):
+        """
+        :param filename: path of the Excel file to create
+        :param max_rows: maximum number of rows per sheet including the header, overflowing rows go to a new sheet
+        :param progress: optional callable(sheet_name, rows_written, total_rows) called while rows are written,
+            total_rows is None when the number of rows isn't known up front
+        :param progress_interval: number of rows between progress reports
+        """
+        if max_rows < 2:
+            raise ValueError(f"max_rows ({max_rows}) must leave room for the header and at least one row")
+        self.filename = filename
+        self.max_rows = max_rows
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.workbook = openpyxl.Workbook(write_only=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_sheet(self, sheet_name, rows, columns=None) -> list:
+        """
+        Writes a list of dictionaries (or any iterable of dictionaries) to one or more sheets.
+
+        :param sheet_name: name of the sheet, split sheets get a " (2)", " (3)"...etc. suffix
+        :param rows: iterable of dictionaries, the keys of the first row are the column headers
+        :param columns: column headers, required to write the header of an empty sheet
+        :return: names of the sheets that were written
+        """
+        total_rows = len(rows) if hasattr(rows, '__len__') else None
+        rows_per_sheet = self.max_rows - 1
+        sheet_names = []
+        worksheet = None
+        sheet_rows = rows_per_sheet
+        rows_written = 0
+
+        for row in rows:
+            if columns is None:
+                columns = list(row)
+            if sheet_rows == rows_per_sheet:
+                worksheet = self._create_sheet(sheet_name, len(sheet_names) + 1, columns)
+                sheet_names.append(worksheet.title)
+                sheet_rows = 0
+            worksheet.append([self._cell_value(row[column]) for column in columns])
+            sheet_rows += 1
+            rows_written += 1
+            if self.progress and rows_written % self.progress_interval == 0:
+                self.progress(sheet_name, rows_written, total_rows)
+
+        if not sheet_names:
+            worksheet = self._create_sheet(sheet_name, 1, columns or [])
+            sheet_names.append(worksheet.title)
+        if self.progress:
+            self.progress(sheet_name, rows_written, total_rows)
+        logging.info(f"wrote {rows_written} rows to {', '.join(sheet_names)}")
+        return sheet_names
+
+    def close(self):
+        if not self.workbook.worksheets:
+            # a workbook needs at least one sheet
+            self.workbook.create_sheet()
+        self.workbook.save(self.filename)
+
+    def _create_sheet(self, sheet_name, part, columns):
+        if part > 1:
+            suffix = f" ({part})"
+            sheet_name = sheet_name[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix
+        worksheet = self.workbook.create_sheet(title=sheet_name)
+        worksheet.append(columns)
+        return worksheet
+
+    @staticmethod
+    def _cell_value(value):
+        # Excel cells only hold strings, numbers, booleans and dates, e.g. IPv4Address objects are written as strings
+        if value is None or isinstance(value, (str, numbers.Number)):
+            return value
+        return str(value)
@@ -0,0 +1,493 @@
+"""
+Vectorized generation engine for Spectrum-X rail optimized fabrics.
+
+All IDs, IP addresses (as uint32, see `util.addressing`) and port indices are computed in bulk with NumPy.
+Strings are only created when a table is exported, e.g. through `HostLinkTable.to_records()`
+which provides the list-of-dictionaries view used by `NetworkMapping`.
+"""
+import functools
+import math
+from collections.abc import Sequence
+import numpy as np
+from util.addressing import (LEAF_SPINE_BASE_IP, POD_LEAF_SPINE_BASE_IP, SPINE_SUPER_SPINE_BASE_IP,
+                             host_ip_array, ip_to_strings, device_names, p2p_ip)
+
+RAILS_PER_HOST = 8      # 8 GPUs (rails) per DGX host
+HOSTS_PER_SU = 32       # maximum number of hosts in a scalable unit
+LEAFS_PER_SU = 4        # rail 1-2 -> leaf 1, rail 3-4 -> leaf 2...etc.
+RAILS_PER_LEAF = RAILS_PER_HOST // LEAFS_PER_SU
+HOST_INTF_NAMES = [f"rail{rail_id + 1}" for rail_id in range(RAILS_PER_HOST)]
+
+
+class HostLinkTable:
+    """
+    Columnar representation of the leaf to host port mapping.
+    Each index across the arrays describes a single host rail connected to a leaf port.
+    Every view of the host links (port mapping, DOT edges) is a projection of this table,
+    device names come from shared name tables so no string is stored per link.
+    """
+    __slots__ = ('su', 'host', 'rail', 'local_host', 'leaf', 'leaf_port', 'leaf_subport', 'nic_ip', 'switch_ip')
+
+    def __init__(self, su, host, rail, local_host, leaf, leaf_port, leaf_subport, nic_ip, switch_ip):
+        self.su = su
+        self.host = host
+        self.rail = rail
+        self.local_host = local_host
+        self.leaf = leaf
+        self.leaf_port = leaf_port          # physical switch port number, starts at 1
+        self.leaf_subport = leaf_subport    # breakout index, -1 when the port is not broken out
+        self.nic_ip = nic_ip
+        self.switch_ip = switch_ip
+
+    def __len__(self):
+        return len(self.host)
+
+    def leaf_port_names(self, start=0, stop=None) -> list:
+        names = {}
+        result = []
+        for port, subport in zip(self.leaf_port[start:stop].tolist(), self.leaf_subport[start:stop].tolist()):
+            key = (port, subport)
+            if key not in names:
+                names[key] = f"swp{port}" if subport < 0 else f"swp{port}s{subport}"
+            result.append(names[key])
+        return result
+
+    def to_records(self, host_prefix, leaf_prefix, digit_filler, mask) -> "RecordView":
+        """
+        :return: list-of-dictionaries view, the same format `NetworkMapping.leaf_host_mapping_data` has always used
+        """
+        if not len(self):
+            return RecordView(0, self.records)
+        host_names = device_names(host_prefix, int(self.host.max()) + 1, digit_filler)
+        leaf_names = device_names(leaf_prefix, int(self.leaf.max()) + 1, digit_filler)
+        return RecordView(len(self), functools.partial(self.records, host_names=host_names,
+                                                       leaf_names=leaf_names, mask=mask))
+
+    def records(self, start, stop, host_names=(), leaf_names=(), mask=None) -> list:
+        """
+        Builds the port mapping dictionaries for rows [start, stop)
+
+        :param host_names: list of host names indexed by host ID
+        :param leaf_names: list of leaf names indexed by leaf ID
+        :param mask: point-to-point mask
+        """
+        result = []
+        for su_id, host_id, rail_id, leaf_id, leaf_intf, nic_ip, switch_ip in zip(
+                self.su[start:stop].tolist(), self.host[start:stop].tolist(), self.rail[start:stop].tolist(),
+                self.leaf[start:stop].tolist(), self.leaf_port_names(start, stop),
+                ip_to_strings(self.nic_ip[start:stop]), ip_to_strings(self.switch_ip[start:stop])):
+            host_name = host_names[host_id]
+            host_intf = HOST_INTF_NAMES[rail_id]
+            result.append({
+                "SU": su_id,
+                "HostID": host_id,
+                "HostName": host_name,
+                "Rail": rail_id,
+                "HostIntf": host_intf,
+                "HostIntfIP": nic_ip,
+                "LeafID": leaf_id,
+                "LeafName": leaf_names[leaf_id],
+                "LeafIntf": leaf_intf,
+                "LeafIntfIP": switch_ip,
+                "Mask": mask,
+                "Description": f"{host_name}-{host_intf}"
+            })
+        return result
+
+    def dot_records(self, start, stop, host_names, leaf_names) -> list:
+        """
+        Builds the DOT edge dictionaries for rows [start, stop), the leaf is the source
+        """
+        return [
+            {
+                'SourceDevice': leaf_names[leaf_id],
+                'SourceIntf': leaf_intf,
+                'DstDevice': host_names[host_id],
+                'DestIntf': HOST_INTF_NAMES[rail_id]
+            }
+            for leaf_id, leaf_intf, host_id, rail_id in zip(
+                self.leaf[start:stop].tolist(), self.leaf_port_names(start, stop),
+                self.host[start:stop].tolist(), self.rail[start:stop].tolist())
+        ]
+
+
+def build_host_links(num_hosts: int, lead_octet: int, breakout: int, sus_per_pod: int = 0,
+                     first_host: int = 0) -> HostLinkTable:
+    """
+    Generates the leaf to host port mapping for `num_hosts` hosts.
+    Rows are ordered by host, then rail, the same order the nested SU x host x rail loop produced.
+
+    :param num_hosts: number of hosts (DGX nodes)
+    :param lead_octet: the first octet to be used for the host point-to-point IPs
+    :param breakout: number of breakout ports, 1 means no breakout (NVIDIA AIR)
+    :param sus_per_pod: number of SUs per pod for 3-tier fabrics, 0 means a single pod (pod ID 0)
+    :param first_host: only generate the links of hosts [first_host, num_hosts), the other hosts are unaffected
+    :return: HostLinkTable
+    """
+    num_hosts = int(num_hosts)
+    host = np.repeat(np.arange(first_host, num_hosts, dtype=np.int32), RAILS_PER_HOST)
+    rail = np.tile(np.arange(RAILS_PER_HOST, dtype=np.int32), max(num_hosts - first_host, 0))
+    su = host // HOSTS_PER_SU
+    local_host = host % HOSTS_PER_SU
+    leaf = su * LEAFS_PER_SU + rail // RAILS_PER_LEAF
+
+    # each host consumes 2 ports on a leaf. With breakouts, both rails share the same physical port,
+    # otherwise each rail gets its own physical port
+    if breakout > 1:
+        leaf_port = local_host + 1
+        leaf_subport = rail % breakout
+    else:
+        leaf_port = local_host * RAILS_PER_LEAF + rail % RAILS_PER_LEAF + 1
+        leaf_subport = np.full_like(rail, -1)
+
+    pod_id = su // sus_per_pod if sus_per_pod else 0
+    nic_ip, switch_ip = host_ip_array(lead_octet, pod_id, su, rail, local_host)
+    # IDs and ports are stored with the smallest dtype that holds them, the table is kept for the whole session
+    return HostLinkTable(su=su.astype(np.int16), host=host, rail=rail.astype(np.int8),
+                         local_host=local_host.astype(np.int8), leaf=leaf,
+                         leaf_port=leaf_port.astype(np.int16), leaf_subport=leaf_subport.astype(np.int8),
+                         nic_ip=nic_ip, switch_ip=switch_ip)
+
+
+# --- leaf/spine/super-spine uplinks ---
+
+SWITCH_RADIX = 128                      # number of (non-breakout) ports on a leaf, spine or super-spine
+LEAF_UPLINKS = SWITCH_RADIX // 2        # half of the leaf ports are facing hosts, the other half the spines
+SUS_PER_POD = 16                        # 3-tier: 16 SUs (512 hosts, 64 leafs) per pod
+LEAFS_PER_POD = SUS_PER_POD * LEAFS_PER_SU
+HOSTS_PER_POD = SUS_PER_POD * HOSTS_PER_SU
+SPINES_PER_POD = LEAF_UPLINKS           # 3-tier: every leaf has a single connection to every spine in its pod
+MAX_PODS = 128
+
+
+class RecordView(Sequence):
+    """
+    Read-only list-of-dictionaries view over columnar data.
+    Rows are only built when they are accessed, iterating builds them in chunks so memory stays flat.
+    """
+    __slots__ = ('_length', '_build_rows', '_chunk_size', 'columns')
+
+    def __init__(self, length: int, build_rows, chunk_size: int = 4096, columns: dict = None):
+        """
+        :param length: number of rows
+        :param build_rows: callable(start, stop) returning a list of dictionaries for rows [start, stop)
+        :param chunk_size: number of rows built at once while iterating
+        :param columns: arrays the rows are built from, for consumers that can work on them without building rows
+        """
+        self._length = length
+        self._build_rows = build_rows
+        self._chunk_size = chunk_size
+        self.columns = columns
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step == 1:
+                return self._build_rows(start, max(start, stop))
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("RecordView index out of range")
+        return self._build_rows(index, index + 1)[0]
+
+    def __iter__(self):
+        for start in range(0, self._length, self._chunk_size):
+            yield from self._build_rows(start, min(start + self._chunk_size, self._length))
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or len(other) != len(self):
+            return False
+        return all(row == other_row for row, other_row in zip(self, other))
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __bool__(self):
+        return self._length > 0
+
+
+class UplinkTable:
+    """
+    Columnar representation of routed point-to-point links between a lower tier device (leaf or spine)
+    and an upper tier device (spine or super-spine).
+    Interfaces are stored as port slots, the 0-based index of a (breakout) port on the switch.
+    """
+    __slots__ = ('pod', 'su', 'lower', 'lower_slot', 'lower_ip', 'lower_as',
+                 'upper', 'upper_slot', 'upper_ip', 'upper_as')
+
+    def __init__(self, pod, su, lower, lower_slot, lower_ip, lower_as, upper, upper_slot, upper_ip, upper_as):
+        # columns are stored with the smallest dtype that holds them, ASNs may be 4-byte asplain values
+        self.pod = np.asarray(pod, dtype=np.int16)
+        self.su = np.asarray(su, dtype=np.int16)
+        self.lower = np.asarray(lower, dtype=np.int32)
+        self.lower_slot = np.asarray(lower_slot, dtype=np.int16)
+        self.lower_ip = np.asarray(lower_ip, dtype=np.uint32)
+        self.lower_as = np.asarray(lower_as, dtype=np.int64)
+        self.upper = np.asarray(upper, dtype=np.int32)
+        self.upper_slot = np.asarray(upper_slot, dtype=np.int16)
+        self.upper_ip = np.asarray(upper_ip, dtype=np.uint32)
+        self.upper_as = np.asarray(upper_as, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.lower)
+
+    def to_records(self, start, stop, group_key, upper_key, lower_key, upper_names, lower_names,
+                   port_names, mask) -> list:
+        """
+        Builds the dictionaries for rows [start, stop)
+
+        :param group_key: "SU" or "PodID", the key for the first column
+        :param upper_key: key prefix for the upper tier device, e.g. "Spine"
+        :param lower_key: key prefix for the lower tier device, e.g. "Leaf"
+        :param upper_names: list of upper tier device names indexed by ID
+        :param lower_names: list of lower tier device names indexed by ID
+        :param port_names: list of interface names indexed by port slot
+        :param mask: point-to-point mask
+        """
+        group = (self.su if group_key == "SU" else self.pod)[start:stop].tolist()
+        result = []
+        for group_id, upper_id, upper_slot, upper_ip, upper_as, lower_id, lower_slot, lower_ip, lower_as in zip(
+                group, self.upper[start:stop].tolist(), self.upper_slot[start:stop].tolist(),
+                ip_to_strings(self.upper_ip[start:stop]), self.upper_as[start:stop].tolist(),
+                self.lower[start:stop].tolist(), self.lower_slot[start:stop].tolist(),
+                ip_to_strings(self.lower_ip[start:stop]), self.lower_as[start:stop].tolist()):
+            result.append({
+                group_key: group_id,
+                f"{upper_key}ID": upper_id,
+                f"{upper_key}Name": upper_names[upper_id],
+                f"{upper_key}Intf": port_names[upper_slot],
+                f"{upper_key}IntfIP": upper_ip,
+                f"{upper_key}AS": upper_as,
+                f"{lower_key}ID": lower_id,
+                f"{lower_key}Name": lower_names[lower_id],
+                f"{lower_key}Intf": port_names[lower_slot],
+                f"{lower_key}IntfIP": lower_ip,
+                f"{lower_key}AS": lower_as,
+                "Mask": mask
+            })
+        return result
+
+    def interface_records(self, start, stop, upper_names, lower_names, port_names, mask) -> list:
+        """
+        Builds the interface dictionaries for rows [start, stop), there are 2 rows per link (upper tier device first)
+        """
+        first_link, last_link = start // 2, (stop + 1) // 2
+        result = []
+        for upper_id, upper_slot, upper_ip, lower_id, lower_slot, lower_ip in zip(
+                self.upper[first_link:last_link].tolist(), self.upper_slot[first_link:last_link].tolist(),
+                ip_to_strings(self.upper_ip[first_link:last_link]),
+                self.lower[first_link:last_link].tolist(), self.lower_slot[first_link:last_link].tolist(),
+                ip_to_strings(self.lower_ip[first_link:last_link])):
+            result.append({
+                'DeviceName': upper_names[upper_id],
+                'Interface': port_names[upper_slot],
+                'InterfaceIP': upper_ip,
+                'Mask': mask
+            })
+            result.append({
+                'DeviceName': lower_names[lower_id],
+                'Interface': port_names[lower_slot],
+                'InterfaceIP': lower_ip,
+                'Mask': mask
+            })
+        offset = start - first_link * 2
+        return result[offset:offset + stop - start]
+
+    def dot_records(self, start, stop, upper_names, lower_names, port_names) -> list:
+        """
+        Builds the DOT edge dictionaries for rows [start, stop), the lower tier device is the source
+        """
+        return [
+            {
+                'SourceDevice': lower_names[lower_id],
+                'SourceIntf': port_names[lower_slot],
+                'DstDevice': upper_names[upper_id],
+                'DestIntf': port_names[upper_slot]
+            }
+            for lower_id, lower_slot, upper_id, upper_slot in zip(
+                self.lower[start:stop].tolist(), self.lower_slot[start:stop].tolist(),
+                self.upper[start:stop].tolist(), self.upper_slot[start:stop].tolist())
+        ]
+
+
+def concat_views(*views) -> RecordView:
+    """
+    Chains multiple views (or lists) into a single RecordView without copying them
+    """
+    offsets = [0]
+    for view in views:
+        offsets.append(offsets[-1] + len(view))
+
+    def build_rows(start, stop):
+        result = []
+        for view, view_start, view_stop in zip(views, offsets, offsets[1:]):
+            if start < view_stop and stop > view_start:
+                result.extend(view[max(start, view_start) - view_start:min(stop, view_stop) - view_start])
+        return result
+
+    return RecordView(offsets[-1], build_rows)
+
+
+def group_ranges(num_rows: int, num_chunks: int, keys=None) -> list:
+    """
+    Splits rows into at most `num_chunks` contiguous ranges of similar size, e.g. to spread the work across processes
+
+    :param keys: optional group column the rows are ordered by (spine, SU...etc.), a group is never split
+    :return: list of (start, stop)
+    """
+    if keys is None:
+        edges = np.arange(num_rows + 1)
+    else:
+        # every group starts where the key changes
+        edges = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1, [num_rows]))
+    targets = np.linspace(0, num_rows, max(min(num_chunks, num_rows), 1) + 1)
+    cuts = np.unique(edges[np.searchsorted(edges, targets[1:-1])])
+    bounds = [0, *(int(cut) for cut in cuts if 0 < cut < num_rows), num_rows]
+    return list(zip(bounds, bounds[1:]))
+
+
+def build_leaf_spine_links(num_leafs: int, num_spines: int, breakout: int,
+                           leaf_base_as: int, spine_base_as: int, first_leaf: int = 0) -> UplinkTable:
+    """
+    Generates the 2-tier leaf to spine mapping, rows are ordered by spine, leaf, then connection.
+    Every leaf has 64 uplinks equally distributed across all spines, leaf uplinks start after the host facing ports.
+    Each spine gets its own /24 out of 10.254.0.0/16, the spine takes the even IP, the leaf the odd IP.
+    The links of a leaf only depend on the leaf ID and the number of spines,
+    `first_leaf` only generates the links of leafs [first_leaf, num_leafs).
+    """
+    leaf_connections_to_each_spine = LEAF_UPLINKS // num_spines
+    # number of physical ports consumed per leaf/spine pair
+    physical_ports_per_spine = leaf_connections_to_each_spine // breakout
+    leaf_ids = np.arange(first_leaf, num_leafs, dtype=np.int64)
+    spine, leaf, connection = (grid.ravel() for grid in np.meshgrid(np.arange(num_spines, dtype=np.int64), leaf_ids,
+                                                                     np.arange(leaf_connections_to_each_spine),
+                                                                     indexing='ij'))
+    breakout_index = connection % breakout
+    leaf_port = SWITCH_RADIX // (breakout * 2) + 1 + spine * physical_ports_per_spine + connection // breakout
+    spine_port = connection // breakout + 1 + leaf * physical_ports_per_spine
+    leaf_slot = (leaf_port - 1) * breakout + breakout_index
+    spine_slot = (spine_port - 1) * breakout + breakout_index
+
+    spine_ip = p2p_ip(LEAF_SPINE_BASE_IP, spine, spine_slot).astype(np.uint32)
+    return UplinkTable(pod=np.zeros_like(leaf), su=leaf // LEAFS_PER_SU,
+                       lower=leaf, lower_slot=leaf_slot, lower_ip=spine_ip + np.uint32(1),
+                       lower_as=leaf + leaf_base_as,
+                       upper=spine, upper_slot=spine_slot, upper_ip=spine_ip, upper_as=spine + spine_base_as)
+
+
+def concat_tables(tables):
+    """
+    Concatenates link tables of the same type, e.g. the tables of consecutive pods
+    """
+    table_type = type(tables[0])
+    return table_type(**{column: np.concatenate([getattr(table, column) for table in tables])
+                         for column in table_type.__slots__})
+
+
+def table_rows(table, rows):
+    """
+    :param rows: slice, index array or boolean mask
+    :return: link table of the same type holding the selected rows
+    """
+    return type(table)(**{column: getattr(table, column)[rows] for column in type(table).__slots__})
+
+
+def leaf_as_3_tier(leaf_base_as: int, leaf_ids):
+    """
+    3-tier fabrics have more leafs than the 2-byte private AS range can hold next to the spine ASNs,
+    leafs use 4-byte ASNs `leaf_base_as.leaf_id` in asdot notation (leaf_base_as * 65536 + leaf_id in asplain)
+    """
+    return np.asarray(leaf_ids, dtype=np.int64) + (leaf_base_as << 16)
+
+
+def num_super_spines_per_plane(num_pods: int) -> int:
+    """
+    Super-spines are organized in 64 planes, spine N of every pod connects to plane N.
+    Each plane needs enough super-spine ports to terminate 64 uplinks from every pod, rounded up to a power of 2
+    so the spine uplinks are equally distributed.
+    """
+    if not 0 < num_pods <= MAX_PODS:
+        raise ValueError(f"number of pods ({num_pods}) must be between 1 and {MAX_PODS}")
+    per_plane = math.ceil(num_pods * LEAF_UPLINKS / SWITCH_RADIX)
+    return 2 ** math.ceil(math.log2(per_plane))
+
+
+def build_pod_links(num_leafs: int, breakout: int, leaf_base_as: int, spine_base_as: int,
+                    first_leaf: int = 0) -> UplinkTable:
+    """
+    Generates the 3-tier leaf to spine mapping, rows are ordered by pod, spine, then leaf.
+    Every leaf has a single uplink to each of the 64 spines in its pod.
+    Spines in the same pod share the AS `spine_base_as + pod_id` (RFC 7938), spine IDs are global across pods.
+    `first_leaf` only generates the links of leafs [first_leaf, num_leafs).
+    """
+    num_pods = math.ceil(num_leafs / LEAFS_PER_POD)
+    first_pod = first_leaf // LEAFS_PER_POD
+    pod, local_spine, local_leaf = (grid.ravel() for grid in np.meshgrid(np.arange(first_pod, num_pods,
+                                                                                   dtype=np.int64),
+                                                                         np.arange(SPINES_PER_POD, dtype=np.int64),
+                                                                         np.arange(LEAFS_PER_POD, dtype=np.int64),
+                                                                         indexing='ij'))
+    leaf = pod * LEAFS_PER_POD + local_leaf
+    exists = (leaf >= first_leaf) & (leaf < num_leafs)   # the first and last pod may be partially generated
+    pod, local_spine, local_leaf, leaf = pod[exists], local_spine[exists], local_leaf[exists], leaf[exists]
+    spine = pod * SPINES_PER_POD + local_spine
+
+    spine_ip = p2p_ip(POD_LEAF_SPINE_BASE_IP, spine, local_leaf).astype(np.uint32)
+    return UplinkTable(pod=pod, su=leaf // LEAFS_PER_SU,
+                       lower=leaf, lower_slot=LEAF_UPLINKS + local_spine, lower_ip=spine_ip + np.uint32(1),
+                       lower_as=leaf_as_3_tier(leaf_base_as, leaf),
+                       upper=spine, upper_slot=local_leaf, upper_ip=spine_ip, upper_as=pod + spine_base_as)
+
+
+def build_pod(pod_id: int, num_hosts: int, lead_octet: int, breakout: int, leaf_base_as: int,
+              spine_base_as: int) -> tuple:
+    """
+    Generates the host links and the leaf to spine links of a single pod of a 3-tier fabric.
+    A pod only depends on its ID and on how many hosts it holds (the last pod may be partially populated),
+    every pod can be generated on its own and the pods of a fabric are joined with `concat_tables`.
+
+    :param num_hosts: number of hosts of the whole fabric
+    :return: tuple of (HostLinkTable, UplinkTable)
+    """
+    first_host = pod_id * HOSTS_PER_POD
+    last_host = min(first_host + HOSTS_PER_POD, int(num_hosts))
+    host_links = build_host_links(num_hosts=last_host, lead_octet=lead_octet, breakout=breakout,
+                                  sus_per_pod=SUS_PER_POD, first_host=first_host)
+    leaf_spine_links = build_pod_links(num_leafs=math.ceil(last_host / HOSTS_PER_SU) * LEAFS_PER_SU,
+                                       breakout=breakout, leaf_base_as=leaf_base_as, spine_base_as=spine_base_as,
+                                       first_leaf=pod_id * LEAFS_PER_POD)
+    return host_links, leaf_spine_links
+
+
+def build_super_spine_links(num_pods: int, spine_base_as: int, super_spine_base_as: int,
+                            first_pod: int = 0) -> UplinkTable:
+    """
+    Generates the 3-tier spine to super-spine mapping, rows are ordered by pod, spine, then uplink.
+    Spine N of every pod spreads its 64 uplinks equally across the super-spines in plane N.
+    All super-spines share `super_spine_base_as` (RFC 7938).
+    The links of a pod only depend on the pod ID and the plane size,
+    `first_pod` only generates the links of pods [first_pod, num_pods).
+    """
+    per_plane = num_super_spines_per_plane(num_pods)
+    links_per_super_spine = LEAF_UPLINKS // per_plane
+    pod, local_spine, uplink = (grid.ravel() for grid in np.meshgrid(np.arange(first_pod, num_pods, dtype=np.int64),
+                                                                      np.arange(SPINES_PER_POD, dtype=np.int64),
+                                                                      np.arange(LEAF_UPLINKS, dtype=np.int64),
+                                                                      indexing='ij'))
+    spine = pod * SPINES_PER_POD + local_spine
+    super_spine = local_spine * per_plane + uplink // links_per_super_spine
+    super_spine_slot = pod * links_per_super_spine + uplink % links_per_super_spine
+
+    super_spine_ip = p2p_ip(SPINE_SUPER_SPINE_BASE_IP, super_spine, super_spine_slot).astype(np.uint32)
+    return UplinkTable(pod=pod, su=np.full_like(pod, -1),
+                       lower=spine, lower_slot=LEAF_UPLINKS + uplink, lower_ip=super_spine_ip + np.uint32(1),
+                       lower_as=pod + spine_base_as,
+                       upper=super_spine, upper_slot=super_spine_slot, upper_ip=super_spine_ip,
+                       upper_as=np.full_like(pod, super_spine_base_as))
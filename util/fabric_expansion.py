@@ -0,0 +1,156 @@
+"""
+Incremental expansion of a generated fabric.
+
+Every assignment (host IPs, leaf/spine ports, point-to-point IPs, ASNs) is a function of the device IDs and of a few
+fabric wide dimensions: the number of spines of a 2-tier fabric and the super-spine plane size of a 3-tier fabric.
+As long as those dimensions don't change, adding hosts only adds devices and links, nothing that exists moves.
+`FabricDelta` checks the dimensions up front and only generates the added links:
+
+    prior = NetworkMapping.from_manifest("nvidia/generation.json")
+    delta = FabricDelta(prior, num_hosts=1536, file_dir="nvidia_delta")
+    delta.create_excel()        # new rows only, devices are limited to the added and touched ones
+    assert not delta.verify()   # optional, regenerates the whole fabric and compares it with prior + delta
+
+The delta is a NetworkMapping, every PDG output works on it and only covers the added part of the fabric.
+"""
+from typing import Dict, List
+import numpy as np
+from util import fabric_engine
+from util.artifact_graph import artifact
+from util.spectrumx_netmapper import NetworkMapping
+
+
+class FabricDelta(NetworkMapping):
+    def __init__(self, prior: NetworkMapping, num_hosts: int, file_dir: str = None):
+        """
+        :param prior: the generated fabric that's deployed, e.g. `NetworkMapping.from_manifest(...)`
+        :param num_hosts: number of hosts after the expansion
+        :param file_dir: directory for the delta outputs
+        """
+        super().__init__(**(prior.parameters() | {"num_hosts": num_hosts, "file_dir": file_dir}))
+        self.prior = prior
+        self._check_expansion()
+
+    def _check_expansion(self):
+        prior = self.prior
+        if self.num_hosts <= prior.num_hosts:
+            raise ValueError(f"the expanded fabric ({self.num_hosts} hosts) must have more hosts than the prior "
+                             f"fabric ({prior.num_hosts} hosts)")
+        if prior.num_tiers > 1 and prior.num_tiers != self.num_tiers:
+            raise ValueError(f"expanding a {prior.num_tiers}-tier fabric to {self.num_tiers} tiers changes the "
+                             f"leaf-spine addressing, the fabric has to be regenerated")
+        if prior.num_tiers == 2 and prior.num_spines != self.num_spines:
+            raise ValueError(f"expanding to {self.num_hosts} hosts needs {self.num_spines} spines instead of "
+                             f"{prior.num_spines}, every leaf uplink would move to another spine")
+        if prior.num_tiers == 3 and (fabric_engine.num_super_spines_per_plane(prior.num_pods) !=
+                                     fabric_engine.num_super_spines_per_plane(self.num_pods)):
+            raise ValueError(f"expanding to {self.num_pods} pods changes the number of super-spines per plane, "
+                             f"every spine uplink would move to another super-spine")
+
+    def _prior_counts(self) -> Dict:
+        """
+        :return: number of devices per role in the prior fabric, leafs and spines only count if they have uplinks
+        """
+        prior = self.prior
+        return {
+            'host': int(prior.num_hosts),
+            'leaf': prior.num_leafs if prior.num_tiers > 1 else 0,
+            'spine': prior.num_spines if prior.num_tiers == 3 else 0,
+        }
+
+    # --- the added links, generated from the first new device on ---
+
+    @artifact()
+    def host_links(self):
+        sus_per_pod = fabric_engine.SUS_PER_POD if self.num_tiers == 3 else 0
+        return fabric_engine.build_host_links(num_hosts=self.num_hosts,
+                                              lead_octet=self.host_p2p_lead_octet,
+                                              breakout=self.breakout,
+                                              sus_per_pod=sus_per_pod,
+                                              first_host=self._prior_counts()['host'])
+
+    @artifact()
+    def leaf_spine_links(self):
+        if self.num_tiers == 1:
+            return None
+        first_leaf = self._prior_counts()['leaf']
+        if self.num_tiers == 3:
+            return fabric_engine.build_pod_links(num_leafs=self.num_leafs,
+                                                 breakout=self.breakout,
+                                                 leaf_base_as=self.leaf_base_as,
+                                                 spine_base_as=self.spine_base_as,
+                                                 first_leaf=first_leaf)
+        return fabric_engine.build_leaf_spine_links(num_leafs=self.num_leafs,
+                                                    num_spines=self.num_spines,
+                                                    breakout=self.breakout,
+                                                    leaf_base_as=self.leaf_base_as,
+                                                    spine_base_as=self.spine_base_as,
+                                                    first_leaf=first_leaf)
+
+    @artifact()
+    def spine_super_spine_links(self):
+        if self.num_tiers != 3:
+            return None
+        return fabric_engine.build_super_spine_links(num_pods=self.num_pods,
+                                                     spine_base_as=self.spine_base_as,
+                                                     super_spine_base_as=self.super_spine_base_as,
+                                                     first_pod=self._prior_counts()['spine'] //
+                                                     fabric_engine.SPINES_PER_POD)
+
+    @artifact('host_links', 'leaf_spine_links', 'spine_super_spine_links')
+    def touched_devices(self) -> set:
+        """
+        Names of the devices with added links, new devices and existing devices that get new neighbors
+        """
+        return self._linked_device_names()
+
+    @artifact('touched_devices')
+    def new_devices(self) -> set:
+        """
+        Names of the devices that don't exist in the prior fabric
+        """
+        return self.touched_devices.difference(device['DeviceName'] for device in self.prior.devices)
+
+    @artifact('inventory', 'touched_devices')
+    def bgp_global_data(self):
+        if self.num_tiers == 1:
+            return []
+        return [entry for entry in self.inventory.bgp_global() if entry['DeviceName'] in self.touched_devices]
+
+    def _listed_devices(self, role=None) -> List[Dict]:
+        return [device for device in self.inventory.devices(role) if device['DeviceName'] in self.touched_devices]
+
+    # --- proof that nothing moved ---
+
+    def verify(self) -> List[str]:
+        """
+        Regenerates the whole expanded fabric and checks that it's exactly the prior fabric plus the delta:
+        every link of the prior fabric keeps its ports, IPs and ASNs, and the delta holds every other link.
+        Unlike the delta itself this takes time in proportion to the whole fabric.
+
+        :return: list of the differences, empty when every existing assignment is unchanged
+        """
+        expanded = NetworkMapping(**self.parameters())
+        prior_counts = self._prior_counts()
+        problems = []
+        for table_name, key, prior_count in (('host_links', 'host', prior_counts['host']),
+                                             ('leaf_spine_links', 'lower', prior_counts['leaf']),
+                                             ('spine_super_spine_links', 'lower', prior_counts['spine'])):
+            table = getattr(expanded, table_name)
+            if table is None:
+                continue
+            prior_table = getattr(self.prior, table_name) if prior_count else None
+            delta_table = getattr(self, table_name)
+            existing = getattr(table, key) < prior_count
+            for column in type(table).__slots__:
+                values = getattr(table, column)
+                if prior_table is not None and not np.array_equal(values[existing], getattr(prior_table, column)):
+                    problems.append(f"{table_name}.{column}: existing assignments changed")
+                if not np.array_equal(values[~existing], getattr(delta_table, column)):
+                    problems.append(f"{table_name}.{column}: delta doesn't match the expanded fabric")
+
+        for entry in self.prior.bgp_global_data:
+            device = expanded.inventory.device(entry['DeviceName'])
+            if (device['AS'], device['LoopbackIP']) != (entry['AS'], entry['LoopbackIP']):
+                problems.append(f"{entry['DeviceName']}: AS or loopback changed")
+        return problems
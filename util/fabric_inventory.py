@@ -0,0 +1,219 @@
+"""
+Indexed inventory of the devices and links of a fabric.
+
+The inventory is built once and answers the common questions in O(1) without rescanning the port mappings:
+    inventory.device("leaf001")                 -> role, ID, AS and loopback of a device
+    inventory.link("leaf001", "swp65")          -> both ends of the link connected to an interface
+    inventory.interfaces("spine000")            -> connected interfaces of a device in port order
+    inventory.devices("spine")                  -> all devices with a role, in insertion order
+
+Links are registered as sources that are only resolved on the first link query, so an inventory used for
+device lookups never pays for the port mappings.
+"""
+import ipaddress
+import numpy as np
+
+
+class FabricInventory:
+    __slots__ = ['_names', '_roles', '_device_ids', '_asns', '_loopbacks', '_device_index',
+                 '_interface_names', '_interface_codes', '_link_sources', '_links', '_port_index']
+
+    def __init__(self, interface_names=()):
+        """
+        :param interface_names: interface names to intern up front, interfaces are listed in this order,
+            e.g. the port name table of a switch. Other interface names are interned as they are registered.
+        """
+        self._names = []
+        self._roles = []
+        self._device_ids = []
+        self._asns = []
+        self._loopbacks = []
+        self._device_index = {}
+        self._interface_names = []
+        self._interface_codes = {}
+        self._link_sources = []
+        self._links = None
+        self._port_index = None
+        self.interface_codes(interface_names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._device_index
+
+    # --- building the inventory ---
+
+    def add_devices(self, role, names, device_ids=None, asns=None, loopbacks=None) -> np.ndarray:
+        """
+        Registers devices, devices that already exist keep their index and only get their missing attributes filled in
+
+        :param role: device role, e.g. "leaf", "spine", "super-spine" or "host"
+        :param names: device names
+        :param device_ids: device IDs, aligned with names
+        :param asns: BGP AS numbers aligned with names, None for devices without BGP
+        :param loopbacks: loopback IPs as ints aligned with names
+        :return: array with the inventory index of every device
+        """
+        indices = np.empty(len(names), dtype=np.int32)
+        for position, name in enumerate(names):
+            device_id = device_ids[position] if device_ids is not None else None
+            asn = asns[position] if asns is not None else None
+            loopback = loopbacks[position] if loopbacks is not None else None
+            index = self._device_index.get(name)
+            if index is None:
+                index = len(self._names)
+                self._device_index[name] = index
+                self._names.append(name)
+                self._roles.append(role)
+                self._device_ids.append(device_id)
+                self._asns.append(asn)
+                self._loopbacks.append(loopback)
+                self._port_index = None
+            else:
+                if self._asns[index] is None:
+                    self._asns[index] = asn
+                if self._loopbacks[index] is None:
+                    self._loopbacks[index] = loopback
+            indices[position] = index
+        return indices
+
+    def interface_codes(self, interface_names) -> np.ndarray:
+        """
+        :return: array with the interned code of every interface name
+        """
+        codes = np.empty(len(interface_names), dtype=np.int32)
+        for position, interface_name in enumerate(interface_names):
+            code = self._interface_codes.get(interface_name)
+            if code is None:
+                code = len(self._interface_names)
+                self._interface_codes[interface_name] = code
+                self._interface_names.append(interface_name)
+                self._port_index = None
+            codes[position] = code
+        return codes
+
+    def add_links(self, source):
+        """
+        :param source: callable returning the columns (devices, interfaces, ips) of a set of links,
+            each an array of shape (number of links, 2) holding both ends of the link:
+            inventory device indices, interface codes and IPs as ints
+        """
+        self._link_sources.append(source)
+        self._links = None
+        self._port_index = None
+
+    def _resolve_links(self):
+        columns = [source() for source in self._link_sources]
+        if columns:
+            devices, interfaces, ips = (np.concatenate([np.asarray(column[i]).reshape(-1, 2) for column in columns])
+                                        for i in range(3))
+        else:
+            devices = interfaces = ips = np.zeros((0, 2), dtype=np.int64)
+        self._links = (devices, interfaces, ips.astype(np.uint32))
+
+    def _build_link_index(self):
+        if self._links is None:
+            self._resolve_links()
+        devices, interfaces, _ = self._links
+        # dense table indexed by device index * number of interfaces + interface code,
+        # every entry holds the link index * 2 + link end (-1 when the interface isn't connected)
+        num_interfaces = len(self._interface_names)
+        port_index = np.full(len(self._names) * num_interfaces, -1, dtype=np.int64)
+        port_index[(devices.astype(np.int64) * num_interfaces + interfaces).ravel()] = np.arange(devices.size)
+        self._port_index = port_index
+
+    # --- queries ---
+
+    def device(self, name) -> dict:
+        """
+        :return: {"DeviceName", "Role", "ID", "AS", "LoopbackIP"} of a device, raises KeyError for unknown devices
+        """
+        index = self._device_index[name]
+        loopback = self._loopbacks[index]
+        return {
+            "DeviceName": name,
+            "Role": self._roles[index],
+            "ID": self._device_ids[index],
+            "AS": self._asns[index],
+            "LoopbackIP": ipaddress.IPv4Address(loopback) if loopback is not None else None,
+        }
+
+    def devices(self, role=None) -> list:
+        """
+        :return: list of {"DeviceName", "Role"} in insertion order, optionally only devices with the given role
+        """
+        return [{'DeviceName': name, 'Role': device_role} for name, device_role in zip(self._names, self._roles)
+                if role is None or device_role == role]
+
+    def link(self, device, interface) -> dict:
+        """
+        :return: {"Device", "Interface", "IP", "PeerDevice", "PeerInterface", "PeerIP"} for the link connected to
+            an interface, raises KeyError when the interface isn't connected
+        """
+        if self._port_index is None:
+            self._build_link_index()
+        index = self._device_index[device]
+        code = self._interface_codes.get(interface)
+        entry = self._port_index[index * len(self._interface_names) + code] if code is not None else -1
+        if entry < 0:
+            raise KeyError((device, interface))
+        devices, interfaces, ips = self._links
+        link_index, end = divmod(int(entry), 2)
+        peer = 1 - end
+        return {
+            "Device": device,
+            "Interface": interface,
+            "IP": ipaddress.IPv4Address(int(ips[link_index, end])),
+            "PeerDevice": self._names[devices[link_index, peer]],
+            "PeerInterface": self._interface_names[interfaces[link_index, peer]],
+            "PeerIP": ipaddress.IPv4Address(int(ips[link_index, peer])),
+        }
+
+    def interfaces(self, device) -> list:
+        """
+        :return: names of the connected interfaces of a device, in interface code (port) order
+        """
+        if self._port_index is None:
+            self._build_link_index()
+        num_interfaces = len(self._interface_names)
+        start = self._device_index[device] * num_interfaces
+        codes = np.flatnonzero(self._port_index[start:start + num_interfaces] >= 0)
+        return [self._interface_names[code] for code in codes.tolist()]
+
+    def link_columns(self) -> tuple:
+        """
+        :return: (devices, interfaces, ips) of every link, arrays of shape (number of links, 2) holding both ends:
+            inventory device indices, interface codes and IPs as uint32
+        """
+        # the port index is only built for link and interface queries
+        if self._links is None:
+            self._resolve_links()
+        return self._links
+
+    def device_columns(self) -> dict:
+        """
+        :return: {"DeviceName", "Role", "ID", "AS", "LoopbackIP"} lists indexed by inventory device index,
+            AS and loopback (int) are None when a device doesn't have one
+        """
+        return {"DeviceName": self._names, "Role": self._roles, "ID": self._device_ids, "AS": self._asns,
+                "LoopbackIP": self._loopbacks}
+
+    def interface_names(self) -> list:
+        """
+        :return: interface names indexed by interface code
+        """
+        return self._interface_names
+
+    def bgp_global(self, vrf="default") -> list:
+        """
+        :return: BGP global data of every device with an AS, sorted by device name
+        """
+        result = []
+        for name, asn, loopback in zip(self._names, self._asns, self._loopbacks):
+            if asn is None:
+                continue
+            loopback_ip = ipaddress.IPv4Address(loopback) if loopback is not None else None
+            result.append({"DeviceName": name, "VRF": vrf, "AS": asn, "LoopbackIP": loopback_ip,
+                           "RouterID": loopback_ip})
+        return sorted(result, key=lambda x: x["DeviceName"])
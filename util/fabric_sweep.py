@@ -0,0 +1,216 @@
+"""
+Headless generation of NetworkMapping variants for capacity planning.
+
+A sweep spec (JSON, or YAML when PyYAML is installed) sets the parameters shared by every variant and a grid,
+every combination of the grid values is a variant. Explicit variants can be listed as well:
+
+    {
+        "format": "parquet",
+        "outputs": ["dot", "ansible"],
+        "parameters": {"nvidia_air": false, "spine_prefix": "sp"},
+        "grid": {"num_hosts": [256, 1024, 4096], "breakout": [1, 2]},
+        "variants": [{"name": "lab", "num_hosts": 64, "host_prefix": "lab"}]
+    }
+
+    python util/fabric_sweep.py sweep.json -o sweeps -j 8
+
+Variants are generated in worker processes, each into its own directory under the output directory, with the
+generation manifest so a variant can be expanded later. Templates are loaded from jinja_templates/, run from the
+repository root.
+"""
+import inspect
+import itertools
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List
+from util import pdg_export
+from util.spectrumx_netmapper import NetworkMapping
+
+FILE_FORMATS = ("excel", "none", *pdg_export.FILE_FORMATS)
+OUTPUTS = ("dot", "ansible", "air")
+SUMMARY_FILE = "sweep_summary.json"
+
+# parameters that only make sense for a single fabric, not for a generated variant
+_EXCLUDED_PARAMETERS = ("self", "input_data", "file_dir")
+PARAMETERS = tuple(name for name in inspect.signature(NetworkMapping.__init__).parameters
+                   if name not in _EXCLUDED_PARAMETERS)
+
+
+def load_sweep(path) -> Dict:
+    """
+    :param path: .json, .yaml or .yml sweep spec
+    """
+    path = Path(path)
+    text = path.read_text()
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{path.name}: YAML sweep specs need PyYAML (pip install pyyaml), "
+                             f"or use a JSON spec") from None
+        return yaml.safe_load(text) or {}
+    return json.loads(text)
+
+
+def expand_sweep(spec: Dict) -> List[Dict]:
+    """
+    :param spec: sweep spec, see the module docstring
+    :return: list of variants {"name", "parameters"}, grid combinations first, then the explicit variants
+    """
+    unknown = set(spec) - {"format", "outputs", "parameters", "grid", "variants"}
+    if unknown:
+        raise ValueError(f"unknown sweep keys {', '.join(sorted(unknown))}")
+    if spec.get("format", "excel") not in FILE_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FILE_FORMATS)}")
+    unknown = set(spec.get("outputs", ())) - set(OUTPUTS)
+    if unknown:
+        raise ValueError(f"unknown outputs {', '.join(sorted(unknown))}, expected {', '.join(OUTPUTS)}")
+
+    base = spec.get("parameters", {})
+    grid = spec.get("grid", {})
+    _check_parameters(base, "parameters")
+    _check_parameters(grid, "grid")
+    for name, values in grid.items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"grid values of {name} must be a non-empty list")
+
+    variants = []
+    if grid:
+        names = list(grid)
+        for values in itertools.product(*(grid[name] for name in names)):
+            combination = dict(zip(names, values))
+            variants.append({"name": "_".join(f"{name}-{value}" for name, value in combination.items()),
+                             "parameters": base | combination})
+    for index, variant in enumerate(spec.get("variants", ())):
+        variant = dict(variant)
+        name = str(variant.pop("name", f"variant-{index}"))
+        _check_parameters(variant, f"variant {name}")
+        variants.append({"name": name, "parameters": base | variant})
+    if not variants and base:
+        variants.append({"name": "default", "parameters": dict(base)})
+
+    seen = set()
+    for variant in variants:
+        if "num_hosts" not in variant["parameters"]:
+            raise ValueError(f"variant {variant['name']} has no num_hosts")
+        if variant["name"] in seen:
+            raise ValueError(f"duplicate variant name {variant['name']}")
+        seen.add(variant["name"])
+    return variants
+
+
+def _check_parameters(parameters: Dict, where: str):
+    unknown = set(parameters) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"{where}: unknown NetworkMapping parameters {', '.join(sorted(unknown))}")
+
+
+def generate_variant(name: str, parameters: Dict, output_dir, file_format="excel", outputs=()) -> Dict:
+    """
+    Generates a single variant into <output_dir>/<name>, runs in a worker process
+
+    :return: summary {"Variant", "Hosts", "Devices", "Links", "Seconds", "Files", "Bytes", "Error"}
+    """
+    variant_dir = Path(output_dir) / name
+    variant_dir.mkdir(parents=True, exist_ok=True)
+    summary = {"Variant": name, "Hosts": parameters.get("num_hosts"), "Devices": None, "Links": None,
+               "Seconds": None, "Files": 0, "Bytes": 0, "Error": None}
+    start = time.perf_counter()
+    try:
+        mapper = NetworkMapping(**parameters, file_dir=str(variant_dir))
+        if file_format == "excel":
+            mapper.create_excel()
+        elif file_format != "none":
+            mapper.export_data(file_format=file_format)
+        if "dot" in outputs:
+            mapper.write_dot_graph(variant_dir / "topology.dot")
+        if "ansible" in outputs:
+            mapper.generate_ansible_hosts(filepath=variant_dir / "cumulus_ansible" / "inventory" / "hosts")
+        if "air" in outputs:
+            mapper.generate_air_script(filepath=variant_dir / "nvidia_air" / "scripts" / "env_setup.sh")
+        mapper.write_manifest()
+        summary["Devices"] = len(mapper.inventory)
+        summary["Links"] = len(mapper.inventory.link_columns()[0])
+    except Exception as error:  # a broken variant is reported, the others still get generated
+        summary["Error"] = f"{type(error).__name__}: {error}"
+    summary["Seconds"] = round(time.perf_counter() - start, 3)
+    files = [path for path in variant_dir.rglob("*") if path.is_file()]
+    summary["Files"] = len(files)
+    summary["Bytes"] = sum(path.stat().st_size for path in files)
+    return summary
+
+
+def run_sweep(spec: Dict, output_dir, workers=1, progress=None) -> List[Dict]:
+    """
+    :param spec: sweep spec, see the module docstring
+    :param output_dir: every variant is generated into <output_dir>/<variant name>
+    :param workers: number of worker processes, 1 generates the variants in this process
+    :param progress: called with the summary of every variant as it's done
+    :return: summaries of the variants in spec order, also written to <output_dir>/sweep_summary.json
+    """
+    variants = expand_sweep(spec)
+    file_format = spec.get("format", "excel")
+    outputs = tuple(spec.get("outputs", ()))
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    summaries = {}
+    if workers > 1 and len(variants) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(variants))) as executor:
+            # largest fabrics first so a big variant doesn't start last and hold up the sweep
+            futures = {executor.submit(generate_variant, variant["name"], variant["parameters"], output_dir,
+                                       file_format, outputs): variant["name"]
+                       for variant in sorted(variants, key=_size, reverse=True)}
+            for future in as_completed(futures):
+                summaries[futures[future]] = future.result()
+                if progress:
+                    progress(summaries[futures[future]])
+    else:
+        for variant in variants:
+            summaries[variant["name"]] = generate_variant(variant["name"], variant["parameters"], output_dir,
+                                                          file_format, outputs)
+            if progress:
+                progress(summaries[variant["name"]])
+
+    results = [summaries[variant["name"]] for variant in variants]
+    (output_dir / SUMMARY_FILE).write_text(json.dumps(results, indent=1))
+    return results
+
+
+def _size(variant: Dict) -> int:
+    num_hosts = variant["parameters"]["num_hosts"]
+    return num_hosts if isinstance(num_hosts, int) else 0
+
+
+def format_summary(summary: Dict) -> str:
+    if summary["Error"]:
+        return f"{summary['Variant']:<40} FAILED {summary['Error']}"
+    return (f"{summary['Variant']:<40} {summary['Hosts']:>6} hosts {summary['Devices']:>6} devices "
+            f"{summary['Links']:>7} links {summary['Seconds']:8.2f}s {summary['Files']:>4} files "
+            f"{summary['Bytes'] / 2 ** 20:9.1f} MB")
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generates every NetworkMapping variant of a sweep spec")
+    parser.add_argument('spec', help="sweep spec, .json, .yaml or .yml")
+    parser.add_argument('-o', '--output-dir', default="sweeps", help="one directory per variant is created here")
+    parser.add_argument('-j', '--workers', type=int, default=1, help="number of worker processes")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_sweep(load_sweep(args.spec), args.output_dir, workers=args.workers,
+                        progress=lambda summary: print(format_summary(summary), flush=True))
+    failed = [summary for summary in results if summary["Error"]]
+    print(f"{len(results) - len(failed)} of {len(results)} variants generated in "
+          f"{time.perf_counter() - start:.2f}s, {sum(summary['Bytes'] for summary in results) / 2 ** 20:.1f} MB, "
+          f"summary in {Path(args.output_dir) / SUMMARY_FILE}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Consistency checks for generated and user provided fabrics.
+
+Every check works on the columnar link arrays of the fabric inventory (see util.fabric_inventory) and on the columns
+of the generated BGP sessions, duplicates are found by sorting integer keys (IPs, /31 subnets,
+device * interfaces + interface) once instead of comparing rows:
+
+    findings = validate_fabric(mapper)
+    for finding in findings:
+        print(finding["Check"], finding["Device"], finding["Message"])
+
+A finding is a dictionary {"Check", "Device", "Interface", "IP", "Message"} so it can be shown or exported like
+any other PDG data set, an empty list means the fabric is consistent.
+"""
+from typing import Dict, List
+import numpy as np
+from util import addressing, fabric_engine, pdg_export
+
+CHECKS = ("duplicate-ip", "p2p-subnet", "overlapping-p2p", "duplicate-port", "port-radix", "bgp-missing-global",
+          "bgp-local-as", "bgp-unknown-neighbor", "bgp-remote-as")
+
+LOOPBACK_INTERFACE = "lo"
+
+
+def validate_fabric(mapper, radix: int = fabric_engine.SWITCH_RADIX) -> List[Dict]:
+    """
+    :param mapper: NetworkMapping of a generated fabric or of user provided mappings
+    :param radix: number of physical ports of a switch
+    :return: list of findings, see CHECKS for the checks
+    """
+    inventory = mapper.inventory
+    devices, interfaces, ips = inventory.link_columns()
+    fabric = _FabricColumns(inventory.device_columns(), inventory.interface_names(), devices, interfaces, ips)
+    findings = []
+    findings += _duplicate_ips(fabric)
+    findings += _p2p_subnets(fabric)
+    findings += _duplicate_ports(fabric)
+    findings += _port_radix(fabric, radix)
+    findings += _bgp_sessions(fabric, mapper.bgp_session_data, mapper.bgp_global_data)
+    return findings
+
+
+def _finding(check, device=None, interface=None, ip=None, message="") -> Dict:
+    return {"Check": check, "Device": device, "Interface": interface, "IP": ip, "Message": message}
+
+
+class _FabricColumns:
+    """
+    Link ends as flat arrays (2 entries per link) plus the device and interface tables of the inventory
+    """
+    __slots__ = ['names', 'roles', 'asns', 'loopbacks', 'interface_names', 'links', 'end_device', 'end_interface',
+                 'end_ip']
+
+    def __init__(self, device_columns, interface_names, devices, interfaces, ips):
+        self.names = device_columns["DeviceName"]
+        self.roles = device_columns["Role"]
+        self.asns = device_columns["AS"]
+        self.loopbacks = device_columns["LoopbackIP"]
+        self.interface_names = interface_names
+        self.links = ips
+        self.end_device = np.asarray(devices, dtype=np.int64).ravel()
+        self.end_interface = np.asarray(interfaces, dtype=np.int64).ravel()
+        self.end_ip = np.asarray(ips, dtype=np.uint32).ravel()
+
+    def end_label(self, device, interface) -> str:
+        if interface < 0:
+            return f"{self.names[device]}:{LOOPBACK_INTERFACE}"
+        return f"{self.names[device]}:{self.interface_names[interface]}"
+
+
+def _duplicate_groups(keys):
+    """
+    :return: generator of index arrays, one per key value that occurs more than once
+    """
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    if not (sorted_keys[1:] == sorted_keys[:-1]).any():
+        return
+    starts = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+    bounds = np.concatenate(([0], starts, [len(keys)]))
+    for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        if stop - start > 1:
+            yield order[start:stop]
+
+
+def _duplicate_ips(fabric: _FabricColumns) -> List[Dict]:
+    """
+    Every interface IP and loopback must be unique across the fabric
+    """
+    loopback_devices = [index for index, loopback in enumerate(fabric.loopbacks) if loopback is not None]
+    ips = np.concatenate([fabric.end_ip, np.array([fabric.loopbacks[index] for index in loopback_devices],
+                                                  dtype=np.uint32)])
+    owners = np.concatenate([fabric.end_device, np.array(loopback_devices, dtype=np.int64)])
+    owner_interfaces = np.concatenate([fabric.end_interface, np.full(len(loopback_devices), -1, dtype=np.int64)])
+    findings = []
+    for group in _duplicate_groups(ips):
+        ends = [fabric.end_label(owners[index], owner_interfaces[index]) for index in group.tolist()]
+        first = int(group[0])
+        findings.append(_finding("duplicate-ip", fabric.names[owners[first]],
+                                 _interface_name(fabric, owner_interfaces[first]),
+                                 addressing.ip_to_string(int(ips[first])),
+                                 f"used {len(ends)} times: {', '.join(ends)}"))
+    return findings
+
+
+def _p2p_subnets(fabric: _FabricColumns) -> List[Dict]:
+    """
+    Both ends of a link share a /31 and no two links share a /31
+    """
+    findings = []
+    links = fabric.links
+    subnet = links >> 1
+    broken = np.flatnonzero((subnet[:, 0] != subnet[:, 1]) | (links[:, 0] == links[:, 1]))
+    for link in broken.tolist():
+        device, interface = fabric.end_device[link * 2], fabric.end_interface[link * 2]
+        peer = fabric.end_label(fabric.end_device[link * 2 + 1], fabric.end_interface[link * 2 + 1])
+        findings.append(_finding("p2p-subnet", fabric.names[device], _interface_name(fabric, interface),
+                                 addressing.ip_to_string(int(links[link, 0])),
+                                 f"{fabric.end_label(device, interface)} and {peer} "
+                                 f"({addressing.ip_to_string(int(links[link, 1]))}) are not in the same /31"))
+
+    for group in _duplicate_groups(subnet[:, 0]):
+        ends = [fabric.end_label(fabric.end_device[link * 2], fabric.end_interface[link * 2])
+                for link in group.tolist()]
+        first = int(group[0])
+        findings.append(_finding("overlapping-p2p", fabric.names[fabric.end_device[first * 2]],
+                                 _interface_name(fabric, fabric.end_interface[first * 2]),
+                                 addressing.ip_to_string(int(subnet[first, 0]) << 1),
+                                 f"/31 shared by {len(ends)} links: {', '.join(ends)}"))
+    return findings
+
+
+def _duplicate_ports(fabric: _FabricColumns) -> List[Dict]:
+    """
+    An interface of a device is connected to a single link
+    """
+    keys = fabric.end_device * max(len(fabric.interface_names), 1) + fabric.end_interface
+    findings = []
+    for group in _duplicate_groups(keys):
+        first = int(group[0])
+        device, interface = fabric.end_device[first], fabric.end_interface[first]
+        peers = [fabric.end_label(fabric.end_device[index ^ 1], fabric.end_interface[index ^ 1])
+                 for index in group.tolist()]
+        findings.append(_finding("duplicate-port", fabric.names[device], _interface_name(fabric, interface),
+                                 message=f"connected {len(peers)} times, to {', '.join(peers)}"))
+    return findings
+
+
+def _port_radix(fabric: _FabricColumns, radix: int) -> List[Dict]:
+    """
+    Switch ports must exist on the switch: port numbers up to the radix, at most `radix` physical ports in use
+    """
+    # physical port number per interface code, -1 for interfaces that aren't switch ports (host rails)
+    port_numbers = np.full(len(fabric.interface_names), -1, dtype=np.int64)
+    for code, name in enumerate(fabric.interface_names):
+        try:
+            port_numbers[code] = addressing.parse_port_name(name)[0]
+        except ValueError:
+            pass
+    is_switch = np.array([role != 'host' for role in fabric.roles], dtype=bool)
+    ports = port_numbers[fabric.end_interface]
+    switch_ends = is_switch[fabric.end_device] & (ports > 0)
+    devices, ports = fabric.end_device[switch_ends], ports[switch_ends]
+
+    findings = []
+    # breakout interfaces of the same physical port count as a single port
+    stride = int(ports.max(initial=0)) + 1
+    in_use = np.bincount(np.unique(devices * stride + ports) // stride, minlength=len(fabric.names))
+    highest = np.zeros(len(fabric.names), dtype=np.int64)
+    np.maximum.at(highest, devices, ports)
+    for device in np.flatnonzero((in_use > radix) | (highest > radix)).tolist():
+        findings.append(_finding("port-radix", fabric.names[device],
+                                 message=f"{int(in_use[device])} physical ports in use, highest port "
+                                         f"swp{int(highest[device])}, the switch has {radix} ports"))
+    return findings
+
+
+def _bgp_sessions(fabric: _FabricColumns, sessions, bgp_global) -> List[Dict]:
+    """
+    The local AS of a session is the AS of the device in BGP global,
+    the neighbor IP belongs to a device of the fabric and the remote AS is that device's AS
+    """
+    global_as = {entry["DeviceName"]: entry["AS"] for entry in bgp_global}
+    names, devices, local_as, neighbor_ips, remote_as = _session_columns(sessions)
+    if not len(devices):
+        return []
+
+    # owner of every interface IP, looked up with a binary search
+    order = np.argsort(fabric.end_ip, kind='stable')
+    sorted_ips = fabric.end_ip[order]
+    position = np.minimum(np.searchsorted(sorted_ips, neighbor_ips), max(len(sorted_ips) - 1, 0))
+    found = sorted_ips[position] == neighbor_ips if len(sorted_ips) else np.zeros(len(devices), dtype=bool)
+    neighbor_device = np.where(found, fabric.end_device[order][position] if len(order) else -1, -1)
+
+    # the AS numbers are compared per device table and only the sessions with a finding are turned into rows
+    device_as = np.array([global_as.get(name) for name in names], dtype=object)
+    fabric_as = np.array([global_as.get(name, asn) for name, asn in zip(fabric.names, fabric.asns)], dtype=object)
+    missing_global = np.array([asn is None for asn in device_as.tolist()], dtype=bool)[devices]
+    wrong_local = ~missing_global & (local_as != device_as[devices]).astype(bool)
+    unknown_neighbor = neighbor_device < 0
+    wrong_remote = ~unknown_neighbor & (remote_as != fabric_as[np.maximum(neighbor_device, 0)]).astype(bool)
+
+    findings = []
+    for index in np.flatnonzero(missing_global | wrong_local | unknown_neighbor | wrong_remote).tolist():
+        row = sessions[index]
+        device = row["DeviceName"]
+        if missing_global[index]:
+            findings.append(_finding("bgp-missing-global", device, ip=str(row["NeighborIP"]),
+                                     message=f"{device} has BGP sessions but no BGP global entry"))
+        elif wrong_local[index]:
+            findings.append(_finding("bgp-local-as", device, ip=str(row["NeighborIP"]),
+                                     message=f"session local AS {row['LocalAS']}, BGP global AS {global_as[device]}"))
+        if unknown_neighbor[index]:
+            findings.append(_finding("bgp-unknown-neighbor", device, ip=str(row["NeighborIP"]),
+                                     message=f"neighbor {addressing.ip_to_string(int(neighbor_ips[index]))} isn't "
+                                             f"an interface IP of the fabric"))
+        elif wrong_remote[index]:
+            neighbor = int(neighbor_device[index])
+            findings.append(_finding("bgp-remote-as", device, ip=str(row["NeighborIP"]),
+                                     message=f"session remote AS {row['RemoteAS']}, {fabric.names[neighbor]} has AS "
+                                             f"{fabric_as[neighbor]}"))
+    return findings
+
+
+def _session_columns(sessions) -> tuple:
+    """
+    :return: (device names, device index per session, local AS, neighbor IP as uint32, remote AS) of the BGP
+        sessions, taken from the columns of a generated session view or collected from the rows
+    """
+    columns = getattr(sessions, "columns", None)
+    if columns is not None:
+        return (columns["DeviceNames"], columns["Device"], columns["LocalAS"],
+                np.asarray(columns["NeighborIP"], dtype=np.uint32), columns["RemoteAS"])
+    rows = list(sessions)
+    codes = {}
+    devices = np.array([codes.setdefault(row["DeviceName"], len(codes)) for row in rows], dtype=np.int64)
+    neighbor_ips = pdg_export.ip_strings_to_ints([str(row["NeighborIP"]) for row in rows])
+    return (list(codes), devices, np.array([row["LocalAS"] for row in rows], dtype=object), neighbor_ips,
+            np.array([row["RemoteAS"] for row in rows], dtype=object))
+
+
+def _interface_name(fabric: _FabricColumns, interface):
+    return LOOPBACK_INTERFACE if interface < 0 else fabric.interface_names[interface]
+
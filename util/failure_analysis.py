@@ -0,0 +1,225 @@
+"""
+What-if analysis of spine, leaf and link failures in 2-tier rail-optimized fabrics.
+
+The leaf x leaf ECMP path counts of the healthy fabric are L @ L.T, L being the leaf x spine link count matrix
+(see util.path_analysis). A failure scenario updates them instead of rebuilding the graph: failed spines are a
+rank-k downdate (P - L[:, S] @ L[:, S].T), failed links only change the rows and columns of their leafs, and failed
+leafs are masked. Every scenario is reported per rail:
+
+    simulator = FailureSimulator(mapper)
+    simulator.evaluate(spines=["spine003"], links=[("leaf001", "spine002")])
+    results = simulator.monte_carlo(trials=5000, failed_links=16, seed=1, workers=8)
+    failure_distribution(results)
+
+Monte-Carlo trials run in fixed size chunks with their own random streams, results only depend on the seed and
+not on the number of workers.
+"""
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable
+import numpy as np
+import pandas as pd
+from util.path_analysis import FabricPaths
+
+METRICS = ("Reachability", "HostsReachable", "MinPaths", "MinPathsRatio", "CapacityRatio")
+CHUNK_TRIALS = 256      # Monte-Carlo trials per chunk (and per random stream)
+
+
+class FailureSimulator:
+    def __init__(self, mapper):
+        """
+        :param mapper: NetworkMapping of a 2-tier fabric (generated or user provided)
+        """
+        self.mapper = mapper
+        adjacency = FabricPaths(mapper).adjacency
+        if adjacency["super_spines"]:
+            raise ValueError("the failure simulator covers 2-tier fabrics, this fabric has super-spines")
+        self.leafs = adjacency["leafs"]
+        self.spines = adjacency["spines"]
+        self.rails = adjacency["rails"]
+        self._leaf_index = {name: index for index, name in enumerate(self.leafs)}
+        self._spine_index = {name: index for index, name in enumerate(self.spines)}
+
+        self.leaf_spine = adjacency["leaf_spine"]
+        self.base_paths = self.leaf_spine @ self.leaf_spine.T
+        leaf_rail = adjacency["leaf_rail"]
+        self._rail_hosts = leaf_rail.sum(axis=0)
+        leaf_hosts = leaf_rail.sum(axis=1, keepdims=True)
+        # share of a leaf's uplinks used by each of its rails
+        self._rail_share = np.divide(leaf_rail, leaf_hosts, out=np.zeros_like(leaf_rail), where=leaf_hosts > 0)
+        self._leaf_rail = leaf_rail
+        self._rail_pairs = []
+        for rail in range(len(self.rails)):
+            members = np.flatnonzero(leaf_rail[:, rail] > 0)
+            first, second = np.triu_indices(len(members), k=1)
+            self._rail_pairs.append((members[first], members[second]))
+        # every physical leaf-spine link once, the population random link failures are drawn from
+        link_leaf, link_spine = np.nonzero(self.leaf_spine)
+        counts = self.leaf_spine[link_leaf, link_spine].astype(np.int64)
+        self._link_leaf = np.repeat(link_leaf, counts)
+        self._link_spine = np.repeat(link_spine, counts)
+        self._base_capacity = self._rail_share.T @ self.leaf_spine.sum(axis=1)
+        self._alive = np.ones(len(self.leafs), dtype=bool)
+        self._base_min_paths = self._path_metrics(self.base_paths, self._alive)[1]
+
+    @property
+    def num_links(self) -> int:
+        return len(self._link_leaf)
+
+    def evaluate(self, spines: Iterable[str] = (), leafs: Iterable[str] = (), links: Iterable = ()) -> pd.DataFrame:
+        """
+        :param spines: names of the failed spines
+        :param leafs: names of the failed leafs
+        :param links: failed leaf-spine links as (leaf, spine) names, a pair listed twice fails two parallel links
+        :return: one row per rail {"Rail", *METRICS}, see _rail_metrics
+        """
+        links = list(links)
+        failed_spines = np.array([self._spine_index[name] for name in spines], dtype=np.int64)
+        failed_leafs = np.array([self._leaf_index[name] for name in leafs], dtype=np.int64)
+        link_leafs = np.array([self._leaf_index[leaf] for leaf, _ in links], dtype=np.int64)
+        link_spines = np.array([self._spine_index[spine] for _, spine in links], dtype=np.int64)
+        metrics = self._scenario(failed_spines, failed_leafs, link_leafs, link_spines)
+        return pd.DataFrame({"Rail": self.rails, **dict(zip(METRICS, metrics))})
+
+    def _scenario(self, failed_spines, failed_leafs, link_leafs, link_spines) -> tuple:
+        paths, leaf_spine = self.base_paths, self.leaf_spine
+        if failed_spines.size:
+            failed = leaf_spine[:, failed_spines]
+            paths = paths - failed @ failed.T
+            leaf_spine = leaf_spine.copy()
+            leaf_spine[:, failed_spines] = 0
+        if link_leafs.size:
+            leaf_spine = leaf_spine.copy() if leaf_spine is self.leaf_spine else leaf_spine
+            np.subtract.at(leaf_spine, (link_leafs, link_spines), 1)
+            np.maximum(leaf_spine, 0, out=leaf_spine)
+            # only the rows and columns of the leafs that lost links change
+            rows = np.unique(link_leafs)
+            updated = leaf_spine[rows] @ leaf_spine.T
+            paths = paths.copy() if paths is self.base_paths else paths
+            paths[rows, :] = updated
+            paths[:, rows] = updated.T
+        alive = self._alive
+        if failed_leafs.size:
+            alive = alive.copy()
+            alive[failed_leafs] = False
+        return self._rail_metrics(paths, leaf_spine, alive)
+
+    def _rail_metrics(self, paths, leaf_spine, alive) -> tuple:
+        """
+        :return: arrays indexed by rail:
+            Reachability, fraction of the pairs of working leafs of the rail with at least one path,
+            HostsReachable, fraction of the rail's hosts on working leafs,
+            MinPaths, smallest number of ECMP paths between working leafs of the rail,
+            MinPathsRatio, MinPaths relative to the healthy fabric,
+            CapacityRatio, leaf uplink bandwidth left for the rail relative to the healthy fabric
+        """
+        num_rails = len(self.rails)
+        reachability, min_paths = self._path_metrics(paths, alive)
+        hosts_reachable = np.divide(alive @ self._leaf_rail, self._rail_hosts,
+                                    out=np.ones(num_rails), where=self._rail_hosts > 0)
+        capacity = self._rail_share.T @ (leaf_spine.sum(axis=1) * alive)
+        capacity_ratio = np.divide(capacity, self._base_capacity, out=np.ones(num_rails),
+                                   where=self._base_capacity > 0)
+        min_paths_ratio = np.divide(min_paths, self._base_min_paths, out=np.ones(num_rails),
+                                    where=self._base_min_paths > 0)
+        return reachability, hosts_reachable, min_paths, min_paths_ratio, capacity_ratio
+
+    def _path_metrics(self, paths, alive) -> tuple:
+        """
+        :return: Reachability and MinPaths arrays indexed by rail
+        """
+        reachability = np.ones(len(self.rails))
+        min_paths = np.zeros(len(self.rails), dtype=np.int64)
+        for rail, (first, second) in enumerate(self._rail_pairs):
+            working = alive[first] & alive[second]
+            values = paths[first[working], second[working]]
+            if values.size:
+                reachability[rail] = np.count_nonzero(values > 0.5) / values.size
+                min_paths[rail] = int(round(values.min()))
+        return reachability, min_paths
+
+    def run_trials(self, seed_sequence, first_trial: int, trials: int, failed_links=0, failed_spines=0,
+                   failed_leafs=0) -> Dict:
+        """
+        Runs a chunk of random trials with its own random stream
+
+        :return: columns of the results, one row per trial and rail
+        """
+        rng = np.random.default_rng(seed_sequence)
+        columns = {metric: [] for metric in METRICS}
+        for _ in range(trials):
+            spines = rng.choice(len(self.spines), failed_spines, replace=False)
+            leafs = rng.choice(len(self.leafs), failed_leafs, replace=False)
+            links = rng.choice(self.num_links, failed_links, replace=False)
+            metrics = self._scenario(spines, leafs, self._link_leaf[links], self._link_spine[links])
+            for metric, values in zip(METRICS, metrics):
+                columns[metric].append(values)
+        num_rails = len(self.rails)
+        result = {"Trial": np.repeat(np.arange(first_trial, first_trial + trials), num_rails),
+                  "Rail": np.tile(np.arange(num_rails), trials)}
+        for metric, values in columns.items():
+            result[metric] = np.concatenate(values) if values else np.zeros(0)
+        return result
+
+    def monte_carlo(self, trials=1000, failed_links=0, failed_spines=0, failed_leafs=0, seed=0,
+                    workers=1) -> pd.DataFrame:
+        """
+        :param trials: number of random failure scenarios
+        :param failed_links: number of random leaf-spine links failed in every trial
+        :param failed_spines: number of random spines failed in every trial
+        :param failed_leafs: number of random leafs failed in every trial
+        :param seed: seed of the random streams
+        :param workers: number of processes, only generated fabrics are simulated in parallel
+        :return: one row per trial and rail {"Trial", "Rail", *METRICS}
+        """
+        if failed_links > self.num_links or failed_spines > len(self.spines) or failed_leafs > len(self.leafs):
+            raise ValueError(f"can't fail more than the {self.num_links} links, {len(self.spines)} spines and "
+                             f"{len(self.leafs)} leafs of the fabric")
+        starts = list(range(0, trials, CHUNK_TRIALS))
+        seeds = np.random.SeedSequence(seed).spawn(len(starts))
+        counts = {"failed_links": failed_links, "failed_spines": failed_spines, "failed_leafs": failed_leafs}
+        sizes = [min(CHUNK_TRIALS, trials - start) for start in starts]
+        if workers > 1 and len(starts) > 1 and not self.mapper.input_data:
+            parameters = tuple(self.mapper.parameters().items())
+            with ProcessPoolExecutor(max_workers=min(workers, len(starts))) as executor:
+                results = list(executor.map(_run_chunk, [parameters] * len(starts), seeds, starts, sizes,
+                                            [counts] * len(starts)))
+        else:
+            results = [self.run_trials(seed_sequence, start, size, **counts)
+                       for seed_sequence, start, size in zip(seeds, starts, sizes)]
+
+        frame = pd.DataFrame({column: np.concatenate([result[column] for result in results])
+                              if results else np.zeros(0) for column in ("Trial", "Rail", *METRICS)})
+        frame["Rail"] = pd.Categorical.from_codes(frame["Rail"].astype(np.int64), categories=self.rails)
+        return frame
+
+
+@functools.lru_cache(maxsize=2)
+def _worker_simulator(parameters: tuple) -> FailureSimulator:
+    from util.spectrumx_netmapper import NetworkMapping
+
+    return FailureSimulator(NetworkMapping(**dict(parameters)))
+
+
+def _run_chunk(parameters: tuple, seed_sequence, first_trial: int, trials: int, counts: Dict) -> Dict:
+    return _worker_simulator(parameters).run_trials(seed_sequence, first_trial, trials, **counts)
+
+
+def failure_distribution(results: pd.DataFrame, quantiles=(0.01, 0.05, 0.5)) -> pd.DataFrame:
+    """
+    :param results: FailureSimulator.monte_carlo results
+    :param quantiles: quantiles reported for every metric
+    :return: one row per rail and metric {"Rail", "Metric", "Mean", "Min", "P1", "P5", "P50", "Max", "Degraded"},
+        Degraded is the fraction of trials where a ratio is below 1 (the healthy fabric), NaN for MinPaths
+    """
+    rows = []
+    for rail, group in results.groupby("Rail", observed=True):
+        for metric in METRICS:
+            values = group[metric].to_numpy(dtype=np.float64)
+            row = {"Rail": rail, "Metric": metric, "Mean": values.mean(), "Min": values.min()}
+            row.update({f"P{quantile * 100:g}": value
+                        for quantile, value in zip(quantiles, np.quantile(values, quantiles))})
+            row.update({"Max": values.max(),
+                        "Degraded": np.nan if metric == "MinPaths" else float(np.mean(values < 1 - 1e-9))})
+            rows.append(row)
+    return pd.DataFrame(rows)
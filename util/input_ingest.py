@@ -0,0 +1,116 @@
+"""
+Bulk ingest of customer provided port mappings (brownfield fabrics).
+
+The LeafHostP2P and LeafSpineP2P tables are loaded as DataFrames from an Excel workbook, CSV (optionally gzip'd)
+or Parquet files, the column types and the invariants are validated column-wise in a single pass:
+
+    input_data = input_ingest.load_input_data("customer.xlsx")
+    input_data = input_ingest.load_input_data(leaf_host_p2p="leaf_host.csv", leaf_spine_p2p="leaf_spine.parquet")
+    mapper = NetworkMapping(input_data=input_data, num_spines=8)
+
+`NetworkMapping` accepts the validated DataFrames in place of the list of row dictionaries and derives every IP
+as an array.
+"""
+from pathlib import Path
+import pandas as pd
+
+SHEET_NAMES = {"leaf_host_p2p": "LeafHostP2P", "leaf_spine_p2p": "LeafSpineP2P"}
+
+LEAF_HOST_INT_COLUMNS = ("PodID", "SU", "HostID", "RailID", "LeafID")
+LEAF_HOST_STR_COLUMNS = ("Hostname", "RailPort", "LeafName", "LeafIntf")
+LEAF_SPINE_INT_COLUMNS = ("SU", "SpineID", "LeafID")
+LEAF_SPINE_STR_COLUMNS = ("SpineName", "SpineIntf", "LeafName", "LeafIntf")
+
+PORT_NAME_PATTERN = r"^swp(\d+)(?:s(\d+))?$"
+
+
+def read_table(source, sheet_name=None) -> pd.DataFrame:
+    """
+    :param source: DataFrame, or path of a .parquet, .csv, .csv.gz or .xlsx file
+    :param sheet_name: sheet of an Excel workbook
+    """
+    if isinstance(source, pd.DataFrame):
+        return source
+    path = Path(source)
+    suffixes = "".join(path.suffixes).lower()
+    if suffixes.endswith(".parquet"):
+        return pd.read_parquet(path)
+    if suffixes.endswith((".csv", ".csv.gz")):
+        return pd.read_csv(path)
+    if suffixes.endswith(".xlsx"):
+        return pd.read_excel(path, sheet_name=sheet_name)
+    raise ValueError(f"unsupported input file {path.name}, expected a .parquet, .csv, .csv.gz or .xlsx file")
+
+
+def load_input_data(workbook=None, leaf_host_p2p=None, leaf_spine_p2p=None) -> dict:
+    """
+    Loads and validates the customer port mappings,
+    either from a workbook with the LeafHostP2P and LeafSpineP2P sheets or from a table per mapping (DataFrame, CSV
+    or Parquet)
+
+    :return: {"leaf_host_p2p": DataFrame, "leaf_spine_p2p": DataFrame}, see NetworkMapping's input_data
+    """
+    if workbook is not None:
+        sheets = pd.read_excel(workbook, sheet_name=list(SHEET_NAMES.values()))
+        leaf_host_p2p = sheets[SHEET_NAMES["leaf_host_p2p"]]
+        leaf_spine_p2p = sheets[SHEET_NAMES["leaf_spine_p2p"]]
+    if leaf_host_p2p is None or leaf_spine_p2p is None:
+        raise ValueError("both the leaf_host_p2p and the leaf_spine_p2p mappings are required")
+    return {
+        "leaf_host_p2p": validate_frame(read_table(leaf_host_p2p), "leaf_host_p2p",
+                                        LEAF_HOST_INT_COLUMNS, LEAF_HOST_STR_COLUMNS),
+        "leaf_spine_p2p": validate_frame(read_table(leaf_spine_p2p), "leaf_spine_p2p",
+                                         LEAF_SPINE_INT_COLUMNS, LEAF_SPINE_STR_COLUMNS),
+    }
+
+
+def validate_frame(frame: pd.DataFrame, table_name: str, int_columns, str_columns) -> pd.DataFrame:
+    """
+    Checks the required columns, coerces ID columns to int64 and name columns to stripped strings.
+    Rows without a value in the first column end the table, the same as the Excel sheets.
+
+    :return: validated copy of the frame, raises ValueError listing every problem found
+    """
+    missing = [column for column in (*int_columns, *str_columns) if column not in frame.columns]
+    if missing:
+        raise ValueError(f"{table_name} is missing the columns {', '.join(missing)}")
+    if len(frame.columns) and frame[frame.columns[0]].isna().any():
+        frame = frame.iloc[:int(frame[frame.columns[0]].isna().to_numpy().argmax())]
+    frame = frame.reset_index(drop=True).copy()
+
+    problems = []
+    for column in int_columns:
+        values = pd.to_numeric(frame[column], errors="coerce")
+        invalid = values.isna() | (values % 1 != 0) | (values < 0)
+        if invalid.any():
+            problems.append(f"{column} must be a non-negative integer, rows {_row_numbers(invalid)}")
+        else:
+            frame[column] = values.astype("int64")
+    for column in str_columns:
+        values = frame[column]
+        invalid = values.isna()
+        if invalid.any():
+            problems.append(f"{column} is empty, rows {_row_numbers(invalid)}")
+            continue
+        frame[column] = values = values.astype(str).str.strip()
+        # spine point-to-point IPs are derived from the spine port number
+        if column == "SpineIntf":
+            codes, port_names = pd.factorize(values)
+            invalid = pd.Series(~pd.Series(port_names).str.match(PORT_NAME_PATTERN).to_numpy()[codes])
+            if invalid.any():
+                problems.append(f"{column} must be a switch port name (swp<port> or swp<port>s<breakout>), "
+                                f"rows {_row_numbers(invalid)}")
+    if len(frame) % 8 != 0:
+        problems.append(f"the number of {table_name} entries ({len(frame)}) is not divisible by 8")
+    if problems:
+        raise ValueError(f"invalid {table_name}: " + "; ".join(problems))
+    return frame
+
+
+def _row_numbers(invalid, limit=10) -> str:
+    """
+    :return: spreadsheet row numbers (header is row 1) of the first invalid rows
+    """
+    rows = (invalid.to_numpy().nonzero()[0][:limit] + 2).tolist()
+    more = int(invalid.sum()) - len(rows)
+    return ", ".join(map(str, rows)) + (f" and {more} more" if more > 0 else "")
@@ -9,6 +9,7 @@ Change Log
 
 import logging
 import openpyxl
+from io import BytesIO
 import openpyxl.utils
 import sys
 
@@ -25,10 +26,18 @@ class ReadExcel(object):
         self.excel_path = excel_path
         self.sheet_names = self._get_sheet_names()
 
+    def _load_workbook(self, **kwargs):
+        """
+        Loads the workbook, a file-like workbook (e.g. an upload) is read from its own buffer every time,
+        so sheets can be read from several threads at once
+        """
+        source = BytesIO(self.excel_path.getvalue()) if hasattr(self.excel_path, 'getvalue') else self.excel_path
+        return openpyxl.load_workbook(source, **kwargs)
+
     def _get_sheet_names(self):
         """Get list of Excel Sheet names, excluding hidden ones"""
         sheet_names = []
-        wb = openpyxl.load_workbook(self.excel_path)
+        wb = self._load_workbook()
 
         for sheet in wb.sheetnames:
             logging.debug(f"Processing Sheet : {sheet}")
@@ -40,8 +49,8 @@ class ReadExcel(object):
 
     def get_excel_column_headers(self, sheet_name):
         """Read first row of an Excel Sheet to get the column headers"""
-        wb = openpyxl.load_workbook(self.excel_path, data_only=True, read_only=True)
-        sheet = wb.get_sheet_by_name(sheet_name)
+        wb = self._load_workbook(data_only=True, read_only=True)
+        sheet = wb[sheet_name]
         try:
             headers = []
             for column in range(1, sheet.max_column + 1):
@@ -56,41 +65,29 @@ class ReadExcel(object):
         """
         This is the generator version of the function above, this was built to improve document loading time
         since we have no desire to keep these data but only to load them and push the configuration.
+        The headers are read once and the rows are streamed from a read-only workbook, every row is a single pass
+        over its cell values instead of a lookup per header.
         """
-        wb = openpyxl.load_workbook(self.excel_path, data_only=True)
-        ws = wb[sheet_name]
-        logging.info("processing sheet {}....".format(sheet_name))
-        for row in range(start_row, ws.max_row + 1):
-            try:
-                row_c1 = ws["A" + str(row)]
-                if row_c1.value is None:
+        headers = self.get_excel_column_headers(sheet_name)
+        # the value of a header is taken from its position in the header list, the first one wins for duplicates
+        columns = [(header, headers.index(header)) for header in headers]
+        wb = self._load_workbook(data_only=True, read_only=True)
+        try:
+            ws = wb[sheet_name]
+            logging.info("processing sheet {}....".format(sheet_name))
+            for values in ws.iter_rows(min_row=start_row, values_only=True):
+                if not values or values[0] is None:
                     break
-                elif row_c1:  # If A[ROW] has a value, row is a number between 2 and max row number in the sheet
-                    line = dict()
-                    headers = self.get_excel_column_headers(sheet_name)
-                    for header in headers:
-                        # Use openpyxl function to get column letter based on
-                        # Header position in the Headers List plus 1
-                        # Use Column Letter + Row Number to get cell value
-                        col = openpyxl.utils.get_column_letter(headers.index(header) + 1)
-
-                        ''' Add support for detecting hidden column once this is fixed
-                        if not ws.column_dimensions[col].hidden: # This line does not work due to bug
-                        Bug tracked here https://foss.heptapod.net/openpyxl/openpyxl/-/issues/1711
-                        '''
-
-                        cell_value = ws[col + str(row)].value
-                        if isinstance(cell_value, str):  # for python3, use : str instead of basestring
-                            # Convert value text from Unicode to ASCII
-                            cell_value = cell_value.encode('utf-8').decode('ascii', 'ignore')
-                            cell_value = cell_value.strip()  # remove white space
-                        elif isinstance(cell_value, int):
-                            cell_value = cell_value
-                        elif cell_value is None:
-                            cell_value = ''
-                        else:
-                            logging.info("no value found in cell: ", ws[col + str(row)].coordinate)
-                        line[header] = cell_value
-                    yield line
-            except IndexError:
-                break
+                line = dict()
+                for header, position in columns:
+                    cell_value = values[position] if position < len(values) else None
+                    if isinstance(cell_value, str):  # for python3, use : str instead of basestring
+                        # Convert value text from Unicode to ASCII
+                        cell_value = cell_value.encode('utf-8').decode('ascii', 'ignore')
+                        cell_value = cell_value.strip()  # remove white space
+                    elif cell_value is None:
+                        cell_value = ''
+                    line[header] = cell_value
+                yield line
+        finally:
+            wb.close()
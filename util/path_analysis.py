@@ -0,0 +1,245 @@
+"""
+Path analysis of a fabric: ECMP width, oversubscription and bisection bandwidth.
+
+The links of the fabric inventory are folded into adjacency matrices (leaf x spine and spine x super-spine link
+counts, leaf x rail host link counts), every metric is a matrix product or a reduction over them, so all leaf pairs
+and rails are analysed in bulk:
+
+    paths = FabricPaths(mapper, link_gbps=400)
+    paths.leaf_pairs()          # ECMP paths and next-hops for every leaf pair
+    paths.oversubscription()    # downlink vs uplink bandwidth of every switch
+    paths.rail_bisection()      # bisection bandwidth and ECMP width per rail
+    paths.summary()
+
+Parallel links count as separate equal-cost paths, every link is assumed to run at `link_gbps`.
+Tables are DataFrames, device names are categoricals.
+"""
+from typing import Dict
+import numpy as np
+import pandas as pd
+from util.artifact_graph import artifact
+
+ROLES = ("host", "leaf", "spine", "super-spine")
+
+
+class FabricPaths:
+    def __init__(self, mapper, link_gbps: float = 400):
+        """
+        :param mapper: NetworkMapping of a generated fabric or of user provided mappings
+        :param link_gbps: bandwidth of every link (host rails and switch to switch links)
+        """
+        self.mapper = mapper
+        self.link_gbps = link_gbps
+
+    @artifact()
+    def adjacency(self) -> Dict:
+        """
+        :return: {"leafs", "spines", "super_spines", "rails": names,
+                  "leaf_spine", "spine_super_spine", "leaf_rail": link count matrices (float64)}
+        """
+        inventory = self.mapper.inventory
+        devices, interfaces, _ = inventory.link_columns()
+        columns = inventory.device_columns()
+        interface_names = inventory.interface_names()
+
+        role_codes = np.array([ROLES.index(role) for role in columns["Role"]], dtype=np.int8)
+        # position of every device among the devices of its role, in inventory order
+        position = np.zeros(len(role_codes), dtype=np.int64)
+        names = {}
+        for code, role in enumerate(ROLES):
+            members = np.flatnonzero(role_codes == code)
+            position[members] = np.arange(len(members))
+            names[role] = [columns["DeviceName"][index] for index in members.tolist()]
+
+        end_roles = role_codes[devices]
+        # orient every link lower tier end first
+        swap = end_roles[:, 0] > end_roles[:, 1]
+        lower = np.where(swap, devices[:, 1], devices[:, 0])
+        upper = np.where(swap, devices[:, 0], devices[:, 1])
+        lower_interface = np.where(swap, interfaces[:, 1], interfaces[:, 0])
+        lower_role, upper_role = role_codes[lower], role_codes[upper]
+
+        def link_counts(lower_code, upper_code):
+            mask = (lower_role == lower_code) & (upper_role == upper_code)
+            matrix = np.zeros((len(names[ROLES[lower_code]]), len(names[ROLES[upper_code]])))
+            np.add.at(matrix, (position[lower[mask]], position[upper[mask]]), 1)
+            return matrix
+
+        # rails are the host interfaces, a leaf serves the rails its hosts are cabled with
+        host_links = (lower_role == 0) & (upper_role == 1)
+        rail_codes, rails = np.unique(lower_interface[host_links], return_inverse=True)
+        leaf_rail = np.zeros((len(names["leaf"]), len(rail_codes)))
+        np.add.at(leaf_rail, (position[upper[host_links]], rails), 1)
+
+        return {
+            "leafs": names["leaf"],
+            "spines": names["spine"],
+            "super_spines": names["super-spine"],
+            "rails": [interface_names[code] for code in rail_codes.tolist()],
+            "leaf_spine": link_counts(1, 2),
+            "spine_super_spine": link_counts(2, 3),
+            "leaf_rail": leaf_rail,
+        }
+
+    @artifact('adjacency')
+    def path_counts(self) -> Dict:
+        """
+        :return: {"hops", "paths", "next_hops"} leaf x leaf matrices of the shortest paths between leafs:
+            number of links on the path (2 through a spine, 4 through a super-spine, 0 when unreachable),
+            number of equal-cost paths and number of uplinks of the source leaf the paths are spread over
+        """
+        leaf_spine = self.adjacency["leaf_spine"]
+        spine_super_spine = self.adjacency["spine_super_spine"]
+
+        # leaf -> spine -> leaf
+        paths = leaf_spine @ leaf_spine.T
+        next_hops = leaf_spine @ (leaf_spine > 0).T
+        hops = np.where(paths > 0, 2, 0)
+        if spine_super_spine.size:
+            # leaf -> spine -> super-spine -> spine -> leaf, only where there's no path through a single spine.
+            # Those leafs don't share a spine, so the two spines of a counted path are always different
+            leaf_super_spine = leaf_spine @ spine_super_spine
+            spine_leaf = spine_super_spine @ leaf_super_spine.T
+            longer = hops == 0
+            paths = np.where(longer, leaf_super_spine @ leaf_super_spine.T, paths)
+            next_hops = np.where(longer, leaf_spine @ (spine_leaf > 0), next_hops)
+            hops = np.where(longer & (paths > 0), 4, hops)
+        np.fill_diagonal(hops, 0)
+        np.fill_diagonal(paths, 0)
+        np.fill_diagonal(next_hops, 0)
+        # the matrix products run in float64 (BLAS), link counts are small integers and stay exact
+        return {"hops": hops, "paths": np.rint(paths).astype(np.int64),
+                "next_hops": np.rint(next_hops).astype(np.int64)}
+
+    def leaf_pairs(self) -> pd.DataFrame:
+        """
+        :return: one row per pair of leafs {"LeafA", "LeafB", "SharedRails", "Hops", "Paths", "NextHops"},
+            SharedRails is the number of rails both leafs serve
+        """
+        leafs = self.adjacency["leafs"]
+        first, second = np.triu_indices(len(leafs), k=1)
+        serves = (self.adjacency["leaf_rail"] > 0).astype(np.float64)
+        shared_rails = np.rint(serves @ serves.T).astype(np.int64)
+        counts = self.path_counts
+        return pd.DataFrame({
+            "LeafA": pd.Categorical.from_codes(first, categories=leafs),
+            "LeafB": pd.Categorical.from_codes(second, categories=leafs),
+            "SharedRails": shared_rails[first, second],
+            "Hops": counts["hops"][first, second],
+            "Paths": counts["paths"][first, second],
+            "NextHops": counts["next_hops"][first, second],
+        })
+
+    def oversubscription(self) -> pd.DataFrame:
+        """
+        :return: one row per switch {"Device", "Role", "Downlinks", "Uplinks", "DownlinkGbps", "UplinkGbps",
+            "Oversubscription"}, Oversubscription is downlink / uplink bandwidth, NaN for the top tier
+        """
+        adjacency = self.adjacency
+        leaf_spine, spine_super_spine = adjacency["leaf_spine"], adjacency["spine_super_spine"]
+        tiers = [
+            ("leaf", adjacency["leafs"], adjacency["leaf_rail"].sum(axis=1), leaf_spine.sum(axis=1)),
+            ("spine", adjacency["spines"], leaf_spine.sum(axis=0), spine_super_spine.sum(axis=1)),
+            ("super-spine", adjacency["super_spines"], spine_super_spine.sum(axis=0),
+             np.zeros(len(adjacency["super_spines"]))),
+        ]
+        downlinks = np.concatenate([tier[2] for tier in tiers]).astype(np.int64)
+        uplinks = np.concatenate([tier[3] for tier in tiers]).astype(np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(uplinks > 0, downlinks / uplinks, np.nan)
+        return pd.DataFrame({
+            "Device": [name for tier in tiers for name in tier[1]],
+            "Role": pd.Categorical([tier[0] for tier in tiers for _ in tier[1]],
+                                   categories=[tier[0] for tier in tiers]),
+            "Downlinks": downlinks,
+            "Uplinks": uplinks,
+            "DownlinkGbps": downlinks * self.link_gbps,
+            "UplinkGbps": uplinks * self.link_gbps,
+            "Oversubscription": ratio,
+        })
+
+    def rail_bisection(self) -> pd.DataFrame:
+        """
+        Bisection bandwidth of every rail: half of the rail's hosts send to the other half, the traffic crosses the
+        leaf uplinks and, in a 3-tier fabric, the spine uplinks. The uplinks are shared by the rails in proportion
+        to their hosts: a leaf's uplinks by the rails cabled to it, the spine uplinks by every rail of the fabric.
+
+        :return: one row per rail {"Rail", "Leafs", "HostLinks", "HostGbps", "LeafUplinkGbps", "SpineUplinkGbps",
+            "BisectionGbps", "BisectionRatio", "MinPaths", "MaxPaths"}, BisectionRatio is 1 for full bisection,
+            MinPaths/MaxPaths are the ECMP paths between the rail's leafs
+        """
+        adjacency = self.adjacency
+        leaf_rail = adjacency["leaf_rail"]
+        host_links = leaf_rail.sum(axis=0)
+        leaf_hosts = leaf_rail.sum(axis=1, keepdims=True)
+        leaf_share = np.divide(leaf_rail, leaf_hosts, out=np.zeros_like(leaf_rail), where=leaf_hosts > 0)
+        leaf_uplinks = (leaf_share * adjacency["leaf_spine"].sum(axis=1)[:, None]).sum(axis=0)
+        leaf_counts = (leaf_rail > 0).sum(axis=0)
+        # a rail on a single leaf never leaves it
+        leaf_uplink_gbps = np.where(leaf_counts > 1, leaf_uplinks * self.link_gbps, np.nan)
+        spine_uplink_gbps = np.full(len(host_links), np.nan)
+        if adjacency["spine_super_spine"].size:
+            spine_uplinks = adjacency["spine_super_spine"].sum()
+            spine_uplink_gbps = np.where(leaf_counts > 1, spine_uplinks * host_links / host_links.sum(), np.nan)
+            spine_uplink_gbps = spine_uplink_gbps * self.link_gbps
+        host_gbps = host_links * self.link_gbps
+        bisection_gbps = np.fmin(np.fmin(host_gbps, leaf_uplink_gbps), spine_uplink_gbps) / 2
+
+        paths = self.path_counts["paths"]
+        min_paths, max_paths = [], []
+        for rail in range(len(host_links)):
+            members = np.flatnonzero(leaf_rail[:, rail] > 0)
+            pair_paths = paths[np.ix_(members, members)][np.triu_indices(len(members), k=1)]
+            min_paths.append(int(pair_paths.min()) if pair_paths.size else None)
+            max_paths.append(int(pair_paths.max()) if pair_paths.size else None)
+
+        return pd.DataFrame({
+            "Rail": adjacency["rails"],
+            "Leafs": leaf_counts,
+            "HostLinks": host_links.astype(np.int64),
+            "HostGbps": host_gbps,
+            "LeafUplinkGbps": leaf_uplink_gbps,
+            "SpineUplinkGbps": spine_uplink_gbps,
+            "BisectionGbps": bisection_gbps,
+            "BisectionRatio": np.divide(bisection_gbps, host_gbps / 2, out=np.zeros_like(host_gbps),
+                                        where=host_gbps > 0),
+            "MinPaths": pd.array(min_paths, dtype="Int64"),
+            "MaxPaths": pd.array(max_paths, dtype="Int64"),
+        })
+
+    def summary(self) -> Dict:
+        """
+        :return: fabric wide figures, the bisection bandwidth is the sum of the rails' bisection bandwidth and
+            unreachable leaf pairs only count leafs that share a rail
+        """
+        adjacency = self.adjacency
+        counts = self.path_counts
+        upper = np.triu_indices(len(adjacency["leafs"]), k=1)
+        paths, next_hops = counts["paths"][upper], counts["next_hops"][upper]
+        reachable = paths > 0
+        serves = (adjacency["leaf_rail"] > 0).astype(np.float64)
+        shared_rails = (serves @ serves.T)[upper] > 0
+        by_role = self.oversubscription().groupby("Role", observed=False)["Oversubscription"].max()
+        rails = self.rail_bisection()
+        host_gbps = float(rails["HostGbps"].sum())
+        bisection_gbps = float(rails["BisectionGbps"].sum())
+        return {
+            "Leafs": len(adjacency["leafs"]),
+            "Spines": len(adjacency["spines"]),
+            "SuperSpines": len(adjacency["super_spines"]),
+            "Rails": len(adjacency["rails"]),
+            "LeafPairs": int(paths.size),
+            "UnreachableLeafPairs": int((shared_rails & ~reachable).sum()),
+            "MinPaths": int(paths[reachable].min()) if reachable.any() else None,
+            "MaxPaths": int(paths[reachable].max()) if reachable.any() else None,
+            "MinNextHops": int(next_hops[reachable].min()) if reachable.any() else None,
+            "MaxLeafOversubscription": _maybe_float(by_role.get("leaf")),
+            "MaxSpineOversubscription": _maybe_float(by_role.get("spine")),
+            "HostGbps": host_gbps,
+            "BisectionGbps": bisection_gbps,
+            "BisectionRatio": bisection_gbps / (host_gbps / 2) if host_gbps else None,
+        }
+
+
+def _maybe_float(value):
+    return None if value is None or np.isnan(value) else float(value)
@@ -0,0 +1,92 @@
+"""
+Columnar export of the PDG data sets for machine consumers (IPAM import, cabling systems...etc.).
+
+Every data set is written to its own file with typed columns, IP columns are kept as dotted-quad strings
+and get an integer companion column, e.g. "HostIntfIP" (string) and "HostIntfIPInt" (uint32).
+Parquet and Arrow (feather) files need pyarrow, gzip'd CSV only needs pandas.
+"""
+import numpy as np
+import pandas as pd
+
+FILE_FORMATS = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+    "csv.gz": ".csv.gz",
+}
+
+IP_COLUMNS = ("HostIntfIP", "LeafIntfIP", "SpineIntfIP", "SuperSpineIntfIP", "InterfaceIP", "NeighborIP",
+              "LoopbackIP", "RouterID")
+
+# columns that repeat a handful of distinct values are stored as categoricals (dictionary encoded)
+CATEGORY_COLUMNS = ("Role", "VRF", "Mask", "HostIntf")
+
+
+def dataset_file_name(dataset_name: str, file_format: str) -> str:
+    """
+    :return: file name for a data set, e.g. "Host Port Mapping" -> host_port_mapping.parquet
+    """
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"unsupported format {file_format}, choose one of {', '.join(FILE_FORMATS)}")
+    return dataset_name.lower().replace("-", "_").replace(" ", "_") + FILE_FORMATS[file_format]
+
+
+def ip_strings_to_ints(ips) -> np.ndarray:
+    """
+    Converts dotted-quad strings to a uint32 array
+    """
+    octets = pd.Series(ips, dtype=object).str.split(".", expand=True)
+    if octets.empty:
+        return np.zeros(0, dtype=np.uint32)
+    octets = octets.astype(np.uint32).to_numpy()
+    return (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
+
+
+def typed_frame(records) -> pd.DataFrame:
+    """
+    Builds a DataFrame with typed columns from a list of dictionaries (or a RecordView)
+
+    :return: DataFrame where IP columns are strings with an additional "<column>Int" uint32 column
+    """
+    frame = pd.DataFrame(records)
+    columns = {}
+    for column in frame.columns:
+        values = frame[column]
+        if column in IP_COLUMNS:
+            values = values.astype(str)   # IPv4Address objects -> dotted-quad strings
+            columns[column] = values.astype("string")
+            columns[f"{column}Int"] = pd.Series(ip_strings_to_ints(values), index=frame.index)
+        elif column in CATEGORY_COLUMNS:
+            columns[column] = values.astype("category")
+        elif values.dtype == object:
+            columns[column] = values.astype("string")
+        else:
+            columns[column] = values
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def concat_frames(frames) -> pd.DataFrame:
+    """
+    Concatenates typed frames built from consecutive chunks of a data set,
+    the result is the same as `typed_frame` of the whole data set
+    """
+    frame = pd.concat(frames, ignore_index=True)
+    for column in frame.columns:
+        if column in CATEGORY_COLUMNS:
+            # chunks with different categories are concatenated as plain objects
+            frame[column] = frame[column].astype("category")
+        elif isinstance(frame[column].dtype, pd.StringDtype):
+            # concatenated arrow backed strings stay chunked, which changes the record batches / pages written
+            frame[column] = pd.Series(frame[column].to_numpy(dtype=object), dtype=frame[column].dtype)
+    return frame
+
+
+def write_frame(frame: pd.DataFrame, path, file_format: str):
+    if file_format == "parquet":
+        frame.to_parquet(path, index=False)
+    elif file_format == "arrow":
+        frame.reset_index(drop=True).to_feather(path)
+    elif file_format == "csv.gz":
+        # no timestamp in the gzip header, the same data always gives the same file
+        frame.to_csv(path, index=False, compression={"method": "gzip", "mtime": 0})
+    else:
+        raise ValueError(f"unsupported format {file_format}, choose one of {', '.join(FILE_FORMATS)}")
@@ -0,0 +1,137 @@
+"""
+Dependency-driven task scheduler.
+
+A pipeline is a DAG of named tasks, a task starts as soon as all of its dependencies finished, the independent tasks
+run concurrently in a thread pool:
+
+    pipeline = Pipeline(workers=4)
+    pipeline.add("sheet:NTP", process_ntp)
+    pipeline.add("sheet:VLAN", process_vlan)
+    pipeline.add("merge:leaf01", write_leaf01, "sheet:NTP", "sheet:VLAN")
+    pipeline.add("merge:leaf02", write_leaf02, "sheet:NTP", "sheet:VLAN")
+    pipeline.add("diff:leaf01-leaf02", compare, "merge:leaf01", "merge:leaf02")
+    results = pipeline.run()
+
+Tasks are added after their dependencies, so the graph can't have cycles. After a run, `timings` reports when every
+task started and how long it took, and `critical_path` the chain of dependent tasks that determined the total time.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List
+
+
+class Task:
+    __slots__ = ("name", "func", "dependencies", "start", "end", "result")
+
+    def __init__(self, name, func, dependencies):
+        self.name = name
+        self.func = func
+        self.dependencies = dependencies
+        self.start = None
+        self.end = None
+        self.result = None
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start if self.end is not None else 0.0
+
+
+class Pipeline:
+    def __init__(self, workers=1, initializer: Callable = None):
+        """
+        :param workers: number of tasks running at the same time
+        :param initializer: called once in every worker thread before its first task
+        """
+        self.workers = workers
+        self.initializer = initializer
+        self.tasks: Dict[str, Task] = {}
+        self.seconds = 0.0
+        self._started = None
+
+    def add(self, name, func: Callable, *dependencies) -> str:
+        """
+        Adds a task, it's called without arguments once every dependency finished
+
+        :param dependencies: names of tasks that were already added
+        :return: name of the task
+        """
+        if name in self.tasks:
+            raise ValueError(f"Task '{name}' is already in the pipeline")
+        unknown = [dependency for dependency in dependencies if dependency not in self.tasks]
+        if unknown:
+            raise ValueError(f"Task '{name}' depends on unknown tasks: {', '.join(unknown)}")
+        self.tasks[name] = Task(name, func, tuple(dict.fromkeys(dependencies)))
+        return name
+
+    def run(self) -> Dict[str, object]:
+        """
+        Runs every task, independent tasks concurrently.
+        When a task fails, the tasks depending on it are not started, the running ones finish and the error is raised.
+
+        :return: result of every task
+        """
+        waiting = {name: set(task.dependencies) for name, task in self.tasks.items()}
+        dependents = {name: [] for name in self.tasks}
+        for name, task in self.tasks.items():
+            for dependency in task.dependencies:
+                dependents[dependency].append(name)
+        ready = [name for name, dependencies in waiting.items() if not dependencies]
+        running = {}
+        error = None
+
+        self._started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), initializer=self.initializer) as executor:
+            while running or (ready and error is None):
+                while ready and error is None:
+                    name = ready.pop(0)
+                    running[executor.submit(self._run_task, self.tasks[name])] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        future.result()
+                    except BaseException as exc:    # e.g. SystemExit of a sheet with an unknown device
+                        error = error or exc
+                        continue
+                    for dependent in dependents[name]:
+                        waiting[dependent].discard(name)
+                        if not waiting[dependent]:
+                            ready.append(dependent)
+        self.seconds = time.perf_counter() - self._started
+        if error is not None:
+            raise error
+        return {name: task.result for name, task in self.tasks.items()}
+
+    def _run_task(self, task: Task):
+        task.start = time.perf_counter() - self._started
+        try:
+            task.result = task.func()
+        finally:
+            task.end = time.perf_counter() - self._started
+
+    def timings(self) -> List[Dict]:
+        """
+        :return: one row per task {"Task", "Start", "Seconds", "Dependencies"}, in start order
+        """
+        return [{
+            "Task": task.name,
+            "Start": round(task.start, 3),
+            "Seconds": round(task.seconds, 3),
+            "Dependencies": len(task.dependencies),
+        } for task in sorted((task for task in self.tasks.values() if task.start is not None),
+                             key=lambda task: task.start)]
+
+    def critical_path(self) -> List[str]:
+        """
+        :return: names of the chain of dependent tasks with the longest total duration, from the first task to the last
+        """
+        longest = {}    # task name -> (duration of the longest chain ending with the task, previous task)
+        for name, task in self.tasks.items():    # tasks are added after their dependencies
+            previous = max(task.dependencies, key=lambda dependency: longest[dependency][0], default=None)
+            longest[name] = (task.seconds + (longest[previous][0] if previous else 0.0), previous)
+        name = max(longest, key=lambda name: longest[name][0], default=None)
+        path = []
+        while name is not None:
+            path.append(name)
+            name = longest[name][1]
+        return path[::-1]
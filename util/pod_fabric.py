@@ -0,0 +1,175 @@
+"""
+Per-pod generation of 3-tier fabrics.
+
+A pod (16 SUs, 64 leafs and their 64 spines) only depends on its ID and on how many hosts it holds, the pods of a
+fabric are generated independently and joined by the pod interconnect, the spine to super-spine links
+(see NetworkMapping.pods and NetworkMapping.spine_super_spine_links). `PodMapping` is the NetworkMapping of a single
+pod, every PDG output works on it and only covers the pod:
+
+    fabric = NetworkMapping(num_hosts=4096, file_dir="nvidia")
+    PodMapping(fabric, pod_id=3, file_dir="nvidia/pod003").create_excel()
+    write_pods(fabric, "nvidia/pods", workers=8, cache=ArtifactCache("pod_cache"))
+
+`write_pods` writes every pod in its own worker process. With a cache, a pod that's unchanged is copied from the
+cache instead, adding a pod to a fabric only generates the new pod (and the previous last pod when it was
+partially populated), unless the super-spine plane size changes with it.
+"""
+import functools
+import io
+import json
+import shutil
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+from util import fabric_engine
+from util.artifact_graph import artifact
+from util.spectrumx_netmapper import NetworkMapping
+
+POD_DIR = "pod{pod_id:03d}"
+POD_SUMMARY = "pod.json"
+
+
+class PodMapping(NetworkMapping):
+    def __init__(self, fabric: NetworkMapping, pod_id: int, file_dir: str = None):
+        """
+        :param fabric: generated 3-tier fabric the pod belongs to
+        :param pod_id: ID of the pod
+        :param file_dir: directory for the pod outputs
+        """
+        if fabric.input_data or fabric.num_tiers != 3:
+            raise ValueError("pods are only generated for 3-tier fabrics")
+        super().__init__(**(fabric.parameters() | {"file_dir": file_dir}))
+        if not 0 <= pod_id < self.num_pods:
+            raise ValueError(f"pod_id ({pod_id}) must be between 0 and {self.num_pods - 1}")
+        self.fabric = fabric
+        self.pod_id = pod_id
+
+    def pod_parameters(self) -> Dict:
+        """
+        :return: every parameter the pod outputs depend on, the number of hosts is the pod's own
+        """
+        return self.parameters() | {
+            "num_hosts": len(self.host_links) // fabric_engine.RAILS_PER_HOST,
+            "pod_id": self.pod_id,
+            "super_spines_per_plane": fabric_engine.num_super_spines_per_plane(self.num_pods),
+        }
+
+    # --- the links of the pod, taken from the fabric ---
+
+    @artifact()
+    def host_links(self):
+        return self.fabric.pods[self.pod_id][0]
+
+    @artifact()
+    def leaf_spine_links(self):
+        return self.fabric.pods[self.pod_id][1]
+
+    @artifact()
+    def spine_super_spine_links(self):
+        """
+        The uplinks of the pod's spines, rows of the interconnect are ordered by pod
+        """
+        rows_per_pod = fabric_engine.SPINES_PER_POD * fabric_engine.LEAF_UPLINKS
+        return fabric_engine.table_rows(self.fabric.spine_super_spine_links,
+                                        slice(self.pod_id * rows_per_pod, (self.pod_id + 1) * rows_per_pod))
+
+    @artifact('host_links', 'leaf_spine_links', 'spine_super_spine_links')
+    def pod_devices(self) -> set:
+        """
+        Names of the devices with links in the pod, the super-spines are listed with the pod's uplinks only
+        """
+        return self._linked_device_names()
+
+    @artifact('inventory', 'pod_devices')
+    def bgp_global_data(self):
+        return [entry for entry in self.inventory.bgp_global() if entry['DeviceName'] in self.pod_devices]
+
+    def _listed_devices(self, role=None) -> List[Dict]:
+        return [device for device in self.inventory.devices(role) if device['DeviceName'] in self.pod_devices]
+
+
+def write_pod(pod: PodMapping, file_format="excel") -> Dict:
+    """
+    Writes the PDG data, the DOT graph and the summary (pod.json) of a pod to its file_dir
+
+    :param file_format: "excel" or one of the util.pdg_export formats
+    :return: summary {"Pod", "Hosts", "Devices", "Links", "Cached", "Seconds"}
+    """
+    start = time.perf_counter()
+    Path(pod.file_dir).mkdir(parents=True, exist_ok=True)
+    if file_format == "excel":
+        pod.create_excel()
+    else:
+        pod.export_data(file_format=file_format)
+    pod.write_dot_graph(Path(pod.file_dir) / "topology.dot")
+    summary = {
+        "Pod": pod.pod_id,
+        "Hosts": len(pod.host_links) // fabric_engine.RAILS_PER_HOST,
+        "Devices": len(pod.devices),
+        "Links": len(pod.host_links) + len(pod.leaf_spine_links) + len(pod.spine_super_spine_links),
+        "Cached": False,
+        "Seconds": round(time.perf_counter() - start, 3),
+    }
+    pod.create_file(Path(pod.file_dir) / POD_SUMMARY, json.dumps(summary, indent=2))
+    return summary
+
+
+def write_pods(fabric: NetworkMapping, output_dir, workers=1, file_format="excel", cache=None) -> List[Dict]:
+    """
+    Writes every pod of a 3-tier fabric to <output_dir>/pod<ID>/, one pod per task
+
+    :param workers: number of worker processes, each one regenerates the fabric from its parameters
+    :param cache: optional util.artifact_cache.ArtifactCache, pods are looked up by their pod_parameters
+    :return: one summary per pod, see write_pod
+    """
+    pods = [PodMapping(fabric, pod_id, file_dir=str(Path(output_dir) / POD_DIR.format(pod_id=pod_id)))
+            for pod_id in range(fabric.num_pods)]
+    summaries = {}
+    keys = {}
+    for pod in pods:
+        if cache is None:
+            continue
+        keys[pod.pod_id] = cache.key(pod.pod_parameters() | {"format": file_format})
+        start = time.perf_counter()
+        if cache.get(keys[pod.pod_id]) is not None:
+            shutil.copytree(cache.artifacts(keys[pod.pod_id]), pod.file_dir, dirs_exist_ok=True)
+            summary = json.loads((Path(pod.file_dir) / POD_SUMMARY).read_text())
+            summaries[pod.pod_id] = summary | {"Cached": True, "Seconds": round(time.perf_counter() - start, 3)}
+    pending = [pod for pod in pods if pod.pod_id not in summaries]
+
+    if workers > 1 and len(pending) > 1:
+        parameters = tuple(sorted(fabric.parameters().items()))
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            results = list(executor.map(_write_pod, [parameters] * len(pending), [pod.pod_id for pod in pending],
+                                        [pod.file_dir for pod in pending], [file_format] * len(pending)))
+    else:
+        results = [write_pod(pod, file_format) for pod in pending]
+
+    for pod, summary in zip(pending, results):
+        summaries[pod.pod_id] = summary
+        if cache is not None:
+            cache.put(keys[pod.pod_id], pod.file_dir, _zip_dir(pod.file_dir))
+    return [summaries[pod_id] for pod_id in range(fabric.num_pods)]
+
+
+def _zip_dir(directory) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for path in sorted(Path(directory).rglob("*")):
+            if path.is_file():
+                zip_file.write(path, path.relative_to(directory))
+    return buffer.getvalue()
+
+
+@functools.lru_cache(maxsize=2)
+def _worker_fabric(parameters: tuple) -> NetworkMapping:
+    return NetworkMapping(**dict(parameters))
+
+
+def _write_pod(parameters: tuple, pod_id: int, file_dir: str, file_format: str) -> Dict:
+    """
+    Process pool task of `write_pods`, the fabric is cached per process so the interconnect is only built once
+    """
+    return write_pod(PodMapping(_worker_fabric(parameters), pod_id, file_dir=file_dir), file_format)
@@ -1,12 +1,22 @@
+import functools
 import ipaddress
+import json
+import numpy as np
 import pandas as pd
 import math
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence
 from data_handler import payload_handler
+from util import addressing, dot_writer, fabric_engine, input_ingest, pdg_export
+from util.artifact_graph import artifact
+from util.excel_writer import StreamingExcelWriter
+from util.fabric_inventory import FabricInventory
 
 # TODO - update interface naming for hosts and add configurations to host interfaces
 # TODO - add support to start from non-zero
 
+DOT_STRING_MAX_EDGES = 20000    # dot_graph only builds the DOT graph as a string up to this many edges
+GENERATION_MANIFEST = "generation.json"
+
 
 class NetworkMapping:
     def __init__(self,
@@ -17,9 +27,11 @@ class NetworkMapping:
                  host_prefix: str = "dgx",
                  leaf_prefix: str = "leaf",
                  spine_prefix: str = "spine",
+                 super_spine_prefix: str = "superspine",
                  host_p2p_lead_octet: int = 172,
                  spine_base_as: int = 65200,
                  leaf_base_as: int = 65000,
+                 super_spine_base_as: int = 65100,
                  p2pmask: str = "/31",
                  breakout: int = 2,
                  num_spines: int = 0,
@@ -28,14 +40,19 @@ class NetworkMapping:
         """
         :param num_hosts: number of hosts (DGX nodes)
         :param input_data: customized input data. User would provide a spreadsheet that's converted to dictionary
+            {"leaf_host_p2p": rows, "leaf_spine_p2p": rows}, rows are lists of dictionaries or DataFrames,
+            see util.input_ingest.load_input_data for the bulk ingest of large mappings
         :param start_id: starting ID assignment, this applies to all hosts, leafs and spines
         :param digit_filler: number of digits for leaf/spine/host IDs, we'll autofill up to the specified count
         :param host_prefix: prefix for the host name
         :param leaf_prefix: prefix for the leaf name
         :param spine_prefix: prefix for the spine name
+        :param super_spine_prefix: prefix for the super-spine name, only used for 3-tier fabrics (> 1024 hosts)
         :param host_p2p_lead_octet: the first octet to be used for the IP for host point-to-point routed connection
         :param spine_base_as: base AS number for spines for BGP peering
         :param leaf_base_as: base AS number for leafs for BGP peering
+            for 3-tier fabrics leafs use 4-byte ASNs `leaf_base_as.leaf_id` in asdot notation
+        :param super_spine_base_as: AS number shared by all super-spines, only used for 3-tier fabrics
         :param p2pmask: subnet mask for point-to-point connection, default is /31 and unchangeable
         :param breakout: number of breakout ports, default is 2 and only supported is 2
         :param num_spines: this field is only used when user_input data is provided
@@ -50,24 +67,30 @@ class NetworkMapping:
         self.host_prefix = host_prefix
         self.leaf_prefix = leaf_prefix
         self.spine_prefix = spine_prefix
-        self.leaf_spine_mapping_data = []
+        self.super_spine_prefix = super_spine_prefix
         self.host_p2p_lead_octet = host_p2p_lead_octet
-        self.bgp_global_data = []
         self.spine_base_as = spine_base_as
         self.leaf_base_as = leaf_base_as
-        self.leaf_spine_dot_data = []
+        self.super_spine_base_as = super_spine_base_as
         self.p2pmask = p2pmask
         self.breakout = breakout
         self.nvidia_air = nvidia_air
         if self.nvidia_air:
             self.breakout = 1
         self.num_hosts = num_hosts
+        self.num_tiers = 1
         self.num_sus = 1
         self.num_leafs = 4
         self.num_spines = num_spines
+        self.num_pods = 1
+        self.num_super_spines = 0
         self.file_dir = file_dir
 
+        # only the fabric dimensions are calculated here, every data set is an artifact that's computed on first access
         if self.input_data:
+            if isinstance(input_data['leaf_host_p2p'], pd.DataFrame):
+                self.input_data = input_data = input_ingest.load_input_data(
+                    leaf_host_p2p=input_data['leaf_host_p2p'], leaf_spine_p2p=input_data['leaf_spine_p2p'])
             self.leaf_host_p2p_data = input_data['leaf_host_p2p']
             self.leaf_spine_p2p_data = input_data['leaf_spine_p2p']
             self.num_gpus = len(self.leaf_host_p2p_data)
@@ -84,62 +107,210 @@ class NetworkMapping:
             # best practice is that even if you aren't using the spines, you should still purchase them for expansion,
             # you don't have to re-adjust cables later on
             if self.num_spines > 0:
-                self.leaf_spine_mapping_data = self._create_leaf_spine_mapping_data()
-                self.leaf_spine_dot_data = self._create_leaf_spine_dot_data()
-                self.leaf_spine_interface_data = self._create_leaf_spine_interface_data()
-                self.bgp_global_data = self._create_bgp_global_data()
-                self.bgp_session_data = self._create_bgp_session_data()
+                self.num_tiers = 2
 
         elif num_hosts:
             if self.num_hosts > 1024:  # 3-tier
-                pass
-            if self.num_hosts > 32:  # 2-tier
+                # a pod is a 2-tier fabric of up to 16 SUs, spines use half of their ports towards the super-spines
+                self.num_tiers = 3
+                self.num_sus = math.ceil(self.num_hosts / 32)
+                self.num_leafs = self.num_sus * 4
+                self.num_pods = math.ceil(self.num_sus / fabric_engine.SUS_PER_POD)
+                self.num_spines = self.num_pods * fabric_engine.SPINES_PER_POD
+                self.num_super_spines = (fabric_engine.SPINES_PER_POD *
+                                         fabric_engine.num_super_spines_per_plane(self.num_pods))
+            elif self.num_hosts > 32:  # 2-tier
+                self.num_tiers = 2
                 self.num_sus = math.ceil(self.num_hosts / 32) if num_hosts else 0
                 self.num_spines = self._calculate_num_spines()
                 self.num_leafs = int(self.num_hosts / 8)
-                self.leaf_spine_mapping_data = self._create_leaf_spine_mapping_data()
-                self.leaf_spine_dot_data = self._create_leaf_spine_dot_data()
-                self.leaf_spine_interface_data = self._create_leaf_spine_interface_data()
-                self.bgp_global_data = self._create_bgp_global_data()
-                self.bgp_session_data = self._create_bgp_session_data()
 
-        self.leaf_host_mapping_data = self._create_leaf_host_mapping_data()
-        self.host_dot_data = self._create_leaf_host_dot_data()
-        self.devices = self._get_devices()
-        self.leafs = self._get_leafs()
-        self.spines = self._get_spines()
+    def parameters(self) -> Dict:
+        """
+        :return: keyword arguments that regenerate this fabric, only available for generated fabrics
+        """
+        if self.input_data:
+            raise ValueError("parameters are only available for generated fabrics, not for user provided mappings")
+        return {
+            "num_hosts": int(self.num_hosts),
+            "start_id": self.start_id,
+            "digit_filler": self.digit_filler,
+            "host_prefix": self.host_prefix,
+            "leaf_prefix": self.leaf_prefix,
+            "spine_prefix": self.spine_prefix,
+            "super_spine_prefix": self.super_spine_prefix,
+            "host_p2p_lead_octet": self.host_p2p_lead_octet,
+            "spine_base_as": self.spine_base_as,
+            "leaf_base_as": self.leaf_base_as,
+            "super_spine_base_as": self.super_spine_base_as,
+            "p2pmask": self.p2pmask,
+            "breakout": self.breakout,
+            "nvidia_air": self.nvidia_air,
+        }
 
-        # Combine host and leaf-spine point-to-point data
-        self.dot_data = self.host_dot_data + self.leaf_spine_dot_data
+    def write_manifest(self, filepath=None) -> str:
+        """
+        Records the generation parameters, a later run loads them with `from_manifest` to expand the fabric
+        :param filepath: defaults to <file_dir>/generation.json
+        :return: path of the manifest
+        """
+        filepath = filepath or f"{self.file_dir}/{GENERATION_MANIFEST}"
+        self.create_file(filepath, json.dumps(self.parameters(), indent=2))
+        return filepath
 
-    @staticmethod
-    def _generate_host_ip(x, pod_id, su_id, rail_id, local_host_id):
-        # Check if host_id exceeds the limit for 6 bits (maximum value is 62 in decimal)
-        if local_host_id > 62:
-            raise ValueError(f"host_id ({local_host_id}) is too large. It must be between 0 and 62 inclusive.")
+    @classmethod
+    def from_manifest(cls, filepath, **kwargs) -> "NetworkMapping":
+        """
+        :param filepath: manifest written by `write_manifest`
+        :param kwargs: overrides, e.g. file_dir
+        """
+        with open(filepath) as manifest:
+            return cls(**(json.load(manifest) | kwargs))
 
-        rail_bin = f"{rail_id:03b}"
-        pod_bin = f"{pod_id:05b}"
-        y_bin = rail_bin + pod_bin
-        y = int(y_bin, 2)
-        z = su_id
+    # --- artifacts, computed on first access and cached ---
 
-        # Generate NIC and Switch binary representations
-        w_nic_bin = f"00{local_host_id:05b}0"  # NIC
-        if len(w_nic_bin) > 8:
-            raise ValueError(f"Generated NIC binary ({w_nic_bin}) exceeds 8 bits.")
+    @artifact()
+    def pods(self):
+        """
+        3-tier only, list of (host links, leaf-spine links) indexed by pod ID.
+        Pods are independent of each other, see util.pod_fabric for the outputs of a single pod.
+        """
+        if self.input_data or self.num_tiers != 3:
+            return None
+        return [fabric_engine.build_pod(pod_id, num_hosts=self.num_hosts,
+                                        lead_octet=self.host_p2p_lead_octet,
+                                        breakout=self.breakout,
+                                        leaf_base_as=self.leaf_base_as,
+                                        spine_base_as=self.spine_base_as)
+                for pod_id in range(self.num_pods)]
+
+    @artifact('pods')
+    def host_links(self):
+        """
+        Columnar leaf to host port mapping, only available for generated fabrics
+        """
+        if self.input_data:
+            return None
+        if self.num_tiers == 3:
+            return fabric_engine.concat_tables([host_links for host_links, _ in self.pods])
+        return fabric_engine.build_host_links(num_hosts=self.num_hosts,
+                                              lead_octet=self.host_p2p_lead_octet,
+                                              breakout=self.breakout)
+
+    @artifact('pods')
+    def leaf_spine_links(self):
+        """
+        Columnar leaf to spine port mapping, only available for generated 2 and 3-tier fabrics
+        """
+        if self.input_data or self.num_tiers == 1:
+            return None
+        if self.num_tiers == 3:
+            return fabric_engine.concat_tables([leaf_spine_links for _, leaf_spine_links in self.pods])
+        # every leaf has 64 uplinks that are equally distributed across the spines,
+        # spine and leaf interface IDs are calculated from the spine/leaf/connection index,
+        # see fabric_engine.build_leaf_spine_links
+        return fabric_engine.build_leaf_spine_links(num_leafs=self.num_leafs,
+                                                    num_spines=self.num_spines,
+                                                    breakout=self.breakout,
+                                                    leaf_base_as=self.leaf_base_as,
+                                                    spine_base_as=self.spine_base_as)
+
+    @artifact()
+    def spine_super_spine_links(self):
+        """
+        Columnar spine to super-spine port mapping, only available for 3-tier fabrics.
+        This is the pod interconnect, the only links that depend on the number of pods (super-spine plane size).
+        """
+        if self.num_tiers != 3:
+            return None
+        return fabric_engine.build_super_spine_links(num_pods=self.num_pods,
+                                                     spine_base_as=self.spine_base_as,
+                                                     super_spine_base_as=self.super_spine_base_as)
+
+    @artifact('host_links')
+    def leaf_host_mapping_data(self):
+        return self._create_leaf_host_mapping_data()
+
+    @artifact('leaf_spine_links')
+    def leaf_spine_mapping_data(self):
+        if self.num_tiers == 1:
+            return []
+        return self._create_leaf_spine_mapping_data()
+
+    @artifact('spine_super_spine_links')
+    def spine_super_spine_mapping_data(self):
+        if self.num_tiers != 3:
+            return []
+        return self._create_spine_super_spine_mapping_data()
+
+    @artifact('leaf_spine_mapping_data', 'leaf_spine_links', 'spine_super_spine_links')
+    def leaf_spine_dot_data(self):
+        if self.num_tiers == 1:
+            return []
+        return self._create_leaf_spine_dot_data()
+
+    @artifact('leaf_spine_mapping_data', 'leaf_spine_links', 'spine_super_spine_links')
+    def leaf_spine_interface_data(self):
+        if self.num_tiers == 1:
+            return []
+        return self._create_leaf_spine_interface_data()
+
+    @artifact('inventory')
+    def bgp_global_data(self):
+        if self.num_tiers == 1:
+            return []
+        return self.inventory.bgp_global()
+
+    @artifact('leaf_spine_mapping_data', 'leaf_spine_links', 'spine_super_spine_links')
+    def bgp_session_data(self):
+        if self.num_tiers == 1:
+            return []
+        return self._create_bgp_session_data()
+
+    @artifact('leaf_host_mapping_data', 'host_links')
+    def host_dot_data(self):
+        return self._create_leaf_host_dot_data()
+
+    @artifact('leaf_host_mapping_data', 'leaf_spine_mapping_data', 'host_links', 'leaf_spine_links',
+              'spine_super_spine_links')
+    def inventory(self):
+        """
+        Indexed inventory of every device and link, see util.fabric_inventory.FabricInventory
+        """
+        if self.input_data:
+            return self._create_inventory_from_input()
+        return self._create_inventory()
+
+    @artifact('inventory')
+    def devices(self):
+        return self._get_devices()
+
+    @artifact('inventory')
+    def leafs(self):
+        return self._get_leafs()
 
-        w_switch_bin = f"00{local_host_id:05b}1"  # Switch
-        if len(w_switch_bin) > 8:
-            raise ValueError(f"Generated Switch binary ({w_switch_bin}) exceeds 8 bits.")
+    @artifact('inventory')
+    def spines(self):
+        return self._get_spines()
 
-        w_nic = int(w_nic_bin, 2)
-        w_switch = int(w_switch_bin, 2)
+    @artifact('inventory')
+    def super_spines(self):
+        return self._get_super_spines()
 
-        ip_nic = ipaddress.IPv4Address((x << 24) | (y << 16) | (z << 8) | w_nic)
-        ip_switch = ipaddress.IPv4Address((x << 24) | (y << 16) | (z << 8) | w_switch)
+    @artifact('host_dot_data', 'leaf_spine_dot_data')
+    def dot_data(self):
+        """
+        Combined host and leaf-spine point-to-point data
+        """
+        return fabric_engine.concat_views(self.host_dot_data, self.leaf_spine_dot_data)
 
-        return ip_nic, ip_switch
+    @staticmethod
+    def _generate_host_ip(x, pod_id, su_id, rail_id, local_host_id):
+        """
+        :return: tuple of (NIC IP, switch IP), see `addressing.host_ip` for the bit layout
+        """
+        nic_ip, switch_ip = addressing.host_ip(x, pod_id, su_id, rail_id, local_host_id)
+        return ipaddress.IPv4Address(nic_ip), ipaddress.IPv4Address(switch_ip)
 
     def _calculate_num_spines(self):
         raw_num_spines = self.num_hosts * 8 / 128
@@ -152,67 +323,10 @@ class NetworkMapping:
     def _create_leaf_host_mapping_data(self):
         if self.input_data:
             return self._create_leaf_host_mapping_from_input()
-        else:
-            pod_id = 0
-            result = []
-
-            global_host_id = 0
-
-            for su_id in range(self.num_sus):
-                for local_host_id in range(32):
-                    if global_host_id >= self.num_hosts:
-                        break
-                    # print("base interface is...", base_intf)
-
-                    # print("swp_intf is...", swp_intf)
-                    connections_per_leaf = 2
-
-                    for rail_id in range(8):
-                        leaf_id = su_id * 4 + (rail_id // connections_per_leaf)
-                        nic_ip, switch_ip = self._generate_host_ip(self.host_p2p_lead_octet,
-                                                                   pod_id,
-                                                                   su_id,
-                                                                   rail_id,
-                                                                   local_host_id)
-                        leaf_name = f"{self.leaf_prefix}{str(leaf_id).zfill(self.digit_filler)}"
-
-                        # base_intf is the interface that we start assignment,
-                        # local_host_id always goes from 0 to 31, since we assign 2 host ports to the same leaf,
-                        # we calculate the starting switch port number by using the formula below.
-                        # rail_id goes from 0 to 7
-
-                        # if breakout ports is > 1, we would loop through all the breakout ports
-                        if self.breakout > 1:
-                            # base_intf value is only used when we have breakouts
-                            base_intf = local_host_id + 1
-                            swp_intf = f"swp{base_intf}"
-                            breakout_ports = self._convert_swp_to_breakout(swp_intf)
-                            leaf_intf = breakout_ports[rail_id % self.breakout]
-                        else:
-                            if rail_id % 2 == 0:
-                                swp_intf = (local_host_id + 1) * 2 - 1
-                            else:
-                                swp_intf = (local_host_id + 1) * 2
-                            leaf_intf = f"swp{swp_intf}"
-
-                        host_name = f"{self.host_prefix}{str(global_host_id).zfill(self.digit_filler)}"
-                        host_intf = f"rail{rail_id + 1}"
-                        result.append({
-                            "SU": su_id,
-                            "HostID": global_host_id,
-                            "HostName": host_name,
-                            "Rail": rail_id,
-                            "HostIntf": host_intf,
-                            "HostIntfIP": str(nic_ip),
-                            "LeafID": leaf_id,
-                            "LeafName": leaf_name,
-                            "LeafIntf": leaf_intf,
-                            "LeafIntfIP": str(switch_ip),
-                            "Mask": self.p2pmask,
-                            "Description": f"{host_name}-{host_intf}"
-                        })
-                    global_host_id += 1
-            return result
+        return fabric_engine.RecordView(len(self.host_links), functools.partial(self.host_links.records,
+                                                                                host_names=self._host_names(),
+                                                                                leaf_names=self._host_leaf_names(),
+                                                                                mask=self.p2pmask))
 
     def _create_leaf_host_mapping_from_input(self) -> List[Dict]:
         """
@@ -220,9 +334,11 @@ class NetworkMapping:
 
         :return: List of parsed host mapping dictionaries.
         """
+        if isinstance(self.input_data['leaf_host_p2p'], pd.DataFrame):
+            return self._leaf_host_mapping_from_frame(self.input_data['leaf_host_p2p'])
         result = []
         for row in self.input_data['leaf_host_p2p']:
-            nic_ip, switch_ip = self._generate_host_ip(
+            nic_ip, switch_ip = addressing.host_ip(
                 self.host_p2p_lead_octet,
                 pod_id=int(row["PodID"]),
                 su_id=int(row["SU"]),
@@ -235,83 +351,145 @@ class NetworkMapping:
                 "HostName": row["Hostname"],
                 "Rail": int(row["RailID"]),
                 "HostIntf": row["RailPort"],
-                "HostIntfIP": str(nic_ip),
+                "HostIntfIP": addressing.ip_to_string(nic_ip),
                 "LeafID": int(row["LeafID"]),
                 "LeafName": row["LeafName"],
                 "LeafIntf": row["LeafIntf"],
-                "LeafIntfIP": str(switch_ip),
+                "LeafIntfIP": addressing.ip_to_string(switch_ip),
                 "Mask": self.p2pmask,
                 "Description": row.get("Description", f"{row['Hostname']}-{row['RailPort']}"),
             })
         return result
 
-    def _create_leaf_spine_mapping_data(self) -> List[Dict]:
-        #TODO add support for multi-pod
-        result = []
+    def _leaf_host_mapping_from_frame(self, frame: pd.DataFrame) -> List[Dict]:
+        """
+        Vectorized version of `_create_leaf_host_mapping_from_input` for validated DataFrames,
+        see util.input_ingest
+        """
+        nic_ip, switch_ip = addressing.host_ip_array(self.host_p2p_lead_octet,
+                                                     pod_id=frame["PodID"].to_numpy(),
+                                                     su_id=frame["SU"].to_numpy(),
+                                                     rail_id=frame["RailID"].to_numpy(),
+                                                     local_host_id=frame["HostID"].to_numpy() % 32)
+        default_description = frame["Hostname"] + "-" + frame["RailPort"]
+        if "Description" in frame.columns:
+            description = frame["Description"].where(frame["Description"].notna(), default_description)
+        else:
+            description = default_description
+        return [
+            {
+                "SU": su_id,
+                "HostID": host_id,
+                "HostName": host_name,
+                "Rail": rail_id,
+                "HostIntf": host_intf,
+                "HostIntfIP": host_intf_ip,
+                "LeafID": leaf_id,
+                "LeafName": leaf_name,
+                "LeafIntf": leaf_intf,
+                "LeafIntfIP": leaf_intf_ip,
+                "Mask": self.p2pmask,
+                "Description": row_description,
+            }
+            for su_id, host_id, host_name, rail_id, host_intf, host_intf_ip, leaf_id, leaf_name, leaf_intf,
+            leaf_intf_ip, row_description in zip(
+                frame["SU"].tolist(), frame["HostID"].tolist(), frame["Hostname"].tolist(),
+                frame["RailID"].tolist(), frame["RailPort"].tolist(), addressing.ip_to_strings(nic_ip),
+                frame["LeafID"].tolist(), frame["LeafName"].tolist(), frame["LeafIntf"].tolist(),
+                addressing.ip_to_strings(switch_ip), description.tolist())
+        ]
 
+    def _create_leaf_spine_mapping_data(self) -> List[Dict]:
         if self.input_data:
             return self._create_leaf_spine_mapping_from_input()
-        else:
-            leaf_connections_to_each_spine = 64 // self.num_spines
-            # we start spine connection after assigned all downlink ports to DGX
-            # we need to increment this number by `leaf_connections_to_each_spine` count after looping through
-            # all ports connected to a given spine
-            starting_leaf_intf_id = int(128 / (self.breakout * 2) + 1)  # +1 because interface ID starts at 1
-            for spine_id in range(self.num_spines):
-                spine_as = spine_id + self.spine_base_as
-                base_ip = ipaddress.IPv4Address(f"10.254.{spine_id}.0")
-                spine_intf_offset = 1
-
-                for leaf_id in range(self.num_leafs):   # start from 0
-
-                    leaf_as = self.leaf_base_as + leaf_id
-                    su_id = leaf_id // 4
-                    current_leaf_intf_id = starting_leaf_intf_id  # +1 because interface ID starts at 1
-
-                    for connection in range(leaf_connections_to_each_spine):
-                        breakout_index = connection % self.breakout
-                        leaf_swp = f"swp{current_leaf_intf_id}"
-                        spine_swp = f"swp{int((connection // self.breakout) + spine_intf_offset)}"
-
-                        leaf_breakout_ports = self._convert_swp_to_breakout(leaf_swp) if self.breakout > 1 else [
-                            leaf_swp]
-
-                        spine_breakout_ports = self._convert_swp_to_breakout(spine_swp) if self.breakout > 1 else [
-                            spine_swp]
-
-                        leaf_intf = leaf_breakout_ports[breakout_index]
-                        spine_intf = spine_breakout_ports[breakout_index]
-
-                        base_port = int(spine_intf.split('swp')[1].split('s')[0])
-                        numerical_value = (base_port - 1) * self.breakout + breakout_index + 1
-                        spine_ip = base_ip + (numerical_value - 1) * 2
-                        leaf_ip = spine_ip + 1
-
-                        result.append({
-                            "SU": su_id,
-                            "SpineID": spine_id,
-                            "SpineName": f"{self.spine_prefix}{str(spine_id).zfill(self.digit_filler)}",
-                            "SpineIntf": spine_intf,
-                            "SpineIntfIP": str(spine_ip),
-                            "SpineAS": spine_as,
-                            "LeafID": leaf_id,
-                            "LeafName": f"{self.leaf_prefix}{str(leaf_id).zfill(self.digit_filler)}",
-                            "LeafIntf": leaf_intf,
-                            "LeafIntfIP": str(leaf_ip),
-                            "LeafAS": leaf_as,
-                            "Mask": self.p2pmask
-                        })
-
-                        if breakout_index == self.breakout - 1:
-                            current_leaf_intf_id += 1
-                    # we need to increment the number of interfaces after
-                    spine_intf_offset += int(leaf_connections_to_each_spine / self.breakout)
-                # we increment the number of connections / breakout because physical port numbers gets incremented
-                # we should not account for breakouts when incrementing
-                # meaning that when we increment 8 physical port number,
-                # we are actually going to loop through 8 * num_breakout ports ( 16 if breakout = 2 )
-                starting_leaf_intf_id += int(leaf_connections_to_each_spine / self.breakout)
-            return result
+        return fabric_engine.RecordView(len(self.leaf_spine_links), self._leaf_spine_records)
+
+    def _leaf_spine_records(self, start, stop) -> List[Dict]:
+        return self.leaf_spine_links.to_records(start, stop,
+                                                group_key="SU",
+                                                upper_key="Spine",
+                                                lower_key="Leaf",
+                                                upper_names=self._device_names(self.spine_prefix, self.num_spines),
+                                                lower_names=self._device_names(self.leaf_prefix, self.num_leafs),
+                                                port_names=self._port_names(),
+                                                mask=self.p2pmask)
+
+    def _create_spine_super_spine_mapping_data(self) -> Sequence[Dict]:
+        """
+        3-tier only, spine to super-spine point-to-point mapping.
+        :return: lazily built list-of-dictionaries view over the columnar spine to super-spine links
+        """
+        return fabric_engine.RecordView(len(self.spine_super_spine_links), self._spine_super_spine_records)
+
+    def _spine_super_spine_records(self, start, stop) -> List[Dict]:
+        return self.spine_super_spine_links.to_records(
+            start, stop,
+            group_key="PodID",
+            upper_key="SuperSpine",
+            lower_key="Spine",
+            upper_names=self._device_names(self.super_spine_prefix, self.num_super_spines),
+            lower_names=self._device_names(self.spine_prefix, self.num_spines),
+            port_names=self._port_names(),
+            mask=self.p2pmask)
+
+    def _device_names(self, prefix, count) -> Sequence[str]:
+        """
+        :return: cached table of zero-filled device names indexed by device ID
+        """
+        return addressing.device_names(prefix, count, self.digit_filler)
+
+    def _host_names(self) -> Sequence[str]:
+        return self._device_names(self.host_prefix, self.num_hosts)
+
+    def _host_leaf_names(self) -> Sequence[str]:
+        """
+        :return: names of the host facing leafs, every SU has 4 leafs even when it's partially populated
+        """
+        return self._device_names(self.leaf_prefix,
+                                  math.ceil(self.num_hosts / fabric_engine.HOSTS_PER_SU) * fabric_engine.LEAFS_PER_SU)
+
+    def _port_names(self) -> Sequence[str]:
+        """
+        :return: cached table of interface names indexed by port slot
+        """
+        return addressing.port_names(self.breakout, fabric_engine.SWITCH_RADIX * self.breakout)
+
+    def _uplink_tables(self):
+        """
+        :return: list of (link table, upper tier names, lower tier names) for all generated uplinks
+        """
+        tables = [(self.leaf_spine_links,
+                   self._device_names(self.spine_prefix, self.num_spines),
+                   self._device_names(self.leaf_prefix, self.num_leafs))]
+        if self.spine_super_spine_links is not None:
+            tables.append((self.spine_super_spine_links,
+                           self._device_names(self.super_spine_prefix, self.num_super_spines),
+                           self._device_names(self.spine_prefix, self.num_spines)))
+        return tables
+
+    def _linked_device_names(self) -> set:
+        """
+        :return: names of the devices that have a link in the generated link tables
+        """
+        host_ids = [self.host_links.host]
+        leaf_ids = [self.host_links.leaf]
+        spine_ids, super_spine_ids = [], []
+        if self.leaf_spine_links is not None:
+            leaf_ids.append(self.leaf_spine_links.lower)
+            spine_ids.append(self.leaf_spine_links.upper)
+        if self.spine_super_spine_links is not None:
+            spine_ids.append(self.spine_super_spine_links.lower)
+            super_spine_ids.append(self.spine_super_spine_links.upper)
+
+        names = set()
+        for device_names, ids in ((self._host_names(), host_ids),
+                                  (self._host_leaf_names(), leaf_ids),
+                                  (self._device_names(self.spine_prefix, self.num_spines), spine_ids),
+                                  (self._device_names(self.super_spine_prefix, self.num_super_spines),
+                                   super_spine_ids)):
+            if ids:
+                names.update(device_names[device_id] for device_id in np.unique(np.concatenate(ids)).tolist())
+        return names
 
     def _create_leaf_spine_mapping_from_input(self) -> List[Dict]:
         """
@@ -319,22 +497,18 @@ class NetworkMapping:
 
         :return: List of parsed leaf-spine mapping dictionaries.
         """
+        if isinstance(self.input_data['leaf_spine_p2p'], pd.DataFrame):
+            return self._leaf_spine_mapping_from_frame(self.input_data['leaf_spine_p2p'])
         result = []
-
-        def extract_intf_id(port_name):
-            if "swp" in port_name:
-                return int(port_name.split("swp")[1])
-            return None
-
         for row in self.input_data['leaf_spine_p2p']:
             spine_id = int(row["SpineID"])
             spine_as = spine_id + self.spine_base_as
-            base_ip = ipaddress.IPv4Address(f"10.254.{spine_id}.0")
             leaf_id = int(row["LeafID"])
             leaf_as = self.leaf_base_as + leaf_id
-            spine_intf_id = extract_intf_id(row["SpineIntf"])
-            spine_intf_ip = base_ip + (spine_intf_id - 1) * 2
-            leaf_intf_ip = spine_intf_ip + 1
+            spine_port, _ = addressing.parse_port_name(row["SpineIntf"])
+            spine_ip = addressing.p2p_ip(addressing.LEAF_SPINE_BASE_IP, spine_id, spine_port - 1)
+            spine_intf_ip = ipaddress.IPv4Address(spine_ip)
+            leaf_intf_ip = ipaddress.IPv4Address(spine_ip + 1)
 
             result.append({
                 "SU": int(row["SU"]),
@@ -352,7 +526,47 @@ class NetworkMapping:
             })
         return result
 
-    def _create_leaf_spine_interface_data(self) -> List[Dict]:
+    def _leaf_spine_mapping_from_frame(self, frame: pd.DataFrame) -> List[Dict]:
+        """
+        Vectorized version of `_create_leaf_spine_mapping_from_input` for validated DataFrames,
+        see util.input_ingest
+        """
+        spine_id = frame["SpineID"].to_numpy()
+        leaf_id = frame["LeafID"].to_numpy()
+        # a fabric only has a few hundred distinct port names, each one is parsed once
+        port_codes, port_names = pd.factorize(frame["SpineIntf"])
+        spine_port = np.array([addressing.parse_port_name(name)[0] for name in port_names], dtype=np.int64)[port_codes]
+        spine_ip = addressing.p2p_ip(addressing.LEAF_SPINE_BASE_IP, spine_id, spine_port - 1)
+        return [
+            {
+                "SU": su_id,
+                "SpineID": spine,
+                "SpineName": spine_name,
+                "SpineIntf": spine_intf,
+                "SpineIntfIP": ipaddress.IPv4Address(ip),
+                "SpineAS": spine + self.spine_base_as,
+                "LeafID": leaf,
+                "LeafName": leaf_name,
+                "LeafIntf": leaf_intf,
+                "LeafIntfIP": ipaddress.IPv4Address(ip + 1),
+                "LeafAS": leaf + self.leaf_base_as,
+                "Mask": self.p2pmask,
+            }
+            for su_id, spine, spine_name, spine_intf, ip, leaf, leaf_name, leaf_intf in zip(
+                frame["SU"].tolist(), spine_id.tolist(), frame["SpineName"].tolist(), frame["SpineIntf"].tolist(),
+                spine_ip.tolist(), leaf_id.tolist(), frame["LeafName"].tolist(), frame["LeafIntf"].tolist())
+        ]
+
+    def _create_leaf_spine_interface_data(self) -> Sequence[Dict]:
+        if not self.input_data:
+            return fabric_engine.concat_views(*(
+                fabric_engine.RecordView(len(table) * 2, functools.partial(table.interface_records,
+                                                                           upper_names=upper_names,
+                                                                           lower_names=lower_names,
+                                                                           port_names=self._port_names(),
+                                                                           mask=self.p2pmask))
+                for table, upper_names, lower_names in self._uplink_tables()))
+
         device_interface_data = []
 
         for entry in self.leaf_spine_mapping_data:
@@ -374,41 +588,10 @@ class NetworkMapping:
 
         return device_interface_data
 
-    def _create_bgp_global_data(self) -> List[Dict]:
-        leaf_base_lo_ip = ipaddress.IPv4Address("10.0.0.0")
-        spine_base_lo_ip = ipaddress.IPv4Address("10.1.0.0")
-        super_spine_base_lo_ip = ipaddress.IPv4Address("10.2.0.0")
-
-        unique_entries = set()
-        bgp_global_data = []
+    def _create_bgp_session_data(self) -> Sequence[Dict]:
+        if not self.input_data:
+            return self._create_bgp_session_view()
 
-        for entry in self.leaf_spine_mapping_data:
-            # Spine Data
-            spine_data = {
-                "DeviceName": entry['SpineName'],
-                "VRF": "default",
-                "AS": self.spine_base_as + entry['SpineID'],
-                "LoopbackIP": spine_base_lo_ip + entry['SpineID'],
-                "RouterID": spine_base_lo_ip + entry['SpineID'],
-            }
-            if tuple(spine_data.items()) not in unique_entries:
-                unique_entries.add(tuple(spine_data.items()))
-                bgp_global_data.append(spine_data)
-
-            # Leaf Data
-            leaf_data = {
-                "DeviceName": entry['LeafName'],
-                "VRF": "default",
-                "AS": self.leaf_base_as + entry['LeafID'],
-                "LoopbackIP": leaf_base_lo_ip + entry['LeafID'],
-                "RouterID": leaf_base_lo_ip + entry['LeafID'],
-            }
-            if tuple(leaf_data.items()) not in unique_entries:
-                unique_entries.add(tuple(leaf_data.items()))
-                bgp_global_data.append(leaf_data)
-        return sorted(bgp_global_data, key=lambda x: x["DeviceName"])
-
-    def _create_bgp_session_data(self) -> List[Dict]:
         bgp_session_data = []
 
         for entry in self.leaf_spine_mapping_data:
@@ -432,23 +615,169 @@ class NetworkMapping:
 
         return sorted(bgp_session_data, key=lambda x: x["DeviceName"])
 
+    def _create_bgp_session_view(self) -> Sequence[Dict]:
+        """
+        BGP sessions of generated fabrics, every link creates a session on both ends (upper tier device first).
+        Sessions are sorted by device name in a single vectorized pass and rows are only built when accessed.
+        The view's columns hold the sessions as arrays: {"DeviceNames", "Device" (index into DeviceNames), "LocalAS",
+        "NeighborIP" (uint32), "RemoteAS"}.
+        """
+        names, devices, local_as, neighbor_ip, remote_as = [], [], [], [], []
+        device_offset = {}
+        for table, upper_names, lower_names in self._uplink_tables():
+            for device_names in (upper_names, lower_names):
+                if id(device_names) not in device_offset:
+                    device_offset[id(device_names)] = len(names)
+                    names.extend(device_names)
+            devices.append(np.stack([table.upper + device_offset[id(upper_names)],
+                                     table.lower + device_offset[id(lower_names)]], axis=1).ravel())
+            local_as.append(np.stack([table.upper_as, table.lower_as], axis=1).ravel())
+            neighbor_ip.append(np.stack([table.lower_ip, table.upper_ip], axis=1).ravel())
+            remote_as.append(np.stack([table.lower_as, table.upper_as], axis=1).ravel())
+
+        name_rank = np.empty(len(names), dtype=np.int64)
+        name_rank[sorted(range(len(names)), key=names.__getitem__)] = np.arange(len(names))
+        devices = np.concatenate(devices)
+        order = np.argsort(name_rank[devices], kind='stable')
+        devices = devices[order]
+        local_as = np.concatenate(local_as)[order]
+        neighbor_ip = np.concatenate(neighbor_ip)[order]
+        remote_as = np.concatenate(remote_as)[order]
+
+        def build_rows(start, stop):
+            return [
+                {
+                    'DeviceName': names[device],
+                    'VRF': "default",
+                    'LocalAS': local,
+                    'NeighborIP': neighbor,
+                    'RemoteAS': remote
+                }
+                for device, local, neighbor, remote in zip(devices[start:stop].tolist(),
+                                                           local_as[start:stop].tolist(),
+                                                           addressing.ip_to_strings(neighbor_ip[start:stop]),
+                                                           remote_as[start:stop].tolist())
+            ]
+        return fabric_engine.RecordView(len(devices), build_rows, columns={
+            "DeviceNames": names, "Device": devices, "LocalAS": local_as, "NeighborIP": neighbor_ip,
+            "RemoteAS": remote_as})
+
+    def _create_inventory(self) -> FabricInventory:
+        """
+        Inventory of a generated fabric, device IDs are contiguous so devices are registered from the name tables.
+        Links are registered straight from the link tables, they're only resolved on the first link query.
+        """
+        port_names = self._port_names()
+        inventory = FabricInventory(interface_names=[*port_names, *fabric_engine.HOST_INTF_NAMES])
+        rail_offset = len(port_names)
+
+        # only leafs with uplinks run BGP, leafs of a 1-tier fabric or of a partially populated SU have no AS
+        host_leaf_names = self._host_leaf_names()
+        num_bgp_leafs = self.num_leafs if self.num_tiers > 1 else 0
+        if self.num_tiers == 3:
+            # 3-tier: spines in the same pod share an AS, all super-spines share an AS (RFC 7938)
+            leaf_as = fabric_engine.leaf_as_3_tier(self.leaf_base_as, range(num_bgp_leafs)).tolist()
+            spines_per_as = fabric_engine.SPINES_PER_POD
+        else:
+            leaf_as = [self.leaf_base_as + leaf_id for leaf_id in range(num_bgp_leafs)]
+            spines_per_as = 1
+        leaf_as += [None] * (len(host_leaf_names) - len(leaf_as))
+        leafs = inventory.add_devices('leaf', host_leaf_names, device_ids=range(len(host_leaf_names)), asns=leaf_as,
+                                      loopbacks=[addressing.LEAF_LOOPBACK_BASE_IP + leaf_id
+                                                 for leaf_id in range(len(host_leaf_names))])
+        offsets = {'leaf': int(leafs[0]) if len(leafs) else 0}
+        if self.num_tiers >= 2:
+            spine_ids = range(self.num_spines)
+            spines = inventory.add_devices('spine', self._device_names(self.spine_prefix, self.num_spines),
+                                           device_ids=spine_ids,
+                                           asns=[self.spine_base_as + spine_id // spines_per_as
+                                                 for spine_id in spine_ids],
+                                           loopbacks=[addressing.SPINE_LOOPBACK_BASE_IP + spine_id
+                                                      for spine_id in spine_ids])
+            offsets['spine'] = int(spines[0])
+        if self.num_tiers == 3:
+            super_spine_ids = range(self.num_super_spines)
+            super_spines = inventory.add_devices(
+                'super-spine', self._device_names(self.super_spine_prefix, self.num_super_spines),
+                device_ids=super_spine_ids,
+                asns=[self.super_spine_base_as] * self.num_super_spines,
+                loopbacks=[addressing.SUPER_SPINE_LOOPBACK_BASE_IP + super_spine_id
+                           for super_spine_id in super_spine_ids])
+            offsets['super-spine'] = int(super_spines[0])
+        hosts = inventory.add_devices('host', self._host_names(), device_ids=range(self.num_hosts))
+        offsets['host'] = int(hosts[0]) if len(hosts) else 0
+
+        def host_link_columns():
+            table = self.host_links
+            leaf_slot = (table.leaf_port.astype(np.int32) - 1) * self.breakout + np.maximum(table.leaf_subport, 0)
+            return (np.stack([table.leaf + offsets['leaf'], table.host + offsets['host']], axis=1),
+                    np.stack([leaf_slot, table.rail.astype(np.int32) + rail_offset], axis=1),
+                    np.stack([table.switch_ip, table.nic_ip], axis=1))
+
+        def uplink_columns(table, upper_role, lower_role):
+            return (np.stack([table.upper + offsets[upper_role], table.lower + offsets[lower_role]], axis=1),
+                    np.stack([table.upper_slot, table.lower_slot], axis=1),
+                    np.stack([table.upper_ip, table.lower_ip], axis=1))
+
+        inventory.add_links(host_link_columns)
+        if self.num_tiers >= 2:
+            inventory.add_links(lambda: uplink_columns(self.leaf_spine_links, 'spine', 'leaf'))
+        if self.num_tiers == 3:
+            inventory.add_links(lambda: uplink_columns(self.spine_super_spine_links, 'super-spine', 'spine'))
+        return inventory
+
+    def _create_inventory_from_input(self) -> FabricInventory:
+        """
+        Inventory of user provided port mappings, built in a single pass over each mapping
+        """
+        inventory = FabricInventory()
+        host_rows = self.leaf_host_mapping_data
+        leaf_spine_rows = self.leaf_spine_mapping_data
+
+        # leafs are listed in the order they appear in the host mapping, followed by the spines and the hosts
+        host_leafs = inventory.add_devices('leaf', [row['LeafName'] for row in host_rows],
+                                           device_ids=[row['LeafID'] for row in host_rows],
+                                           loopbacks=[addressing.LEAF_LOOPBACK_BASE_IP + row['LeafID']
+                                                      for row in host_rows])
+        # only devices with uplinks run BGP
+        spines = inventory.add_devices('spine', [row['SpineName'] for row in leaf_spine_rows],
+                                       device_ids=[row['SpineID'] for row in leaf_spine_rows],
+                                       asns=[row['SpineAS'] for row in leaf_spine_rows],
+                                       loopbacks=[addressing.SPINE_LOOPBACK_BASE_IP + row['SpineID']
+                                                  for row in leaf_spine_rows])
+        uplink_leafs = inventory.add_devices('leaf', [row['LeafName'] for row in leaf_spine_rows],
+                                             device_ids=[row['LeafID'] for row in leaf_spine_rows],
+                                             asns=[row['LeafAS'] for row in leaf_spine_rows],
+                                             loopbacks=[addressing.LEAF_LOOPBACK_BASE_IP + row['LeafID']
+                                                        for row in leaf_spine_rows])
+        hosts = inventory.add_devices('host', [row['HostName'] for row in host_rows],
+                                      device_ids=[row['HostID'] for row in host_rows])
+
+        def host_link_columns():
+            return (np.stack([host_leafs, hosts], axis=1),
+                    np.stack([inventory.interface_codes([row['LeafIntf'] for row in host_rows]),
+                              inventory.interface_codes([row['HostIntf'] for row in host_rows])], axis=1),
+                    np.array([(int(ipaddress.IPv4Address(row['LeafIntfIP'])),
+                               int(ipaddress.IPv4Address(row['HostIntfIP']))) for row in host_rows],
+                             dtype=np.uint32).reshape(-1, 2))
+
+        def uplink_columns():
+            return (np.stack([spines, uplink_leafs], axis=1),
+                    np.stack([inventory.interface_codes([row['SpineIntf'] for row in leaf_spine_rows]),
+                              inventory.interface_codes([row['LeafIntf'] for row in leaf_spine_rows])], axis=1),
+                    np.array([(int(row['SpineIntfIP']), int(row['LeafIntfIP'])) for row in leaf_spine_rows],
+                             dtype=np.uint32).reshape(-1, 2))
+
+        inventory.add_links(host_link_columns)
+        inventory.add_links(uplink_columns)
+        return inventory
+
     def _get_host_list(self) -> List[Dict]:
         """
         Get a list of DGX hosts
         :return: list of DGX hosts in a dictionary format with device name and their roles
         """
-        host_list = []
-        unique_entries = set()
-
-        for entry in self.leaf_host_mapping_data:
-            host_data = {
-                'DeviceName': entry['HostName'],
-                'Role': 'host'
-            }
-            if tuple(host_data.items()) not in unique_entries:
-                unique_entries.add(tuple(host_data.items()))
-                host_list.append(host_data)
-        return host_list
+        return self.inventory.devices('host')
 
     def _get_leafs(self) -> list[Dict]:
         """
@@ -456,7 +785,7 @@ class NetworkMapping:
             [{'DeviceName': 'leaf000', 'Role': 'leaf'}, {'DeviceName': 'leaf001', 'Role': 'leaf'},
             {'DeviceName': 'leaf002', 'Role': 'leaf'}, {'DeviceName': 'leaf003', 'Role': 'leaf'}]
         """
-        return [entry for entry in self.devices if 'leaf' in entry['Role']]
+        return self._listed_devices('leaf')
 
     def _get_spines(self) -> list[Dict]:
         """
@@ -464,39 +793,37 @@ class NetworkMapping:
             [{'DeviceName': 'spine000', 'Role': 'spine'}, {'DeviceName': 'spine001', 'Role': 'spine'},
             {'DeviceName': 'spine002', 'Role': 'spine'}, {'DeviceName': 'spine003', 'Role': 'spine'}]
         """
-        return [entry for entry in self.devices if 'spine' in entry['Role']]
+        return self._listed_devices('spine')
 
-    def _get_devices(self) -> List[Dict]:
+    def _get_super_spines(self) -> list[Dict]:
         """
-        Get a list of Spines, Leafs and Hosts with their device names and roles
-        :return: list of Spines, Leafs and Hosts in dictionary format with their device names and roles
+        :return: a list of Super-Spines with "DeviceName" and "Role" dictionary keys, empty for 1 and 2-tier fabrics
+            [{'DeviceName': 'superspine000', 'Role': 'super-spine'}, {'DeviceName': 'superspine001'...]
         """
-        device_list = []
-        unique_entries = set()
-        for entry in self.leaf_host_mapping_data:
-            leaf_data = {
-                'DeviceName': entry['LeafName'],
-                'Role': 'leaf',
-            }
-            if tuple(leaf_data.items()) not in unique_entries:
-                unique_entries.add(tuple(leaf_data.items()))
-                device_list.append(leaf_data)
+        return self._listed_devices('super-spine')
 
-        if self.leaf_spine_mapping_data:
-            for entry in self.leaf_spine_mapping_data:
-                # Add spine data
-                spine_data = {
-                    'DeviceName': entry['SpineName'],
-                    'Role': 'spine',
-                }
-                if tuple(spine_data.items()) not in unique_entries:
-                    unique_entries.add(tuple(spine_data.items()))
-                    device_list.append(spine_data)
-
-        host_list = self._get_host_list()
-        return device_list + host_list
-
-    def _create_leaf_host_dot_data(self):
+    def _get_devices(self) -> List[Dict]:
+        """
+        Get a list of Leafs, Spines, Super-Spines and Hosts with their device names and roles
+        :return: list of devices in dictionary format with their device names and roles
+        """
+        return self._listed_devices()
+
+    def _listed_devices(self, role=None) -> List[Dict]:
+        devices = self.inventory.devices(role)
+        if self.input_data and role in (None, 'leaf'):
+            # the device list of user provided mappings takes its leafs from the host mapping,
+            # leafs that only appear in the leaf-spine mapping are in the inventory but aren't listed
+            host_leafs = {row['LeafName'] for row in self.leaf_host_mapping_data}
+            devices = [device for device in devices if device['Role'] != 'leaf' or device['DeviceName'] in host_leafs]
+        return devices
+
+    def _create_leaf_host_dot_data(self) -> Sequence[Dict]:
+        if not self.input_data:
+            return fabric_engine.RecordView(len(self.host_links),
+                                            functools.partial(self.host_links.dot_records,
+                                                              host_names=self._host_names(),
+                                                              leaf_names=self._host_leaf_names()))
         host_p2p_data = [
             {
                 'SourceDevice': entry['LeafName'],
@@ -508,7 +835,16 @@ class NetworkMapping:
         ]
         return host_p2p_data
 
-    def _create_leaf_spine_dot_data(self):
+    def _create_leaf_spine_dot_data(self) -> Sequence[Dict]:
+        if not self.input_data:
+            # includes the spine to super-spine connections of 3-tier fabrics
+            return fabric_engine.concat_views(*(
+                fabric_engine.RecordView(len(table), functools.partial(table.dot_records,
+                                                                       upper_names=upper_names,
+                                                                       lower_names=lower_names,
+                                                                       port_names=self._port_names()))
+                for table, upper_names, lower_names in self._uplink_tables()))
+
         leaf_spine_dot_data = [
             {
                 'SourceDevice': entry['LeafName'],
@@ -520,76 +856,154 @@ class NetworkMapping:
         ]
         return leaf_spine_dot_data
 
-    def _convert_swp_to_breakout(self, swp):
-        """
-        Converts a single switch port to a list of breakout ports.
-
-        Args:
-            swp (str): a switch port name, e.g. swp1
-        Returns:
-            list: List of breakout ports (e.g., ["swp1s0", "swp1s1", ...]).
-        """
-        return [f"{swp}s{i}" for i in range(self.breakout)]
-
-    def create_dot_graph(self, graph_name="topology", write_to_file=True) -> str:
-        """
-        :param graph_name:
-        :param write_to_file:
-        :return:
-        """
-        def create_dot(dataframe) -> str:
-            dot_lines = [f'graph {graph_name} {{']
-            if self.nvidia_air:
-                for device in self.devices:
-                    device_name = device['DeviceName']
-                    if device['Role'] == 'leaf':
-                        dot_lines.append(
-                            f'"{device_name}" [function="leaf" memory="2048" os="cumulus-vx-5.6.0" cpu="2" storage="10"]')
-                    elif device['Role'] == 'spine':
-                        dot_lines.append(
-                            f'"{device_name}" [function="spine" memory="2048" os="cumulus-vx-5.6.0" cpu="2" storage="10"]')
-            for entry in dataframe:
-                source = f'"{entry["SourceDevice"]}":"{entry["SourceIntf"]}"'
-                destination = f'"{entry["DstDevice"]}":"{entry["DestIntf"]}"'
-                dot_lines.append(f'    {source} -- {destination}')
-            dot_lines.append('}')
-            dot_graph = "\n".join(dot_lines)
-            if write_to_file:
-                ansible_dot_file = f"cumulus_ansible/roles/ptm/files/{graph_name}.dot"  # part of ansible script
-                self.create_file(ansible_dot_file, dot_graph)
-            return dot_graph
+    def create_dot_graph(self, graph_name="topology", write_to_file=True, compress=False) -> Optional[str]:
+        """
+        :param graph_name: name of the graph and of the DOT file
+        :param write_to_file: stream the graph to cumulus_ansible/roles/ptm/files/<graph_name>.dot (PTM topology)
+        :param compress: gzip the DOT file
+        :return: the DOT graph. When it's written to a file, None for graphs above DOT_STRING_MAX_EDGES edges,
+            see write_ptm_topology and dot_graph for the file or the string only
+        """
+        if not write_to_file:
+            return self.dot_graph(graph_name, max_edges=None)
+        return self.write_dot_graph(self.ptm_topology_path(graph_name, compress), graph_name=graph_name,
+                                    keep=len(self._dot_edges()) <= DOT_STRING_MAX_EDGES)
+
+    @staticmethod
+    def ptm_topology_path(graph_name="topology", compress=False) -> str:
+        """
+        :return: path of the PTM topology, part of the ansible scripts
+        """
+        return f"cumulus_ansible/roles/ptm/files/{graph_name}.dot" + (".gz" if compress else "")
+
+    def write_ptm_topology(self, graph_name="topology", compress=False) -> str:
+        """
+        Streams the DOT graph to the PTM topology file, the graph isn't kept in memory
+
+        :return: path of the file
+        """
+        file_path = self.ptm_topology_path(graph_name, compress)
+        self.write_dot_graph(file_path, graph_name=graph_name)
+        return file_path
+
+    def dot_graph(self, graph_name="topology", max_edges=DOT_STRING_MAX_EDGES) -> str:
+        """
+        :param max_edges: largest graph built in memory, None for no limit
+        :return: the DOT graph as a string
+        """
+        num_edges = len(self._dot_edges())
+        if max_edges is not None and num_edges > max_edges:
+            raise ValueError(f"The DOT graph has {num_edges} edges, more than {max_edges}: "
+                             f"stream it to a file with write_dot_graph instead")
+        return dot_writer.write_lines(self._dot_lines(graph_name), keep=True)
+
+    def write_dot_graph(self, *outputs, graph_name="topology", keep=False):
+        """
+        Streams the DOT graph to every output in a single pass, e.g. the PTM topology file and a zip file member
+        :param outputs: file paths (gzip compressed when they end in .gz) or writable file objects
+        :param graph_name: name of the graph
+        :param keep: also return the DOT graph as a string
+        """
+        return dot_writer.write_lines(self._dot_lines(graph_name), *outputs, keep=keep)
+
+    def _dot_edges(self) -> Sequence[Dict]:
         if self.nvidia_air:
             # we do not support creating hosts in NVIDIA AIR, it's not scalable. only leaf/spine will be created
-            return create_dot(self.leaf_spine_dot_data)
-        else:
-            return create_dot(self.dot_data)
+            return self.leaf_spine_dot_data
+        return self.dot_data
 
-    def create_excel(self):
-        filename = f"{self.file_dir}/pdg_data.xlsx"
-        with pd.ExcelWriter(filename, engine="openpyxl") as writer:
-            devices_df = pd.DataFrame(self.devices)
-            devices_df.to_excel(writer, index=False, sheet_name="Device List")
-
-            # Save host port mapping data
-            host_df = pd.DataFrame(self.leaf_host_mapping_data)
-            host_df.to_excel(writer, index=False, sheet_name="Host Port Mapping")
+    def _dot_lines(self, graph_name):
+        node_lines = ()
+        if self.nvidia_air:
+            node_lines = (
+                f'"{device["DeviceName"]}" [function="{device["Role"]}" memory="2048" os="cumulus-vx-5.6.0" cpu="2" '
+                f'storage="10"]'
+                for device in self.devices if device['Role'] in ('leaf', 'spine', 'super-spine'))
+        return dot_writer.dot_lines(graph_name, node_lines, self._dot_edges())
 
-            # Save leaf-spine port mapping data if it exists
-            if self.leaf_spine_mapping_data:
-                leaf_spine_df = pd.DataFrame(self.leaf_spine_mapping_data)
-                leaf_spine_df.to_excel(writer, index=False, sheet_name="Leaf-Spine Port Mapping")
+    def create_excel(self, streaming=True, progress=None):
+        """
+        :param streaming: write rows straight from the link tables with a constant-memory writer,
+            sheets that overflow Excel's row limit are split. False builds a pandas DataFrame per sheet.
+        :param progress: optional callable(sheet_name, rows_written, total_rows), streaming only
+        """
+        filename = f"{self.file_dir}/pdg_data.xlsx"
+        if streaming:
+            with StreamingExcelWriter(filename, progress=progress) as writer:
+                for sheet_name, data in self._pdg_datasets():
+                    writer.write_sheet(sheet_name, data)
+            return
 
-                bgp_df = pd.DataFrame(self.bgp_global_data)
-                bgp_df.to_excel(writer, index=False, sheet_name="BGPGlobal")
+        with pd.ExcelWriter(filename, engine="openpyxl") as writer:
+            for sheet_name, data in self._pdg_datasets():
+                pd.DataFrame(data).to_excel(writer, index=False, sheet_name=sheet_name)
 
-                bgp_session_df = pd.DataFrame(self.bgp_session_data)
-                bgp_session_df.to_excel(writer, index=False, sheet_name="BGPSession")
+    def _pdg_datasets(self) -> List[tuple]:
+        """
+        :return: list of (data set name, data) in the order they appear in the PDG Excel file
+        """
+        sheets = [("Device List", self.devices),
+                  ("Host Port Mapping", self.leaf_host_mapping_data)]
+        # leaf-spine sheets only exist for 2 and 3-tier fabrics
+        if self.leaf_spine_mapping_data:
+            sheets += [("Leaf-Spine Port Mapping", self.leaf_spine_mapping_data),
+                       ("BGPGlobal", self.bgp_global_data),
+                       ("BGPSession", self.bgp_session_data),
+                       ("LeafSpineInterface", self.leaf_spine_interface_data)]
+        if self.spine_super_spine_mapping_data:
+            sheets.append(("Spine-SuperSpine Port Mapping", self.spine_super_spine_mapping_data))
+        sheets.append(("dot", self.dot_data))
+        return sheets
+
+    def export_data(self, file_format="parquet", workers=1) -> List[str]:
+        """
+        Exports every PDG data set to its own file under <file_dir>/pdg_data/ for machine consumers,
+        see util.pdg_export for the column types.
+        :param file_format: "parquet", "arrow" or "csv.gz", parquet and arrow need pyarrow
+        :param workers: number of processes building the typed frames, data sets are split per spine / per SU
+            and merged in row order, the files are identical to a single process export.
+            Only generated fabrics are split, user provided mappings are always exported by a single process.
+        :return: list of the written file paths
+        """
+        from pathlib import Path
 
-                leaf_spine_interface_df = pd.DataFrame(self.leaf_spine_interface_data)
-                leaf_spine_interface_df.to_excel(writer, index=False, sheet_name="LeafSpineInterface")
+        export_dir = Path(self.file_dir) / "pdg_data"
+        export_dir.mkdir(parents=True, exist_ok=True)
+        datasets = self._pdg_datasets()
+        # workers regenerate the fabric from its parameters, a subclass (e.g. FabricDelta) is exported serially
+        if workers > 1 and not self.input_data and type(self) is NetworkMapping:
+            frames = self._parallel_frames(datasets, workers)
+        else:
+            frames = (pdg_export.typed_frame(data) for _, data in datasets)
+        paths = []
+        for (dataset_name, _), frame in zip(datasets, frames):
+            path = export_dir / pdg_export.dataset_file_name(dataset_name, file_format)
+            pdg_export.write_frame(frame, path, file_format)
+            paths.append(str(path))
+        return paths
+
+    def _parallel_frames(self, datasets, workers):
+        """
+        Builds the typed frames of the data sets in a process pool, every worker regenerates the link tables from
+        the fabric parameters (milliseconds) instead of receiving them, only the finished frames are sent back.
+        :return: generator of the typed frames in data set order
+        """
+        from concurrent.futures import ProcessPoolExecutor
 
-            dot_df = pd.DataFrame(self.dot_data)
-            dot_df.to_excel(writer, index=False, sheet_name="dot")
+        group_keys = {
+            "Host Port Mapping": lambda: self.host_links.su,
+            "Leaf-Spine Port Mapping": lambda: self.leaf_spine_links.upper,
+            "Spine-SuperSpine Port Mapping": lambda: self.spine_super_spine_links.lower,
+        }
+        parameters = tuple(sorted(self.parameters().items()))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            for dataset_name, data in datasets:
+                keys = group_keys[dataset_name]() if dataset_name in group_keys else None
+                futures.append([executor.submit(_dataset_frame, parameters, dataset_name, start, stop)
+                                for start, stop in fabric_engine.group_ranges(len(data), workers * 4, keys)])
+            for chunks in futures:
+                yield pdg_export.concat_frames([future.result() for future in chunks])
 
     @staticmethod
     def create_file(filepath, content):
@@ -602,47 +1016,124 @@ class NetworkMapping:
         # Write content to the file
         file_path.write_text(content)
 
-    def generate_air_script(self):
+    def generate_air_script(self, filepath='nvidia_air/scripts/env_setup.sh'):
         data = {
             "leafs": self.leafs,
-            "spines": self.spines
+            "spines": self.spines + self.super_spines
         }
         payload = payload_handler.render_jinja(template_name="air_env_setup_template.j2", data=data, folder="bash")
-        self.create_file(filepath='nvidia_air/scripts/env_setup.sh', content=payload)
+        self.create_file(filepath=filepath, content=payload)
 
-    def generate_ansible_hosts(self):
+    def generate_ansible_hosts(self, filepath='cumulus_ansible/inventory/hosts'):
         spine_data = {
             "spine_prefix": self.spine_prefix,
             "spine_start": ''.join(filter(str.isdigit, self.spines[0]['DeviceName'])),
             "spine_end": ''.join(filter(str.isdigit, self.spines[-1]['DeviceName'])),
         } if self.spines else {}
+        super_spine_data = {
+            "super_spine_prefix": self.super_spine_prefix,
+            "super_spine_start": ''.join(filter(str.isdigit, self.super_spines[0]['DeviceName'])),
+            "super_spine_end": ''.join(filter(str.isdigit, self.super_spines[-1]['DeviceName'])),
+        } if self.super_spines else {}
         leaf_data = {
             "leaf_prefix": self.leaf_prefix,
             "leaf_start": ''.join(filter(str.isdigit, self.leafs[0]['DeviceName'])),
             "leaf_end": ''.join(filter(str.isdigit, self.leafs[-1]['DeviceName'])),
         }
-        data = leaf_data | spine_data
+        data = leaf_data | spine_data | super_spine_data
         payload = payload_handler.render_jinja(template_name="hosts.j2", data=data,
                                                folder="ansible")
 
         # Write the updated content to the output file
-        self.create_file(f'cumulus_ansible/inventory/hosts', content=payload)
+        self.create_file(filepath, content=payload)
+
+
+@functools.lru_cache(maxsize=4)
+def _worker_mapper(parameters: tuple) -> NetworkMapping:
+    return NetworkMapping(**dict(parameters))
+
+
+def _dataset_frame(parameters: tuple, dataset_name: str, start: int, stop: int) -> pd.DataFrame:
+    """
+    Process pool task of `NetworkMapping.export_data`, builds the typed frame of rows [start, stop) of a data set.
+    The mapper is cached per process so its tables are only generated once per worker.
+    """
+    data = dict(_worker_mapper(parameters)._pdg_datasets())[dataset_name]
+    return pdg_export.typed_frame(data[start:stop])
 
 
 if __name__ == "__main__":
-    # from util.parse_excel import ReadExcel
-    # excel_data = ReadExcel("scottdc_p2p.xlsx")
-    # input_data = {}
-    # for sheet_name in excel_data.sheet_names:
-    #     if sheet_name == "LeafHostP2P":
-    #         input_data["leaf_host_p2p"] = list(excel_data.excel_generate_line(sheet_name=sheet_name))
-    #     elif sheet_name == "LeafSpineP2P":
-    #         input_data["leaf_spine_p2p"] = list(excel_data.excel_generate_line(sheet_name=sheet_name))
-    # mapper = NetworkMapping(input_data=input_data, num_spines=8)
-
-    hosts = int(input("Number of Hosts: "))
-    mapper = NetworkMapping(num_hosts=hosts, nvidia_air=True, file_dir="nvidia")
-    mapper.generate_air_script()
-    mapper.generate_ansible_hosts()
-    mapper.create_excel()
-    mapper.create_dot_graph()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Spectrum-X PDG data generator")
+    parser.add_argument('-n', '--hosts', type=int, help="number of hosts, prompted for when omitted")
+    parser.add_argument('-f', '--format', dest='file_format', default="excel",
+                        choices=["excel", *pdg_export.FILE_FORMATS],
+                        help="excel writes pdg_data.xlsx, the other formats write one file per data set")
+    parser.add_argument('-o', '--file-dir', default="nvidia", help="output directory for the PDG data")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="number of processes for the parquet, arrow and csv.gz exports")
+    parser.add_argument('--expand-from', metavar="MANIFEST",
+                        help=f"{GENERATION_MANIFEST} of a deployed fabric, only the added part of the fabric is "
+                             f"written (new links, and the new and touched devices)")
+    parser.add_argument('--verify', action='store_true',
+                        help="with --expand-from, regenerate the whole fabric and check that no existing "
+                             "assignment moved")
+    parser.add_argument('-i', '--input', nargs='+', metavar="FILE",
+                        help="customer port mappings, a workbook with the LeafHostP2P and LeafSpineP2P sheets or "
+                             "a leaf-host and a leaf-spine table (.csv, .csv.gz or .parquet)")
+    parser.add_argument('--num-spines', type=int, default=0, help="number of spines of the customer fabric")
+    parser.add_argument('--pods', action='store_true',
+                        help="3-tier only, also write the outputs of every pod to <file-dir>/pods/, "
+                             "one pod per worker process (--workers)")
+    args = parser.parse_args()
+
+    if args.input:
+        if len(args.input) == 1:
+            input_data = input_ingest.load_input_data(workbook=args.input[0])
+        else:
+            input_data = input_ingest.load_input_data(leaf_host_p2p=args.input[0], leaf_spine_p2p=args.input[1])
+        mapper = NetworkMapping(input_data=input_data, num_spines=args.num_spines, file_dir=args.file_dir)
+        from util.fabric_validator import validate_fabric
+
+        for finding in validate_fabric(mapper):
+            print(f"{finding['Check']}: {finding['Device']} {finding['Message']}")
+        if args.file_format == "excel":
+            mapper.create_excel()
+        else:
+            mapper.export_data(file_format=args.file_format)
+        mapper.write_ptm_topology()
+        raise SystemExit()
+
+    hosts = args.hosts if args.hosts is not None else int(input("Number of Hosts: "))
+    if args.expand_from:
+        from util.fabric_expansion import FabricDelta
+
+        mapper = FabricDelta(NetworkMapping.from_manifest(args.expand_from), num_hosts=hosts,
+                             file_dir=args.file_dir)
+        if args.verify:
+            problems = mapper.verify()
+            if problems:
+                raise SystemExit("existing assignments changed:\n" + "\n".join(problems))
+        print(f"{len(mapper.new_devices)} new devices, {len(mapper.touched_devices)} touched devices")
+    else:
+        mapper = NetworkMapping(num_hosts=hosts, nvidia_air=True, file_dir=args.file_dir)
+        mapper.generate_air_script()
+        mapper.generate_ansible_hosts()
+    if args.file_format == "excel":
+        mapper.create_excel()
+    else:
+        mapper.export_data(file_format=args.file_format, workers=args.workers)
+    mapper.write_manifest()
+    if args.expand_from:
+        # the PTM topology describes the whole fabric, the delta only gets its own DOT file
+        mapper.write_dot_graph(f"{args.file_dir}/topology_delta.dot")
+    else:
+        mapper.write_ptm_topology()
+    if args.pods and mapper.num_tiers == 3 and not args.expand_from:
+        from util.pod_fabric import write_pods
+
+        file_format = args.file_format if args.file_format in pdg_export.FILE_FORMATS else "excel"
+        for summary in write_pods(mapper, f"{args.file_dir}/pods", workers=args.workers, file_format=file_format):
+            print(f"pod {summary['Pod']}: {summary['Hosts']} hosts, {summary['Devices']} devices, "
+                  f"{summary['Seconds']}s")
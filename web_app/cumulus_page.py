@@ -1,16 +1,24 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import os
 import zipfile
 from io import BytesIO
 from device_store import device_store
 from util import parse_excel, diff_file
 from data_handler.create_nxos_config import CreateNXOSConfig
-from data_handler.merge_config import merge_nxos_config
+from data_handler.device_config import ConfigBuilder
+from data_handler.payload_handler import template_cache_stats
 import sys
 import shutil
+import functools
+import multiprocessing
+import threading
 import uuid
 import time
 from util.spectrumx_netmapper import NetworkMapping
+from util.artifact_cache import ArtifactCache, tree_digest
+from util.fabric_validator import validate_fabric
+from util.pipeline import Pipeline
 from nvidia_air.air import Air, QueryAir
 import air_sdk
 
@@ -18,11 +26,11 @@ import air_sdk
 tabs = st.tabs(["PDG Generator", "Simulation", "PDG Run", "PDG Template Download", "Instructions"])
 
 
-def process_sheet(wb, sheet_name, file_dir):
+def process_sheet(wb, sheet_name, file_dir, builder=None):
     progress_placeholder = st.empty()
     progress_placeholder.info(f"Processing sheet '{sheet_name}' ")
     sheet_lines = wb.excel_generate_line(sheet_name=sheet_name)
-    create_nxos_config = CreateNXOSConfig(sheet_lines, file_dir)
+    create_nxos_config = CreateNXOSConfig(sheet_lines, file_dir, builder=builder)
     st.spinner("Generating configuration file....")
     generic_config_sheets = ['GlobalConfig']
     if sheet_name not in generic_config_sheets:
@@ -31,6 +39,14 @@ def process_sheet(wb, sheet_name, file_dir):
         create_nxos_config.function_map[f'{sheet_name}'](f'{sheet_name}')
 
 
+def write_device_config(builder, device_name):
+    """
+    Writes the configuration of a device, devices without any configuration have no file
+    """
+    if device_name in builder:
+        return builder.write(device_name)
+
+
 # Function to create a zip file
 def create_zip(output_directory):
     zip_buffer = BytesIO()
@@ -54,13 +70,27 @@ def clean_up_dir(dir_path):
     st.session_state.simulation_uploader_key += 1
 
 
-def copy_directory(source_dir, destination_dir):
+# written for every fabric into the session's copy of cumulus_ansible/, never taken from the shared directory
+GENERATED_ANSIBLE_FILES = ('inventory/hosts', 'roles/ptm/files/topology.dot')
+
+
+def ignore_generated_ansible_files(directory, names):
+    """
+    shutil.copytree ignore function, leaves out the per-fabric files of an earlier run of cumulus_ansible/
+    """
+    relative_dir = os.path.relpath(directory, 'cumulus_ansible')
+    return [name for name in names
+            if os.path.normpath(os.path.join(relative_dir, name)) in map(os.path.normpath, GENERATED_ANSIBLE_FILES)]
+
+
+def copy_directory(source_dir, destination_dir, ignore=None):
     """
     Copies the source directory to the destination.
     If the destination exists, it deletes it before copying.
 
     :param source_dir: Source directory path
     :param destination_dir: Destination directory path
+    :param ignore: optional shutil.copytree ignore function
     """
     try:
         # Check if source exists
@@ -74,7 +104,7 @@ def copy_directory(source_dir, destination_dir):
             print(f"Deleted existing destination directory: {destination_dir}")
 
         # Copy the source directory to the destination
-        shutil.copytree(source_dir, destination_dir)
+        shutil.copytree(source_dir, destination_dir, ignore=ignore)
         print(f"Copied '{source_dir}' to '{destination_dir}' successfully.")
 
     except Exception as e:
@@ -133,6 +163,12 @@ if "simulation_uploader_key" not in st.session_state:
     st.session_state.simulation_uploader_key = 20
 
 
+@st.cache_resource
+def get_artifact_cache():
+    # shared by every session, identical inputs are only generated once
+    return ArtifactCache("artifact_cache")
+
+
 @st.fragment
 def show_download_button(data, label, file_name, mime, on_click, args):
     st.download_button(
@@ -148,10 +184,17 @@ def show_download_button(data, label, file_name, mime, on_click, args):
 with tabs[0]:
     st.header("Generate PDG Data for Spectrum-X Designs")
     left, middle, right = st.columns(3, vertical_alignment="top")
+    # outputs are computed on demand, only the ticked outputs pay for the data sets they need
+    data_format = middle.selectbox(label="PDG Data Format", options=["excel", "parquet", "arrow", "csv.gz", "none"],
+                                   help="parquet, arrow and csv.gz export one file per data set with typed columns "
+                                        "for machine consumers, the host port mapping is the slowest part of "
+                                        "large fabrics")
     dot_file = middle.checkbox(label="Create DOT File", value=True)
+    ansible_hosts = middle.checkbox(label="Create Ansible Inventory", value=True)
 
     try:
-        num_hosts = int(left.text_input("Number of Hosts:", value=64, max_chars=4, placeholder="(1 - 1024 (8K GPUs)"))
+        num_hosts = int(left.text_input("Number of Hosts:", value=64, max_chars=4,
+                                        placeholder="1 - 8192 (64K GPUs), 3-tier above 1024 hosts (8K GPUs)"))
     except ValueError:
         st.error("Invalid value, try again")
 
@@ -184,20 +227,56 @@ with tabs[0]:
     host_prefix = left.text_input(label="host prefix", value="dgx", disabled=st.session_state.disabled)
     leaf_prefix = left.text_input(label="leaf prefix", value="leaf", disabled=st.session_state.disabled)
     spine_prefix = left.text_input(label="spine prefix", value="spine", disabled=st.session_state.disabled)
+    super_spine_prefix = left.text_input(label="super-spine prefix (3-tier only)", value="superspine",
+                                         disabled=st.session_state.disabled)
     host_p2p_lead_octet = left.text_input(label="point-to-point lead octet for host connections", value=172,
                                           disabled=st.session_state.disabled)
     spine_base_as = left.text_input(label="Base AS for Spines", value=65200, disabled=st.session_state.disabled)
-    leaf_base_as = left.text_input(label="Base AS for Leafs", value=65000, disabled=st.session_state.disabled)
+    leaf_base_as = left.text_input(label="Base AS for Leafs", value=65000, disabled=st.session_state.disabled,
+                                   help="3-tier fabrics use 4-byte leaf ASNs in asdot notation: <base AS>.<leaf ID>")
+    super_spine_base_as = left.text_input(label="AS for Super-Spines (3-tier only)", value=65100,
+                                          disabled=st.session_state.disabled)
     p2pmask = left.text_input(label="Mask for point-to-point connections", value="/31", disabled=True)
     start_id = left.text_input(label="starting digit number", value="0", disabled=True, label_visibility="visible",
                                help="only starting from 0 is supported for now")
 
     if num_hosts > 0:
-        if num_hosts > 1024:
-            left.error("Currently the generator only supports up to 1024 hosts")
-        if st.button("Generate", key=1):
+        if num_hosts > 8192:
+            left.error("Currently the generator only supports up to 8192 hosts")
+        elif num_hosts > 1024:
+            left.info("More than 1024 hosts, a 3-tier (super-spine) fabric will be generated")
+        if st.button("Generate", key=1, disabled=num_hosts > 8192):
+            artifact_cache = get_artifact_cache()
+            cache_key = artifact_cache.key({
+                "num_hosts": int(num_hosts), "start_id": int(start_id), "digit_filler": int(digit_filler),
+                "host_prefix": host_prefix, "leaf_prefix": leaf_prefix, "spine_prefix": spine_prefix,
+                "super_spine_prefix": super_spine_prefix, "host_p2p_lead_octet": int(host_p2p_lead_octet),
+                "spine_base_as": int(spine_base_as), "leaf_base_as": int(leaf_base_as),
+                "super_spine_base_as": int(super_spine_base_as), "p2pmask": p2pmask, "breakout": int(breakout),
+                "nvidia_air": nvidia_air, "data_format": data_format, "dot_file": dot_file,
+                "ansible_hosts": ansible_hosts,
+                # the artifacts change with the generator, its templates and the static files copied into the zip
+                "sources": tree_digest("util", "data_handler", "jinja_templates", "cumulus_ansible",
+                                       ignore=[f"cumulus_ansible/{path}" for path in GENERATED_ANSIBLE_FILES]),
+            })
+            cached_zip = artifact_cache.get(cache_key)
+        else:
+            cached_zip = cache_key = None
+        if cached_zip is not None:
+            st.info("Served from the artifact cache, the inputs match a previous generation")
+            show_download_button(
+                label="Download ZIP",
+                data=cached_zip.read_bytes(),
+                file_name="cumulus_gen.zip",
+                mime="application/zip",
+                on_click=None,
+                args=None
+            )
+        elif cache_key is not None:
             cumulus_temp_dir = f"cumulus_{st.session_state['user_id']}"
-            os.makedirs(cumulus_temp_dir, exist_ok=True)
+            # start from an empty directory, the zip is cached and must only hold the outputs of this run
+            shutil.rmtree(cumulus_temp_dir, ignore_errors=True)
+            os.makedirs(cumulus_temp_dir)
             print(f"Creating directory {cumulus_temp_dir}")
             netmapper = NetworkMapping(num_hosts=int(num_hosts),
                                        start_id=int(start_id),
@@ -205,24 +284,47 @@ with tabs[0]:
                                        host_prefix=host_prefix,
                                        leaf_prefix=leaf_prefix,
                                        spine_prefix=spine_prefix,
+                                       super_spine_prefix=super_spine_prefix,
                                        host_p2p_lead_octet=int(host_p2p_lead_octet),
                                        spine_base_as=int(spine_base_as),
                                        leaf_base_as=int(leaf_base_as),
+                                       super_spine_base_as=int(super_spine_base_as),
                                        p2pmask=p2pmask,
                                        breakout=breakout,
                                        nvidia_air=nvidia_air,
                                        file_dir=cumulus_temp_dir)
-            netmapper.create_excel()
-
+            findings = validate_fabric(netmapper)
+            if findings:
+                st.warning(f"The fabric has {len(findings)} consistency problems")
+                st.dataframe(findings)
+            if data_format == "excel":
+                excel_progress = st.progress(0.0, text="Writing PDG Excel")
+
+                def show_excel_progress(sheet_name, rows_written, total_rows):
+                    excel_progress.progress(rows_written / total_rows if total_rows else 1.0,
+                                            text=f"Writing sheet '{sheet_name}': {rows_written} rows")
+
+                netmapper.create_excel(progress=show_excel_progress)
+                excel_progress.empty()
+            elif data_format != "none":
+                netmapper.export_data(file_format=data_format)
             if nvidia_air:
-                netmapper.generate_air_script()
+                netmapper.generate_air_script(filepath=f"{cumulus_temp_dir}/env_setup.sh")
+            # only the static roles and playbooks are copied, the inventory and the PTM topology of this fabric are
+            # written into the copy when they're ticked
+            ansible_dir = f"{cumulus_temp_dir}/cumulus_ansible"
+            copy_directory(source_dir='cumulus_ansible/', destination_dir=ansible_dir,
+                           ignore=ignore_generated_ansible_files)
             if dot_file:
-                netmapper.create_dot_graph()
-            netmapper.generate_ansible_hosts()
-            copy_directory(source_dir='cumulus_ansible/', destination_dir=f"{cumulus_temp_dir}/cumulus_ansible/")
-            shutil.copy(src='nvidia_air/scripts/env_setup.sh', dst=cumulus_temp_dir)
-            shutil.copy(src='cumulus_ansible/roles/ptm/files/topology.dot', dst=cumulus_temp_dir)
+                # the PTM topology and the copy in the download share a single pass over the links
+                netmapper.write_dot_graph(f"{ansible_dir}/roles/ptm/files/topology.dot",
+                                          f"{cumulus_temp_dir}/topology.dot")
+            if ansible_hosts:
+                netmapper.generate_ansible_hosts(filepath=f"{ansible_dir}/inventory/hosts")
+            # generation.json lets a later run expand this fabric without moving existing assignments
+            netmapper.write_manifest()
             zip_buffer = create_zip(cumulus_temp_dir)
+            artifact_cache.put(cache_key, cumulus_temp_dir, zip_buffer.getvalue())
             show_download_button(
                 label="Download ZIP",
                 data=zip_buffer,
@@ -231,6 +333,10 @@ with tabs[0]:
                 on_click=clean_up_dir,
                 args=cumulus_temp_dir     # arguments for clean_up script
             )
+        if cache_key is not None:
+            cache_stats = artifact_cache.stats()
+            st.caption(f"Artifact cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                       f"{cache_stats['entries']} entries, {cache_stats['size_bytes'] / 2 ** 20:.1f} MB")
     else:
         left.error("number of hosts must be greater than 0")
 # Tab for nvidia air page
@@ -345,27 +451,46 @@ with tabs[2]:
         selected_sheets = checkbox_fragment(sheet_names)
 
         # After selecting sheets, "Run" button to call the backend script
+        debug_fragments = st.checkbox("Keep per-sheet configuration fragments (debug)", value=False)
         if st.button("Run"):
-            for selected_sheet in selected_sheets:
-                if selected_sheet not in ['Devices', 'SFP Matrix', 'CableMatrix']:
-                    process_sheet(wb=wb, sheet_name=selected_sheet, file_dir=user_dir)
+            # the sections of every device are kept in memory, each configuration is written once
+            builder = ConfigBuilder(user_dir, comment_prefix="!", debug=debug_fragments)
+            # the sheets run concurrently, a device is written once every sheet is processed, a vPC pair is
+            # compared as soon as both of its devices are written, the zip waits for everything
+            script_run_ctx = get_script_run_ctx()
+            pipeline = Pipeline(workers=min(32, (os.cpu_count() or 1) + 4),
+                                initializer=lambda: add_script_run_ctx(threading.current_thread(), script_run_ctx))
+            sheet_tasks = [pipeline.add(f"sheet:{selected_sheet}", functools.partial(
+                process_sheet, wb=wb, sheet_name=selected_sheet, file_dir=user_dir, builder=builder))
+                for selected_sheet in selected_sheets if selected_sheet not in ['Devices', 'SFP Matrix', 'CableMatrix']]
+            # the devices are rendered in parallel, one worker per core. The workers are spawned, forking the
+            # multithreaded streamlit server can deadlock them
+            pipeline.add("render", functools.partial(builder.render_all, workers=os.cpu_count() or 1,
+                                                     mp_context=multiprocessing.get_context("spawn")),
+                         *sheet_tasks)
             for device in device_store.devices:
-                merge_nxos_config(f'{user_dir}/{device.name}', device.name)
+                pipeline.add(f"merge:{device.name}", functools.partial(write_device_config, builder, device.name),
+                             "render")
 
             for device in device_store.devices:
                 if device.node_id % 2 != 0:
-                    file_diff_dir = f'{user_dir}/config_diffs/'
                     odd_device_name = device_store.get_device_by_id(device.node_id)
                     even_device_name = device_store.get_device_by_id(device.node_id + 1)
+                    if even_device_name is None:
+                        st.warning(f"{odd_device_name} has no vPC peer (node ID {device.node_id + 1}), "
+                                   f"its configuration isn't compared")
+                        continue
                     odd_device_file = f'{user_dir}/{odd_device_name}/{odd_device_name}.txt'
                     even_device_file = f'{user_dir}/{even_device_name}/{even_device_name}.txt'
                     output_file = f'{user_dir}/config_diffs/{odd_device_name}-diff-{even_device_name}'
                     file_diff = diff_file.FileComparer(odd_device_file, even_device_file, output_file)
-                    file_diff.compare_files()
+                    pipeline.add(f"diff:{odd_device_name}-{even_device_name}", file_diff.compare_files,
+                                 f"merge:{odd_device_name}", f"merge:{even_device_name}")
 
             # After running the backend script, present the user with the zip download button
+            pipeline.add("zip", functools.partial(create_zip, user_dir), *pipeline.tasks)
             print("Zipping user directory", user_dir)
-            zip_buffer = create_zip(user_dir)
+            zip_buffer = pipeline.run()["zip"]
             st.info("Creating zip file")
 
             st.success("Config files created successfully!")
@@ -379,6 +504,13 @@ with tabs[2]:
                 on_click=clean_up_dir,
                 args=(user_dir,)
             )
+            template_stats = template_cache_stats()
+            st.caption(f"Template cache: {template_stats['file_loads']} file templates compiled, "
+                       f"{template_stats['file_hits']} reused, {template_stats['inline_misses']} inline templates "
+                       f"compiled, {template_stats['inline_hits']} reused")
+            with st.expander(f"Run timings: {pipeline.seconds:.2f}s"):
+                st.caption(f"Critical path: {' -> '.join(pipeline.critical_path())}")
+                st.dataframe(pipeline.timings())
 
 with tabs[3]:
     # Download button for the Excel template file